@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import multiprocessing
 import os
 import platform
 import sys
@@ -31,30 +32,36 @@ def show_constants():
         print(f"\t{key}: {value}")
 
 
-show_constants()
+def main():
+    show_constants()
 
+    if os.path.isfile("highdpi_passthrough"):
+        # 解决不同电脑不同缩放比例问题，非整数倍缩放，如系统中设置了150%的缩放，QT程序的缩放将是两倍，QT 5.14中增加了非整数倍的支持，需要加入下面的代码才能使用150%的缩放
+        # 默认是 Qt.HighDpiScaleFactorRoundingPolicy.Round，会将150%缩放变成200%
+        QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
 
-if os.path.isfile("highdpi_passthrough"):
-    # 解决不同电脑不同缩放比例问题，非整数倍缩放，如系统中设置了150%的缩放，QT程序的缩放将是两倍，QT 5.14中增加了非整数倍的支持，需要加入下面的代码才能使用150%的缩放
-    # 默认是 Qt.HighDpiScaleFactorRoundingPolicy.Round，会将150%缩放变成200%
-    QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
+    # 适应高DPI设备
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+    QCoreApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
 
-# 适应高DPI设备
-QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
-QCoreApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
+    # 解决图片在不同分辨率显示模糊问题
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
+    QCoreApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
 
-# 解决图片在不同分辨率显示模糊问题
-QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
-QCoreApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
+    app = QApplication(sys.argv)
+    if platform.system() != "Windows":
+        app.setWindowIcon(QIcon("resources/Img/MDCx.ico"))  # 设置任务栏图标
+    ui = MyMAinWindow()
+    ui.show()
+    app.installEventFilter(ui)
+    # newWin2 = CutWindow()
+    try:
+        sys.exit(app.exec_())
+    except Exception as e:
+        print(e)
 
-app = QApplication(sys.argv)
-if platform.system() != "Windows":
-    app.setWindowIcon(QIcon("resources/Img/MDCx.ico"))  # 设置任务栏图标
-ui = MyMAinWindow()
-ui.show()
-app.installEventFilter(ui)
-# newWin2 = CutWindow()
-try:
-    sys.exit(app.exec_())
-except Exception as e:
-    print(e)
+
+if __name__ == "__main__":
+    # 进程池 (如 HTML 解析) 在 spawn 模式下会重新导入主模块, 需避免子进程启动界面
+    multiprocessing.freeze_support()
+    main()
@@ -1,9 +1,12 @@
 import asyncio
+import concurrent.futures
 import os
 import re
 import shutil
+import threading
 import time
 import traceback
+from collections.abc import AsyncIterator
 from pathlib import Path
 
 import aiofiles
@@ -18,8 +21,9 @@ from ..models.enums import FileMode
 from ..models.flags import Flags
 from ..models.log_buffer import LogBuffer
 from ..signals import signal
-from ..utils import executor, get_current_time, get_used_time
+from ..utils import get_current_time, get_used_time
 from ..utils.file import copy_file_async, copy_file_sync, delete_file_async, delete_file_sync, move_file_async
+from ..utils.scan_index import ScanIndex
 
 
 async def move_other_file(number: str, folder_old_path: Path, folder_new_path: Path, file_name: str, naming_rule: str):
@@ -125,6 +129,8 @@ async def pic_some_deal(number: str, thumb_final_path: Path, fanart_final_path:
 
 
 async def save_success_list(old_path: Path | None = None, new_path: Path | None = None) -> None:
+    if Flags.success_list.path is None:  # 尚未载入 (如服务器模式), 先载入已有记录
+        await asyncio.to_thread(Flags.success_list.load, resources.u("success.txt"))
     if old_path and NoEscape.RECORD_SUCCESS_FILE in manager.config.no_escape:
         # 软硬链接时，保存原路径；否则保存新路径
         if manager.config.soft_link != 0:
@@ -134,14 +140,16 @@ async def save_success_list(old_path: Path | None = None, new_path: Path | None
             if await aiofiles.os.path.islink(new_path):
                 Flags.success_list.add(old_path)
                 Flags.success_list.add(new_path.resolve())
-    if get_used_time(Flags.success_save_time) > 5 or not old_path:
-        Flags.success_save_time = time.time()
-        try:
-            async with aiofiles.open(resources.u("success.txt"), "w", encoding="utf-8", errors="ignore") as f:
-                await f.writelines(sorted(str(p) + "\n" for p in Flags.success_list))
-        except Exception as e:
-            signal.show_log_text(f"  Save success list Error {str(e)}\n {traceback.format_exc()}")
-        signal.view_success_file_settext.emit(f"查看 ({len(Flags.success_list)})")
+    # 新增的路径以追加方式写入, 开销与列表总长度无关, 因此每次都立即写入
+    try:
+        await asyncio.to_thread(Flags.success_list.flush)
+    except Exception as e:
+        signal.show_log_text(f"  Save success list Error {str(e)}\n {traceback.format_exc()}")
+    signal.view_success_file_settext.emit(f"查看 ({len(Flags.success_list)})")
+
+
+SCAN_POSITION_PREFIX = "#scan:"
+"""remain.txt 首行. 遍历未完成时记录遍历目录及最后发现的文件"""
 
 
 def save_remain_list() -> None:
@@ -149,6 +157,9 @@ def save_remain_list() -> None:
     if Flags.can_save_remain and Switch.REMAIN_TASK in manager.config.switch_on:
         try:
             with open(resources.u("remain.txt"), "w", encoding="utf-8", errors="ignore") as f:
+                if Flags.scan_position is not None:  # 遍历未完成, 记录遍历位置
+                    root, after = Flags.scan_position
+                    f.write(f"{SCAN_POSITION_PREFIX}{root}\t{after}\n")
                 f.writelines(sorted(str(p) + "\n" for p in Flags.remain_list))
                 Flags.can_save_remain = False
         except Exception as e:
@@ -242,31 +253,68 @@ async def check_and_clean_files() -> None:
 
 def get_success_list() -> None:
     """This function is intended to be sync"""
-    Flags.success_save_time = time.time()
-    if os.path.isfile(resources.u("success.txt")):
-        with open(resources.u("success.txt"), encoding="utf-8", errors="ignore") as f:
-            paths = f.readlines()
-            Flags.success_list = {p for path in paths if path.strip() and (p := Path(path.strip())).suffix}
-            executor.run(save_success_list())
+    Flags.success_list.load(resources.u("success.txt"))
+    Flags.success_list.flush()  # 重复行过多时压缩
     signal.view_success_file_settext.emit(f"查看 ({len(Flags.success_list)})")
 
 
-async def movie_lists(ignore_dirs: list[Path], media_type: list[str], movie_path: Path) -> list[Path]:
+async def iter_movie_lists(
+    ignore_dirs: list[Path],
+    media_type: list[str],
+    movie_path: Path,
+    maxsize: int = 0,
+    output_dirs: list[Path] | None = None,
+) -> AsyncIterator[Path]:
+    """
+    边遍历边产出待刮削文件. 遍历在后台线程中进行, 通过有界队列交给调用方, 队列满时遍历线程会阻塞等待.
+
+    Args:
+        maxsize (int): 队列容量, 0 表示不限制
+        output_dirs (list[Path]): 成功/失败/软链接输出目录, 遍历期间可能有文件移入, 始终跳过
+    """
     start_time = time.time()
-    total = []
     skip_list = ["skip", ".skip", ".ignore"]
     not_skip_success = NoEscape.SKIP_SUCCESS_FILE not in manager.config.no_escape
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[Path | None] = asyncio.Queue(maxsize)
+    stopped = threading.Event()
+    found = skip = skip_repeat_softlink = 0
+    output_dirs = output_dirs or []
+    # 含 first_folder_name 的输出目录按所在的一级目录展开
+    output_templates = [p.as_posix() for p in output_dirs if "first_folder_name" in p.as_posix()]
+
+    def is_output_dir(path: Path) -> bool:
+        if path in output_dirs:
+            return True
+        if output_templates and path.is_relative_to(movie_path) and path != movie_path:
+            first_folder_name = path.relative_to(movie_path).parts[0]
+            return any(Path(t.replace("first_folder_name", first_folder_name)) == path for t in output_templates)
+        return False
 
     signal.show_traceback_log("🔎 遍历待刮削目录....")
 
+    def put(item: Path | None) -> bool:
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=1)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stopped.is_set():
+                    future.cancel()
+                    return False
+
     def task():
+        nonlocal found, skip, skip_repeat_softlink
         i = 100
-        skip = 0
-        skip_repeat_softlink = 0
-        for root, dirs, files in movie_path.walk(top_down=True):
+        index = ScanIndex(resources.u("scan_index.json") if manager.config.scan_cache else None)
+        for root, dirs, files, links in index.walk(movie_path):
+            if stopped.is_set():
+                return
             for d in dirs.copy():
-                if root / d in ignore_dirs or "behind the scenes" in d:
+                if root / d in ignore_dirs or is_output_dir(root / d) or "behind the scenes" in d:
                     dirs.remove(d)
+            dirs.sort()
 
             # 文件夹是否存在跳过文件
             for skip_key in skip_list:
@@ -275,7 +323,7 @@ async def movie_lists(ignore_dirs: list[Path], media_type: list[str], movie_path
                     break
             else:
                 # 处理文件列表
-                for f in files:
+                for f in sorted(files):
                     file_name, file_ext = os.path.splitext(f)
 
                     # 跳过隐藏文件、预告片、主题视频
@@ -291,6 +339,7 @@ async def movie_lists(ignore_dirs: list[Path], media_type: list[str], movie_path
                     if CleanAction.AUTO_CLEAN in manager.config.clean_enable and need_clean(path, f, file_ext):
                         result, error_info = delete_file_sync(path)
                         if result:
+                            index.invalidate(root)
                             signal.show_log_text(f" 🗑 Clean: {path} ")
                         else:
                             signal.show_log_text(f" 🗑 Clean error: {error_info} ")
@@ -299,12 +348,13 @@ async def movie_lists(ignore_dirs: list[Path], media_type: list[str], movie_path
                     # 添加文件
                     temp_total = []
                     if file_ext.lower() in media_type:
-                        if os.path.islink(path):
-                            real_path = path.readlink()
+                        if (link := links.get(f)) is not None:
+                            real_path = Path(link)
                             # 清理失效的软链接文件
                             if NoEscape.CHECK_SYMLINK in manager.config.no_escape and not os.path.exists(real_path):
                                 result, error_info = delete_file_sync(path)
                                 if result:
+                                    index.invalidate(root)
                                     signal.show_log_text(f" 🗑 Clean dead link: {path} ")
                                 else:
                                     signal.show_log_text(f" 🗑 Clean dead link error: {error_info} ")
@@ -322,43 +372,72 @@ async def movie_lists(ignore_dirs: list[Path], media_type: list[str], movie_path
                         else:
                             temp_total.append(path)
                         if not_skip_success or path not in Flags.success_list:
-                            total.append(path)
+                            if not put(path):
+                                return
+                            found += 1
                         else:
                             skip += 1
 
-        found_count = len(total)
-        if found_count >= i:
-            i = found_count + 100
-            signal.show_traceback_log(
-                f"✅ Found ({found_count})! "
-                f"Skip successfully scraped ({skip}) repeat softlink ({skip_repeat_softlink})! "
-                f"({get_used_time(start_time)}s)... Still searching, please wait... \u3000"
-            )
-            signal.show_log_text(
-                f"    {get_current_time()} Found ({found_count})! "
-                f"Skip successfully scraped ({skip}) repeat softlink ({skip_repeat_softlink})! "
-                f"({get_used_time(start_time)}s)... Still searching, please wait... \u3000"
-            )
-        return total, skip, skip_repeat_softlink
+            if found >= i:
+                i = found + 100
+                signal.show_traceback_log(
+                    f"✅ Found ({found})! "
+                    f"Skip successfully scraped ({skip}) repeat softlink ({skip_repeat_softlink})! "
+                    f"({get_used_time(start_time)}s)... Still searching, please wait... \u3000"
+                )
+                signal.show_log_text(
+                    f"    {get_current_time()} Found ({found})! "
+                    f"Skip successfully scraped ({skip}) repeat softlink ({skip_repeat_softlink})! "
+                    f"({get_used_time(start_time)}s)... Still searching, please wait... \u3000"
+                )
+
+        # 未被中途停止时, 同时移除已不存在或被忽略的目录的记录
+        index.save(movie_path)
+        if manager.config.scan_cache:
+            signal.show_log_text(f"    目录扫描缓存: 命中 {index.hits}, 重新读取 {index.misses}")
+
+    def run():
+        try:
+            task()
+        finally:
+            put(None)
 
-    total, skip, skip_repeat_softlink = await asyncio.to_thread(task)
+    walker = asyncio.create_task(asyncio.to_thread(run))
+    try:
+        while (path := await queue.get()) is not None:
+            yield path
+        await walker  # 抛出遍历过程中的异常
+    finally:
+        stopped.set()
+        if not walker.done():
+            walker.cancel()
 
-    total.sort()
     signal.show_traceback_log(
-        f"🎉 Done!!! Found ({len(total)})! "
+        f"🎉 Done!!! Found ({found})! "
         f"Skip successfully scraped ({skip}) repeat softlink ({skip_repeat_softlink})! "
         f"({get_used_time(start_time)}s) \u3000"
     )
     signal.show_log_text(
-        f"    Done!!! Found ({len(total)})! "
+        f"    Done!!! Found ({found})! "
         f"Skip successfully scraped ({skip}) repeat softlink ({skip_repeat_softlink})! "
         f"({get_used_time(start_time)}s) \u3000"
     )
+
+
+async def movie_lists(ignore_dirs: list[Path], media_type: list[str], movie_path: Path) -> list[Path]:
+    total = [p async for p in iter_movie_lists(ignore_dirs, media_type, movie_path)]
+    total.sort()
     return total
 
 
-async def get_movie_list(file_mode: FileMode, movie_path: Path, ignore_dirs: list[Path]) -> list[Path]:
-    movie_list = []
+async def iter_movie_list(
+    file_mode: FileMode,
+    movie_path: Path,
+    ignore_dirs: list[Path],
+    maxsize: int = 0,
+    output_dirs: list[Path] | None = None,
+) -> AsyncIterator[Path]:
+    """边遍历边产出待刮削文件, 供刮削流程在发现第一个文件后即可开始处理."""
     if file_mode == FileMode.Default:  # 刮削默认视频目录的文件
         if not await aiofiles.os.path.exists(movie_path):
             signal.show_log_text("\n 🔴 Movie folder does not exist!")
@@ -372,13 +451,17 @@ async def get_movie_list(file_mode: FileMode, movie_path: Path, ignore_dirs: lis
                 or manager.config.main_mode == 4
             ):
                 ignore_dirs = []
+            count_all = 0
             try:
-                # 获取所有需要刮削的影片列表
-                movie_list = await movie_lists(ignore_dirs, manager.config.media_type, movie_path)
+                # 获取所有需要刮削的影片
+                async for path in iter_movie_lists(
+                    ignore_dirs, manager.config.media_type, movie_path, maxsize, output_dirs
+                ):
+                    count_all += 1
+                    yield path
             except Exception:
                 signal.show_traceback_log(traceback.format_exc())
                 signal.show_log_text(traceback.format_exc())
-            count_all = len(movie_list)
             signal.show_log_text(" 📺 Find " + str(count_all) + " movies")
 
     elif file_mode == FileMode.Single:  # 刮削单文件（工具页面）
@@ -386,11 +469,16 @@ async def get_movie_list(file_mode: FileMode, movie_path: Path, ignore_dirs: lis
         if not await aiofiles.os.path.exists(file_path):
             signal.show_log_text(" 🔴 Movie file does not exist!")
         else:
-            movie_list.append(file_path)  # 把文件路径添加到movie_list
             signal.show_log_text(f" 🖥 File path: {file_path}")
             if Flags.appoint_url:
                 signal.show_log_text(" 🌐 File url: " + Flags.appoint_url)
+            yield file_path
+
 
+async def get_movie_list(file_mode: FileMode, movie_path: Path, ignore_dirs: list[Path]) -> list[Path]:
+    movie_list = [p async for p in iter_movie_list(file_mode, movie_path, ignore_dirs)]
+    if file_mode == FileMode.Default:
+        movie_list.sort()
     return movie_list
 
 
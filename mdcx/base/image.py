@@ -1,10 +1,8 @@
 import shutil
 import time
-import traceback
 from pathlib import Path
 
 import aiofiles.os
-from PIL import Image
 
 from ..config.enums import DownloadableFile, KeepableFile
 from ..config.extend import get_movie_path_setting
@@ -13,7 +11,9 @@ from ..config.resources import resources
 from ..models.log_buffer import LogBuffer
 from ..signals import signal
 from ..utils import get_used_time
-from ..utils.file import check_pic_async, move_file_async
+from ..utils.blob_store import link_file
+from ..utils.file import move_file_async
+from ..utils.image_pool import MarkJob, add_marks, image_pool
 from .file import movie_lists
 
 
@@ -45,7 +45,11 @@ async def extrafanart_copy2(folder_path: Path):
 
     if await aiofiles.os.path.exists(extrafanart_copy_path):
         shutil.rmtree(extrafanart_copy_path, ignore_errors=True)
-    shutil.copytree(extrafanart_path, extrafanart_copy_path)
+    if manager.config.image_store:
+        # 剧照副本与原图内容相同, 文件系统支持时使用写时复制或硬链接, 不占用额外空间
+        shutil.copytree(extrafanart_path, extrafanart_copy_path, copy_function=lambda s, d: link_file(Path(s), Path(d)))
+    else:
+        shutil.copytree(extrafanart_path, extrafanart_copy_path)
 
     filelist = await aiofiles.os.listdir(extrafanart_copy_path)
     for each in filelist:
@@ -83,136 +87,78 @@ async def extrafanart_extras_copy(folder_path: Path):
     return True
 
 
-async def _add_to_pic(pic_path: Path, img_pic: Image.Image, mark_size: int, count: int, mark_name: str):
-    # 获取水印图片，生成水印
-    mark_fixed = manager.config.mark_fixed
-    mark_pos_corner = manager.config.mark_pos_corner
-    mark_pic_path = ""
-    if mark_name == "4K":
-        mark_pic_path = resources.icon_4k_path
-    elif mark_name == "8K":
-        mark_pic_path = resources.icon_8k_path
-    elif mark_name == "字幕":
-        mark_pic_path = resources.icon_sub_path
-    elif mark_name == "有码":
-        mark_pic_path = resources.icon_youma_path
-    elif mark_name == "破解":
-        mark_pic_path = resources.icon_umr_path
-    elif mark_name == "流出":
-        mark_pic_path = resources.icon_leak_path
-    elif mark_name == "无码":
-        mark_pic_path = resources.icon_wuma_path
+def _mark_icon_path(mark_name: str) -> Path | None:
+    return {
+        "4K": resources.icon_4k_path,
+        "8K": resources.icon_8k_path,
+        "字幕": resources.icon_sub_path,
+        "有码": resources.icon_youma_path,
+        "破解": resources.icon_umr_path,
+        "流出": resources.icon_leak_path,
+        "无码": resources.icon_wuma_path,
+    }.get(mark_name)
 
-    if mark_pic_path:
-        try:
-            img_subt = Image.open(mark_pic_path)
-            img_subt = img_subt.convert("RGBA")
-            scroll_high = int(img_pic.height * mark_size / 40)
-            scroll_width = int(scroll_high * img_subt.width / img_subt.height)
-            img_subt = img_subt.resize((scroll_width, scroll_high), resample=Image.Resampling.LANCZOS)
-        except Exception:
-            signal.show_log_text(f"{traceback.format_exc()}\n Open Pic: {mark_pic_path}")
-            print(traceback.format_exc())
-            return
-        r, g, b, a = img_subt.split()  # 获取颜色通道, 保持png的透明性
 
-        # 固定一个位置
-        if mark_fixed == "corner":
-            corner_top_left = [(0, 0), (scroll_width, 0), (scroll_width * 2, 0)]
-            corner_bottom_left = [
-                (0, img_pic.height - scroll_high),
-                (scroll_width, img_pic.height - scroll_high),
-                (scroll_width * 2, img_pic.height - scroll_high),
-            ]
-            corner_top_right = [
-                (img_pic.width - scroll_width * 4, 0),
-                (img_pic.width - scroll_width * 2, 0),
-                (img_pic.width - scroll_width, 0),
-            ]
-            corner_bottom_right = [
-                (img_pic.width - scroll_width * 4, img_pic.height - scroll_high),
-                (img_pic.width - scroll_width * 2, img_pic.height - scroll_high),
-                (img_pic.width - scroll_width, img_pic.height - scroll_high),
-            ]
-            corner_dic = {
-                "top_left": corner_top_left,
-                "bottom_left": corner_bottom_left,
-                "top_right": corner_top_right,
-                "bottom_right": corner_bottom_right,
-            }
-            mark_postion = corner_dic[mark_pos_corner][count]
-
-        # 封面四个角的位置
-        else:
-            pos = [
-                {"x": 0, "y": 0},
-                {"x": img_pic.width - scroll_width, "y": 0},
-                {"x": img_pic.width - scroll_width, "y": img_pic.height - scroll_high},
-                {"x": 0, "y": img_pic.height - scroll_high},
-            ]
-            mark_postion = (pos[count]["x"], pos[count]["y"])
-        try:  # 图片如果下载不完整时，这里会崩溃，跳过
-            img_pic.paste(img_subt, mark_postion, mask=a)
-        except Exception:
-            signal.show_log_text(traceback.format_exc())
-        img_pic = img_pic.convert("RGB")
-        temp_pic_path = pic_path.with_suffix(".[MARK].jpg")
-        try:
-            img_pic.load()
-            img_pic.save(temp_pic_path, quality=95, subsampling=0)
-        except Exception:
-            signal.show_log_text(traceback.format_exc())
-        img_subt.close()
-        if await check_pic_async(temp_pic_path):
-            await move_file_async(temp_pic_path, pic_path)
-
-
-async def add_mark_thread(pic_path: Path, mark_list: list[str]):
-    mark_size = manager.config.mark_size
+def _plan_marks(mark_list: list[str]) -> list[tuple[str, int]]:
+    """确定各水印的位置序号"""
     mark_fixed = manager.config.mark_fixed
-    mark_pos = manager.config.mark_pos
-    mark_pos_hd = manager.config.mark_pos_hd
-    mark_pos_sub = manager.config.mark_pos_sub
-    mark_pos_mosaic = manager.config.mark_pos_mosaic
     mark_pos_corner = manager.config.mark_pos_corner
-    try:
-        img_pic = Image.open(pic_path)
-    except Exception:
-        signal.show_log_text(f"{traceback.format_exc()}\n Open Pic: {pic_path}")
-        return
-
+    plan = []
     if mark_fixed == "corner":
         count = 0
         if "left" not in mark_pos_corner:
             count = 3 - len(mark_list)
         for mark_name in mark_list:
-            await _add_to_pic(pic_path, img_pic, mark_size, count, mark_name)
+            plan.append((mark_name, count))
             count += 1
-    else:
-        pos = {
-            "top_left": 0,
-            "top_right": 1,
-            "bottom_right": 2,
-            "bottom_left": 3,
-        }
-        mark_pos_count = pos.get(mark_pos, 0)  # 获取自定义位置, 取余配合pos达到顺时针添加的效果
-        count_hd = -1
-        for mark_name in mark_list:
-            if mark_name == "4K" or mark_name == "8K":  # 4K/8K使用固定位置
-                count_hd = pos.get(mark_pos_hd, 0)
-                await _add_to_pic(pic_path, img_pic, mark_size, count_hd, mark_name)
-            elif mark_fixed == "fixed":  # 固定位置
-                count = pos.get(mark_pos_sub, 0) if mark_name == "字幕" else pos.get(mark_pos_mosaic, 0)
-                await _add_to_pic(pic_path, img_pic, mark_size, count, mark_name)
-            else:  # 不固定位置
-                if mark_pos_count % 4 == count_hd:
-                    mark_pos_count += 1
-                if mark_name == "字幕":
-                    await _add_to_pic(pic_path, img_pic, mark_size, mark_pos_count % 4, mark_name)  # 添加字幕
-                    mark_pos_count += 1
-                else:
-                    await _add_to_pic(pic_path, img_pic, mark_size, mark_pos_count % 4, mark_name)
-    img_pic.close()
+        return plan
+
+    pos = {
+        "top_left": 0,
+        "top_right": 1,
+        "bottom_right": 2,
+        "bottom_left": 3,
+    }
+    mark_pos_count = pos.get(manager.config.mark_pos, 0)  # 获取自定义位置, 取余配合pos达到顺时针添加的效果
+    count_hd = -1
+    for mark_name in mark_list:
+        if mark_name == "4K" or mark_name == "8K":  # 4K/8K使用固定位置
+            count_hd = pos.get(manager.config.mark_pos_hd, 0)
+            plan.append((mark_name, count_hd))
+        elif mark_fixed == "fixed":  # 固定位置
+            if mark_name == "字幕":
+                plan.append((mark_name, pos.get(manager.config.mark_pos_sub, 0)))
+            else:
+                plan.append((mark_name, pos.get(manager.config.mark_pos_mosaic, 0)))
+        else:  # 不固定位置
+            if mark_pos_count % 4 == count_hd:
+                mark_pos_count += 1
+            plan.append((mark_name, mark_pos_count % 4))
+            if mark_name == "字幕":
+                mark_pos_count += 1
+    return plan
+
+
+async def add_marks_to_pics(pics: list[Path], mark_list: list[str]):
+    """为同一部影片的多张图片加水印, 作为一个任务提交到图片处理池"""
+    marks = [
+        (icon_path, count) for mark_name, count in _plan_marks(mark_list) if (icon_path := _mark_icon_path(mark_name))
+    ]
+    if not marks or not pics:
+        return
+    job = MarkJob(
+        pics=pics,
+        marks=marks,
+        mark_size=manager.config.mark_size,
+        mark_fixed=manager.config.mark_fixed,
+        mark_pos_corner=manager.config.mark_pos_corner,
+    )
+    for e in await image_pool.run(add_marks, job):
+        signal.show_log_text(e)
+
+
+async def add_mark_thread(pic_path: Path, mark_list: list[str]):
+    await add_marks_to_pics([pic_path], mark_list)
 
 
 async def add_del_extrafanart_copy(mode: str) -> None:
@@ -2,6 +2,8 @@
 import asyncio
 import re
 import threading
+from collections import OrderedDict
+from collections.abc import Iterable
 from io import BytesIO
 from pathlib import Path
 from typing import Literal, overload
@@ -16,7 +18,9 @@ from ..manual import ManualConfig
 from ..models.log_buffer import LogBuffer
 from ..signals import signal
 from ..utils import executor
-from ..utils.file import check_pic_async
+from ..utils.file import write_file_atomic
+from ..utils.image_pool import parse_image_size
+from ..web_scheduler import DownloadPriority
 from .web_sync import get_json_sync
 
 
@@ -140,31 +144,71 @@ async def get_amazon_data(req_url: str) -> tuple[bool, str]:
     return True, html_info
 
 
-async def get_imgsize(url) -> tuple[int, int]:
-    response, _ = await manager.computed.async_client.request("GET", url, stream=True)
-    if response is None or response.status_code != 200:
-        return 0, 0
-    file_head = BytesIO()
-    chunk_size = 1024 * 10
-    try:
-        for chunk in response.iter_content(chunk_size):
-            file_head.write(await chunk)
-            try:
+_IMGSIZE_HEAD = 64 * 1024
+_imgsize_cache: OrderedDict[str, tuple[int, int]] = OrderedDict()
+_imgsize_tasks: dict[str, asyncio.Task[tuple[int, int]]] = {}
 
-                def _get_size():
-                    with Image.open(file_head) as img:
-                        return img.size
 
-                return await asyncio.to_thread(_get_size)
-            except Exception:
-                # 如果解析失败，继续下载更多数据
-                continue
+async def _read_head(url: str, limit: int) -> bytes | None:
+    """请求文件开头的 limit 字节. 服务器忽略 Range 时, 读取足够的数据后即断开"""
+    response, _ = await manager.computed.async_client.request(
+        "GET", url, headers={"Range": f"bytes=0-{limit - 1}"}, stream=True
+    )
+    if response is None or response.status_code not in (200, 206):
+        return None
+    head = bytearray()
+    try:
+        async for chunk in response.aiter_content():
+            head += chunk
+            if len(head) >= limit:
+                break
     except Exception:
-        return 0, 0
+        return None
     finally:
-        response.close()
+        await response.aclose()
+    return bytes(head[:limit])
+
+
+async def _probe_imgsize(url: str) -> tuple[int, int]:
+    head = b""
+    for limit in (_IMGSIZE_HEAD, 16 * _IMGSIZE_HEAD):  # JPEG 的 EXIF 等较大时, 帧头可能在 64 KB 之后
+        if (head := await _read_head(url, limit)) is None:
+            return 0, 0
+        if size := parse_image_size(head):
+            return size
+        if len(head) < limit:  # 已读取完整文件
+            break
+    # 其他格式交给 Pillow, 仅读取文件头
+    try:
+        with Image.open(BytesIO(head)) as img:
+            return img.size
+    except Exception:
+        return 0, 0
+
+
+async def get_imgsize(url: str) -> tuple[int, int]:
+    """
+    获取网络图片尺寸. 仅请求文件开头并直接解析文件头, 失败时返回 (0, 0).
+
+    成功的结果按 URL 缓存, 同一 URL 的并发请求只发送一次.
+    """
+    if (size := _imgsize_cache.get(url)) is not None:
+        _imgsize_cache.move_to_end(url)
+        return size
+    if (task := _imgsize_tasks.get(url)) is None:
+        task = _imgsize_tasks[url] = asyncio.create_task(_probe_imgsize(url))
+        task.add_done_callback(lambda _: _imgsize_tasks.pop(url, None))
+    size = await asyncio.shield(task)  # 调用方被取消时不影响其他等待者
+    if size[0]:
+        _imgsize_cache[url] = size
+        while len(_imgsize_cache) > 4096:
+            _imgsize_cache.popitem(last=False)
+    return size
+
 
-    return 0, 0
+async def get_imgsizes(urls: Iterable[str]) -> list[tuple[int, int]]:
+    """并发获取多张网络图片的尺寸, 顺序与 urls 一致"""
+    return await asyncio.gather(*(get_imgsize(url) for url in urls))
 
 
 async def get_dmm_trailer(trailer_url: str) -> str:
@@ -275,6 +319,17 @@ def check_theporndb_api_token() -> str:
     return tips
 
 
+async def _check_google_candidate(p_url: str, w: int, h: int) -> tuple[str, tuple[int, int]]:
+    if "m.media-amazon.com" in p_url:
+        p_url = re.sub(r"\._[_]?AC_[^\.]+\.", ".", p_url)
+        pic_size = await get_imgsize(p_url)
+        if pic_size[0]:
+            return p_url, pic_size
+    elif url := await check_url(p_url):
+        return url, (w, h)
+    return "", (0, 0)
+
+
 async def _get_pic_by_google(pic_url):
     google_keyused = manager.computed.google_keyused
     google_keyword = manager.computed.google_keyword
@@ -310,6 +365,7 @@ async def _get_pic_by_google(pic_url):
     if "goo_only" not in [item.value for item in manager.config.download_hd_pics]:
         new_url_list += url_list
     # 解析地址
+    candidates: list[tuple[str, int, int]] = []
     for each in new_url_list:
         temp_url = each[0]
         for temp_keyword in google_keyword:
@@ -320,18 +376,16 @@ async def _get_pic_by_google(pic_url):
             w = int(each[2])
             if w > h and w / h < 1.4:  # thumb 被拉高时跳过
                 continue
-
             p_url = temp_url.encode("utf-8").decode("unicode_escape")  # url中的Unicode字符转义，不转义，url请求会失败
-            if "m.media-amazon.com" in p_url:
-                p_url = re.sub(r"\._[_]?AC_[^\.]+\.", ".", p_url)
-                pic_size = await get_imgsize(p_url)
-                if pic_size[0]:
-                    return p_url, pic_size, big_pic
-            else:
-                url = await check_url(p_url)
-                if url:
-                    pic_size = (w, h)
-                    return url, pic_size, big_pic
+            candidates.append((p_url, w, h))
+
+    # 每次并发检查若干个候选图, 按原顺序取第一个有效的
+    window = 4
+    for i in range(0, len(candidates), window):
+        results = await asyncio.gather(*(_check_google_candidate(*each) for each in candidates[i : i + window]))
+        for url, pic_size in results:
+            if url:
+                return url, pic_size, big_pic
     return "", (0, 0), False
 
 
@@ -390,14 +444,23 @@ async def get_yesjav_title(movie_number: str) -> str:
     return movie_title
 
 
-async def download_file_with_filepath(url: str, file_path: Path, folder_new_path: Path) -> bool:
+async def download_file_with_filepath(
+    url: str,
+    file_path: Path,
+    folder_new_path: Path,
+    file_size: int | None = None,
+    priority: DownloadPriority = DownloadPriority.IMAGE,
+    group: str = "",
+) -> bool:
     if not url:
         return False
 
     if not await aiofiles.os.path.exists(folder_new_path):
         await aiofiles.os.makedirs(folder_new_path)
     try:
-        if await manager.computed.async_client.download(url, file_path):
+        if await manager.computed.async_client.download(
+            url, file_path, file_size=file_size, priority=priority, group=group
+        ):
             return True
     except Exception:
         pass
@@ -405,11 +468,36 @@ async def download_file_with_filepath(url: str, file_path: Path, folder_new_path
     return False
 
 
-async def download_extrafanart_task(task: tuple[str, Path, Path, str]) -> bool:
+async def get_image(
+    url: str, file_path: Path, priority: DownloadPriority = DownloadPriority.IMAGE, group: str = ""
+) -> tuple[bytes, tuple[int, int]] | None:
+    """
+    下载图片到内存并检查完整性, 此时尚未写入文件, 调用方可先检查尺寸再决定是否保存.
+    保存为 jpg 但链接为 webp 时转换格式.
+    """
+    if not url:
+        return None
+    image, error = await manager.computed.async_client.get_image(
+        url, jpeg=file_path.suffix == ".jpg" and ".webp" in url, priority=priority, group=group
+    )
+    if image is None:
+        LogBuffer.log().write(f"\n 🥺 Download failed! {url} {error}")
+    return image
+
+
+async def save_image(content: bytes, file_path: Path, folder_new_path: Path) -> bool:
+    """原子地写入图片, 写入失败时原图保持不变. 图片仓库中有相同内容时使用硬链接等方式输出"""
+    if not await aiofiles.os.path.exists(folder_new_path):
+        await aiofiles.os.makedirs(folder_new_path)
+    if await manager.computed.async_client.blobs.link(content, file_path):
+        return True
+    success, _ = await write_file_atomic(file_path, content)
+    return success
+
+
+async def download_extrafanart_task(task: tuple[str, Path, Path, str], group: str = "") -> bool:
     extrafanart_url, extrafanart_file_path, extrafanart_folder_path, extrafanart_name = task
-    if await download_file_with_filepath(extrafanart_url, extrafanart_file_path, extrafanart_folder_path):
-        if await check_pic_async(extrafanart_file_path):
-            return True
-    else:
-        LogBuffer.log().write(f"\n 💡 {extrafanart_name} download failed! ( {extrafanart_url} )")
+    if image := await get_image(extrafanart_url, extrafanart_file_path, DownloadPriority.EXTRAFANART, group):
+        return await save_image(image[0], extrafanart_file_path, extrafanart_folder_path)
+    LogBuffer.log().write(f"\n 💡 {extrafanart_name} download failed! ( {extrafanart_url} )")
     return False
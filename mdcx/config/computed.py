@@ -1,4 +1,5 @@
 import re
+from pathlib import Path
 
 import httpx
 
@@ -6,13 +7,20 @@ from ..llm import LLMClient
 from ..manual import ManualConfig
 from ..signals import signal
 from ..utils import executor, get_random_headers
-from ..web_async import AsyncWebClient
+from ..utils.blob_store import BlobStore
+from ..utils.image_pool import image_pool
+from ..utils.parse_executor import default_parse_executor
+from ..utils.probe_cache import ProbeCache
+from ..utils.video_pool import video_prober
+from ..web_async import AsyncWebClient, AsyncWebLimiters
+from ..web_cache import AsyncWebCache
+from ..web_scheduler import DownloadScheduler
 from .enums import CleanAction
 from .models import Config
 
 
 class Computed:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, data_folder: Path):
         self.can_clean = CleanAction.I_KNOW in config.clean_enable and CleanAction.I_AGREE in config.clean_enable
 
         self.random_headers = get_random_headers()
@@ -26,14 +34,54 @@ class Computed:
             rate=(max(config.translate_config.llm_max_req_sec, 1), max(1, 1 / config.translate_config.llm_max_req_sec)),
         )
 
+        web_cache = AsyncWebCache(
+            data_folder / "userdata" / "web_cache.db",
+            max_size=config.web_cache_size * 1024**2,
+            ttl=config.web_cache_ttl * 3600,
+            site_ttls={
+                site.value: c.cache_ttl * 3600 for site, c in config.site_configs.items() if c.cache_ttl is not None
+            },
+            search_ttl=config.web_cache_search_ttl * 3600,
+            site_search_ttls={
+                site.value: c.search_cache_ttl * 3600
+                for site, c in config.site_configs.items()
+                if c.search_cache_ttl is not None
+            },
+            enabled=config.web_cache,
+        )
         self.async_client = AsyncWebClient(
             loop=executor._loop,
             proxy=proxy,
             retry=config.retry,
             timeout=config.timeout,
             log_fn=signal.add_log,
+            limiters=AsyncWebLimiters(data_folder / "userdata" / "web_rates.json"),
+            cache=web_cache,
+            blobs=BlobStore(
+                data_folder / "userdata" / "images",
+                max_size=config.image_store_size * 1024**2,
+                enabled=config.image_store,
+            ),
+            scheduler=DownloadScheduler(
+                max_total=max(config.download_concurrency, 1),
+                max_per_host=max(config.download_host_concurrency, 1),
+                bandwidth=config.download_bandwidth * 1024,
+            ),
         )
 
+        default_parse_executor.configure(config.parse_mode, config.parse_workers)
+        self.parse_executor = default_parse_executor
+        # 重新载入配置时沿用已有的缓存, 只在路径变化时关闭旧缓存 (同时写入尚未提交的结果)
+        probe_path = data_folder / "userdata" / "video_probe.db"
+        if (probe_cache := video_prober.cache) is None or probe_cache.path != probe_path:
+            if probe_cache is not None:
+                probe_cache.close()
+            probe_cache = ProbeCache(probe_path)
+        probe_cache.enabled = config.video_probe_cache
+        self.probe_cache = probe_cache
+        video_prober.configure(config.video_probe_workers, probe_cache)
+        image_pool.configure(config.image_mode, config.image_workers)
+
         official_websites_dic = {}
         for key, value in ManualConfig.OFFICIAL.items():
             temp_list = value.upper().split("|")
@@ -40,11 +40,11 @@ class ConfigManager:
             d = json.loads(self._path.read_text(encoding="UTF-8"))
             errors = Config.update(d)
             self.config = Config.model_validate(d)
-            self.computed = Computed(self.config)
+            self.computed = Computed(self.config, self.data_folder)
             return errors
         except Exception as e:
             self.config = Config()
-            self.computed = Computed(self.config)
+            self.computed = Computed(self.config, self.data_folder)
             msg = f" 配置文件 {self._path} 验证失败. 错误信息: \n{str(e)}"
             return msg.splitlines()
 
@@ -64,7 +64,7 @@ class ConfigManager:
         config_v1 = ConfigV1(**d)
         config_v1.init()
         self.config = config_v1.to_pydantic_model()
-        self.computed = Computed(self.config)
+        self.computed = Computed(self.config, self.data_folder)
         self.save()
         return errors
 
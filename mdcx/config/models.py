@@ -80,6 +80,10 @@ class TranslateConfig(BaseModel):
 class SiteConfig(BaseModel):
     use_browser: bool = Field(default=False, title="使用无头浏览器")
     custom_url: HttpUrl | None = Field(default=None, title="自定义网址")
+    cache_ttl: int | None = Field(default=None, title="网页缓存有效期 (小时)", description="为空时使用全局设置")
+    search_cache_ttl: int | None = Field(
+        default=None, title="搜索页缓存有效期 (小时)", description="为空时使用全局设置"
+    )
 
 
 class FieldConfig(BaseModel):
@@ -138,6 +142,11 @@ class Config(BaseModel):
         title="字幕类型",
     )
     scrape_softlink_path: bool = Field(default=False, title="刮削软链接路径")
+    scan_cache: bool = Field(
+        default=False,
+        title="目录扫描缓存",
+        description="记录各目录的修改时间, 再次遍历时跳过未变化的目录. 若网络存储不能正确更新目录修改时间, 请勿开启",
+    )
     auto_link: bool = Field(default=False, title="自动创建软链接")
     # endregion
 
@@ -211,6 +220,11 @@ class Config(BaseModel):
     # region: Scraping Settings
     thread_number: int = Field(default=50, title="并发数")
     thread_time: int = Field(default=0, title="线程时间")
+    pre_analyze: bool = Field(
+        default=False,
+        title="刮削前预先分析全部文件",
+        description="遍历完成后批量读取全部文件的番号, 分集及字幕信息, 同一番号的文件依次刮削, 并在日志中列出将输出为同一文件的重复文件. 遍历完成后才开始刮削",
+    )
     javdb_time: int = Field(default=10, title="Javdb时间")
     main_mode: int = Field(default=1, title="主模式")
     read_mode: list[ReadMode] = Field(default_factory=list, title="读取模式")
@@ -263,6 +277,21 @@ class Config(BaseModel):
         default_factory=lambda: [HDPicSource.POSTER, HDPicSource.THUMB, HDPicSource.GOO_ONLY],
         title="高清图片来源",
     )
+    defer_extras: bool = Field(
+        default=False,
+        title="后台下载剧照及预告片",
+        description="先完成 nfo, 图片及移动文件, 剧照, 预告片及主题视频随后在后台下载到输出目录. 未完成的任务在下次刮削时继续",
+    )
+    hd_pic_timeout: int = Field(
+        default=60,
+        title="高清图片搜索时间上限 (秒)",
+        description="每部影片搜索高清 thumb 及 poster 各自的时间上限, 超时后使用普通图片. 0 表示不限制",
+    )
+    hd_pic_google_prefetch: bool = Field(
+        default=False,
+        title="提前开始 Google 搜图",
+        description="Google 搜图与官网及 Amazon 查询同时进行, 可缩短耗时. 但官网或 Amazon 找到大图时也会请求 Google",
+    )
     google_used: list[str] = Field(
         default_factory=lambda: ["m.media-amazon.com"],
         title="Google使用",
@@ -282,6 +311,24 @@ class Config(BaseModel):
         title="Google搜图排除的网址",
     )
     scrape_like: Literal["info", "speed", "single"] = Field(default="info", title="刮削模式")  # speed, info, single
+    eager_crawl: bool = Field(
+        default=False,
+        title="并发预取网站",
+        description="同时请求各字段优先级靠前的多个网站, 以更多请求换取更短的刮削耗时",
+    )
+    eager_crawl_count: int = Field(default=3, title="并发预取网站数")
+    parse_mode: Literal["none", "thread", "process"] = Field(
+        default="thread",
+        title="HTML解析方式",
+        description="none: 在主事件循环中解析; thread: 线程池; process: 进程池, 并发数较高时可避免解析阻塞网络请求",
+    )
+    parse_workers: int = Field(default=0, title="HTML解析并发数", description="0 表示根据 CPU 数自动确定")
+    image_mode: Literal["thread", "process"] = Field(
+        default="process",
+        title="图片处理方式",
+        description="裁剪, 水印, 格式转换等图片操作的执行方式. thread: 线程池; process: 进程池, 可充分利用多核",
+    )
+    image_workers: int = Field(default=0, title="图片处理并发数", description="0 表示根据 CPU 数自动确定")
     # endregion
 
     # region: Website Settings
@@ -535,6 +582,16 @@ class Config(BaseModel):
     trailer_simple_name: bool = Field(default=True, title="预告片简化命名")
     hd_name: Literal["height", "hd"] = Field(default="height", title="高清名称")
     hd_get: Literal["video", "path", "none"] = Field(default="video", title="获取高清")
+    video_probe_workers: int = Field(
+        default=2,
+        title="视频分辨率读取并发数",
+        description="同时读取分辨率的视频数, 与刮削并发数独立. 媒体库位于较慢的网络共享时可适当调小",
+    )
+    video_probe_cache: bool = Field(
+        default=True,
+        title="缓存视频分辨率",
+        description="记录已读取的视频分辨率及编码, 文件大小及修改时间不变时不再重新读取视频",
+    )
     cnword_char: list[str] = Field(default_factory=lambda: ["-C.", "-C-", "ch.", "字幕"], title="中文字符")
     cnword_style: str = Field(default="-C", title="中文样式")
     folder_cnword: bool = Field(default=True, title="目录中文")
@@ -606,6 +663,29 @@ class Config(BaseModel):
     proxy: str = Field(default="http://127.0.0.1:7890", title="代理地址")
     timeout: int = Field(default=10, title="超时")
     retry: int = Field(default=3, title="重试")
+    web_cache: bool = Field(
+        default=False,
+        title="网页缓存",
+        description="缓存网站的搜索页和详情页, 有效期内重新刮削时直接使用缓存, 过期后向网站确认是否有更新",
+    )
+    web_cache_ttl: int = Field(default=168, title="网页缓存有效期 (小时)")
+    web_cache_search_ttl: int = Field(
+        default=24, title="搜索页缓存有效期 (小时)", description="搜索结果会随新作品发布变化, 建议短于详情页"
+    )
+    web_cache_size: int = Field(default=500, title="网页缓存大小上限 (MB)")
+    image_store: bool = Field(
+        default=False,
+        title="图片仓库",
+        description="保存下载的图片, 重新刮削或其他影片使用相同图片时直接使用, 输出时优先使用硬链接以节省空间",
+    )
+    image_store_size: int = Field(default=2048, title="图片仓库大小上限 (MB)")
+    download_concurrency: int = Field(
+        default=16,
+        title="下载并发数",
+        description="图片, 剧照及预告片同时下载的连接总数. 优先下载 thumb 和 poster, 其次剧照, 最后预告片",
+    )
+    download_host_concurrency: int = Field(default=6, title="单个域名的下载并发数")
+    download_bandwidth: int = Field(default=0, title="下载带宽上限 (KB/s)", description="0 表示不限制")
     theporndb_api_token: str = Field(default="", title="Theporndb API令牌")
     javdb: str = Field(default="", title="Javdb")
     javbus: str = Field(default="", title="Javbus")
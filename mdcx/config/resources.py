@@ -3,6 +3,7 @@ import os
 import sys
 import traceback
 from pathlib import Path
+from typing import Literal
 
 import zhconv
 from lxml import etree
@@ -15,6 +16,47 @@ from ..utils import singleton
 from ..utils.file import copy_file_sync
 from .manager import manager
 
+# 映射表 keyword 的字符折叠规则, 与 MAPPING_XPATH 中的 translate 一致
+_KEYWORD_FROM = "abcdefghijklmnopqrstuvwxyzａｂｃｄｅｆｇｈｉｊｋｌｍｎｏｐｑｒｓｔｕｖｗｘｙｚＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺ・"
+_KEYWORD_TO = "ABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZ·"
+_KEYWORD_TRANS = str.maketrans(_KEYWORD_FROM, _KEYWORD_TO)
+MAPPING_XPATH = f'//a[contains(translate(@keyword, "{_KEYWORD_FROM}", "{_KEYWORD_TO}"), $name)]'
+
+
+def normalize_mapping_name(name: str) -> str:
+    """将待查询的名字转换为映射表索引的 key"""
+    name = name.upper()
+    for each in ManualConfig.FULL_HALF_CHAR:
+        name = name.replace(each[0], each[1])
+    return name
+
+
+def build_mapping_index(root) -> dict[str, etree._Element]:
+    """
+    为映射表建立 keyword -> 节点的索引.
+
+    keyword 格式为 ",word1,word2,", 每个前后均有逗号的关键词视为一个 key. 多个节点包含同一关键词时, 与 XPath 查询一致, 取文档中的第一个.
+    """
+    index: dict[str, etree._Element] = {}
+    if root is None:
+        return index
+    for node in root.iter("a"):
+        keywords = (node.get("keyword") or "").translate(_KEYWORD_TRANS).split(",")
+        for keyword in keywords[1:-1]:
+            index.setdefault(keyword, node)
+    return index
+
+
+def find_mapping(root, index: dict[str, etree._Element], name: str) -> etree._Element | None:
+    """查询映射表, 返回第一个 keyword 包含 name 的节点. 结果与 MAPPING_XPATH 查询一致"""
+    if root is None or not len(root):
+        return None
+    name = normalize_mapping_name(name)
+    if "," in name:  # 跨越多个关键词, 索引无法处理, 使用 XPath 查询
+        r = root.xpath(MAPPING_XPATH, name=f",{name},")
+        return r[0] if r else None
+    return index.get(name)
+
 
 @singleton
 class Resources:
@@ -76,6 +118,11 @@ class Resources:
 
         self.actor_mapping_data = None  # 演员映射表数据
         self.info_mapping_data = None  # 信息映射表数据
+        self.actor_mapping_index: dict[str, etree._Element] = {}  # 演员映射表索引
+        self.info_mapping_index: dict[str, etree._Element] = {}  # 信息映射表索引
+        self._actor_map_path = self.u("mapping_actor.xml")
+        self._info_map_path = self.u("mapping_info.xml")
+        self._mapping_mtime: tuple[float, float] = (0.0, 0.0)
         self.sehua_title_data = {}  # 色花数据
 
         self._get_or_generate_local_data()
@@ -104,23 +151,14 @@ class Resources:
         }
 
         # 查询映射表
-        xml_actor = self.actor_mapping_data
-        if xml_actor is not None and len(xml_actor):
-            actor_name = f",{actor.upper()},"
-            for each in ManualConfig.FULL_HALF_CHAR:
-                actor_name = actor_name.replace(each[0], each[1])
-            actor_ob = xml_actor.xpath(
-                '//a[contains(translate(@keyword, "abcdefghijklmnopqrstuvwxyzａｂｃｄｅｆｇｈｉｊｋｌｍｎｏｐｑｒｓｔｕｖｗｘｙｚＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺ・", "ABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZ·"), $name)]',
-                name=actor_name,
-            )
-            if actor_ob:
-                actor_ob = actor_ob[0]
-                actor_data["zh_cn"] = actor_ob.get("zh_cn")
-                actor_data["zh_tw"] = actor_ob.get("zh_tw")
-                actor_data["jp"] = actor_ob.get("jp")
-                actor_data["keyword"] = actor_ob.get("keyword").strip(",").split(",")
-                actor_data["href"] = actor_ob.get("href")
-                actor_data["has_name"] = True
+        actor_ob = self._find_mapping("actor", actor)
+        if actor_ob is not None:
+            actor_data["zh_cn"] = actor_ob.get("zh_cn")
+            actor_data["zh_tw"] = actor_ob.get("zh_tw")
+            actor_data["jp"] = actor_ob.get("jp")
+            actor_data["keyword"] = actor_ob.get("keyword").strip(",").split(",")
+            actor_data["href"] = actor_ob.get("href")
+            actor_data["has_name"] = True
         return actor_data
 
     def get_info_data(self, info):
@@ -134,26 +172,31 @@ class Resources:
         }
 
         # 查询映射表
-        xml_info = self.info_mapping_data
-        if xml_info is not None and len(xml_info):
-            info_name = f",{info.upper()},"
-            for each in ManualConfig.FULL_HALF_CHAR:
-                info_name = info_name.replace(each[0], each[1])
-            info_ob = xml_info.xpath(
-                "//a[contains(translate(@keyword, "
-                '"abcdefghijklmnopqrstuvwxyzａｂｃｄｅｆｇｈｉｊｋｌｍｎｏｐｑｒｓｔｕｖｗｘｙｚＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺ・", '
-                '"ABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZABCDEFGHIJKLMNOPQRSTUVWXYZ·"), $name)]',
-                name=info_name,
-            )
-            if info_ob:
-                info_ob = info_ob[0]
-                info_data["zh_cn"] = info_ob.get("zh_cn").replace("删除", "")
-                info_data["zh_tw"] = info_ob.get("zh_tw").replace("删除", "")
-                info_data["jp"] = info_ob.get("jp").replace("删除", "")
-                info_data["keyword"] = info_ob.get("keyword").strip(",").split(",")
-                info_data["has_name"] = True
+        info_ob = self._find_mapping("info", info)
+        if info_ob is not None:
+            info_data["zh_cn"] = info_ob.get("zh_cn").replace("删除", "")
+            info_data["zh_tw"] = info_ob.get("zh_tw").replace("删除", "")
+            info_data["jp"] = info_ob.get("jp").replace("删除", "")
+            info_data["keyword"] = info_ob.get("keyword").strip(",").split(",")
+            info_data["has_name"] = True
         return info_data
 
+    def _find_mapping(self, kind: Literal["actor", "info"], name: str):
+        """查询映射表. 先检查映射表文件是否被修改, 再读取 (可能已重新载入的) 数据及索引"""
+        self._check_mapping_update()
+        if kind == "actor":
+            return find_mapping(self.actor_mapping_data, self.actor_mapping_index, name)
+        return find_mapping(self.info_mapping_data, self.info_mapping_index, name)
+
+    def _check_mapping_update(self):
+        """映射表文件被修改时重新载入"""
+        try:
+            mtime = (os.path.getmtime(self._actor_map_path), os.path.getmtime(self._info_map_path))
+        except OSError:
+            return
+        if mtime != self._mapping_mtime:
+            self._load_mapping_data()
+
     def get_fonts(self):
         font_db = QFontDatabase()
         font_folder_path = self.qtr("fonts")
@@ -175,7 +218,16 @@ class Resources:
         if not os.path.exists(info_map_local_path):
             if not copy_file_sync(self.info_map_backup_path, info_map_local_path):
                 info_map_local_path = self.info_map_backup_path
+        self._actor_map_path = actor_map_local_path
+        self._info_map_path = info_map_local_path
+        self._load_mapping_data()
+
+    def _load_mapping_data(self):
+        """读取映射表并建立索引"""
+        actor_map_local_path = self._actor_map_path
+        info_map_local_path = self._info_map_path
         try:
+            self._mapping_mtime = (os.path.getmtime(actor_map_local_path), os.path.getmtime(info_map_local_path))
             parser = etree.HTMLParser(encoding="utf-8")
             with open(actor_map_local_path, encoding="utf-8") as f:
                 content = f.read()
@@ -190,6 +242,8 @@ class Resources:
             signal.show_traceback_log(traceback.format_exc())
             signal.show_log_text(traceback.format_exc())
             self.actor_mapping_data = None
+        self.actor_mapping_index = build_mapping_index(self.actor_mapping_data)
+        self.info_mapping_index = build_mapping_index(self.info_mapping_data)
 
     def _get_mark_icon(self):
         mark_folder = self.u("watermark")
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+import traceback
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import aiofiles.os
+
+from ..base.file import copy_trailer_to_theme_videos
+from ..base.image import extrafanart_copy2, extrafanart_extras_copy
+from ..config.resources import resources
+from ..models.log_buffer import LogBuffer
+from ..models.types import CrawlersResult
+from ..signals import signal
+from ..utils import executor, get_used_time
+from .web import extrafanart_download, trailer_download
+
+
+@dataclass
+class ExtrasJob:
+    """延后处理的剧照, 预告片及主题视频. 仅保存所需字段, 以便重启后继续"""
+
+    number: str
+    folder_new: str
+    folder_old: str
+    naming_rule: str
+    trailer: str = ""
+    trailer_from: str = ""
+    extrafanart: list[str] = field(default_factory=list)
+    extrafanart_from: str = ""
+    with_extrafanart: bool = False
+    """是否下载剧照. 对应刮削流程中的 single_folder_catched"""
+
+    @property
+    def key(self) -> str:
+        return f"{self.folder_new}|{self.naming_rule}"
+
+
+class BackgroundLane:
+    """
+    后台下载通道. 启用「后台下载剧照及预告片」时, 刮削流程完成 nfo, 图片及移动文件后即结束, 剧照, 预告片及主题视频在此下载到最终目录.
+
+    未完成的任务保存在 userdata/background.json, 手动停止或程序退出后, 下次刮削开始时继续.
+    下载并发及优先级由全局下载调度器控制, 刮削中的图片下载总是优先.
+    """
+
+    WORKERS = 4
+
+    def __init__(self):
+        self.path: Path | None = None
+        self._jobs: dict[str, ExtrasJob] = {}
+        self._pending: deque[str] = deque()
+        self._running = False
+        self.done = 0
+        self.total = 0
+
+    @property
+    def remaining(self) -> int:
+        return len(self._jobs)
+
+    def load(self, path: Path) -> None:
+        """载入上次未完成的任务. 已载入时跳过"""
+        if self.path is not None:
+            return
+        self.path = path
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            jobs = [ExtrasJob(**d) for d in data]
+        except FileNotFoundError:
+            return
+        except Exception:  # 文件损坏时丢弃
+            signal.show_traceback_log(traceback.format_exc())
+            return
+        for job in jobs:
+            self._jobs[job.key] = job
+            self._pending.append(job.key)
+        self.total += len(jobs)
+        if jobs:
+            signal.show_log_text(f" 📦 后台任务: 继续上次未完成的 {len(jobs)} 个任务")
+
+    async def add(self, job: ExtrasJob) -> None:
+        """添加任务. 同一输出目录及命名的任务尚未开始时, 替换为新任务"""
+        self.load(resources.u("background.json"))
+        if job.key not in self._pending:
+            self._pending.append(job.key)
+            self.total += 1
+        self._jobs[job.key] = job
+        await asyncio.to_thread(self._save)
+        self.start()
+
+    def start(self) -> None:
+        """开始处理任务, 须在事件循环中调用. 手动停止刮削时会随其他任务一起取消, 未完成的任务保留"""
+        self.load(resources.u("background.json"))
+        if not self._running and self._pending:
+            self._running = True
+            executor.submit(self._run())
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                await asyncio.gather(*(self._worker() for _ in range(min(self.WORKERS, len(self._pending)))))
+        finally:
+            self._running = False
+
+    async def _worker(self) -> None:
+        while self._pending:
+            key = self._pending.popleft()
+            if (job := self._jobs.get(key)) is None:
+                continue
+            start_time = time.time()
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                self._pending.appendleft(key)
+                raise
+            except Exception:
+                LogBuffer.log().write("\n" + traceback.format_exc())
+            # 下载失败不重试, 与刮削流程中的处理一致
+            if self._jobs.get(key) is job:
+                del self._jobs[key]
+            await asyncio.to_thread(self._save)
+            self.done += 1
+            signal.show_log_text(
+                f" 📦 后台任务 {self.done}/{self.total} {job.number} 完成！用时 {get_used_time(start_time)} 秒"
+                + LogBuffer.log().get()
+            )
+            LogBuffer.clear_task()
+
+    async def _process(self, job: ExtrasJob) -> None:
+        folder_new = Path(job.folder_new)
+        if not await aiofiles.os.path.isdir(folder_new):
+            LogBuffer.log().write(f"\n 🟠 输出目录已不存在, 跳过: {folder_new}")
+            return
+        if job.with_extrafanart:
+            await extrafanart_download(job.extrafanart, job.extrafanart_from, folder_new)
+            await extrafanart_copy2(folder_new)
+            await extrafanart_extras_copy(folder_new)
+        res = CrawlersResult.empty()
+        res.number = job.number
+        res.trailer = job.trailer
+        res.trailer_from = job.trailer_from
+        await trailer_download(res, folder_new, Path(job.folder_old), job.naming_rule)
+        await copy_trailer_to_theme_videos(folder_new, job.naming_rule)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        data = json.dumps([asdict(j) for j in self._jobs.values()], ensure_ascii=False, indent=2)
+        temp = self.path.with_name(self.path.name + ".tmp")
+        temp.write_text(data, encoding="utf-8")
+        temp.replace(self.path)
+
+
+background_lane = BackgroundLane()
@@ -1,7 +1,11 @@
+import asyncio
 import os
 import re
 import shutil
+import string
 import traceback
+from collections.abc import Iterable
+from dataclasses import dataclass
 from pathlib import Path
 
 import aiofiles
@@ -397,30 +401,110 @@ def get_output_name(
     )
 
 
-async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
-    optional_data = {}
-    movie_number = ""
-    has_sub = False
-    c_word = ""
-    cd_part = ""
-    destroyed = ""
-    leak = ""
-    wuma = ""
-    youma = ""
-    mosaic = ""
-    sub_list = []
-    cnword_style = manager.config.cnword_style
-    if Flags.file_mode == FileMode.Again and file_path in Flags.new_again_dic:
-        temp_number, temp_url, temp_website = Flags.new_again_dic[file_path]
-        if temp_number:  # 如果指定了番号，则使用指定番号
-            movie_number = temp_number
-            optional_data["appoint_number"] = temp_number
-        if temp_url:
-            optional_data["appoint_url"] = temp_url
-            optional_data["website_name"] = temp_website
-    elif Flags.file_mode == FileMode.Single:  # 刮削单文件（工具页面）
-        optional_data["appoint_url"] = Flags.appoint_url
+class DirListing:
+    """
+    目录列表. 每个目录只列出一次, 代替逐个文件的 exists/islink 判断.
 
+    仅用于判断已列出目录中的文件, 其他路径仍逐个判断. 大小写不敏感的系统 (Windows, macOS) 上忽略大小写.
+    """
+
+    def __init__(self):
+        self._names: dict[Path, set[str]] = {}
+        self._links: dict[Path, set[str]] = {}
+
+    @staticmethod
+    def _fold(name: str) -> str:
+        return name.casefold() if IS_WINDOWS or IS_MAC else name
+
+    @classmethod
+    def scan(cls, folders: Iterable[Path]) -> "DirListing":
+        """列出各目录, 阻塞调用. 无法列出的目录退回逐个判断"""
+        listing = cls()
+        for folder in folders:
+            names: set[str] = set()
+            links: set[str] = set()
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        names.add(cls._fold(entry.name))
+                        if entry.is_symlink():
+                            links.add(cls._fold(entry.name))
+            except OSError:
+                continue
+            listing._names[folder] = names
+            listing._links[folder] = links
+        return listing
+
+    async def exists(self, p: Path) -> bool:
+        if (names := self._names.get(p.parent)) is None:
+            return await aiofiles.os.path.exists(p)
+        return self._fold(p.name) in names
+
+    async def islink(self, p: Path) -> bool:
+        if (links := self._links.get(p.parent)) is None:
+            return await aiofiles.os.path.islink(p)
+        return self._fold(p.name) in links
+
+
+@dataclass
+class ParsedName:
+    """仅由文件路径及设置得到的信息, 不访问文件系统"""
+
+    file_path_str: str
+    file_show_path: str
+    folder_path: Path
+    file_name: str
+    """已清除防屏蔽字符"""
+    file_ex: str
+    number: str = ""
+    short_number: str = ""
+    cd_part: str = ""
+    destroyed: str = ""
+    leak: str = ""
+    wuma: str = ""
+    youma: str = ""
+    mosaic: str = ""
+    appoint_number: str = ""
+    appoint_url: str = ""
+    website_name: str = ""
+    error: str = ""
+    """解析时的异常信息, 由调用方写入日志"""
+
+
+_TEMP_CD = re.compile(r"(vol|case|no|cwp|cwpbd|act)[-\.]?\d+")
+_CD_PATH_1 = re.compile(r"[-_ .]{1}(cd|part|hd)([0-9]{1,2})")
+_CD_PATH_2 = re.compile(r"-([0-9]{1,2})\.?$")
+_CD_PATH_3 = re.compile(r"(-|\d{2,}|\.)([a-o]{1})\.?$")
+_CD_PATH_4 = re.compile(r"-([0-9]{1})[^a-z0-9]")
+_SHORT_NUMBER = re.compile(r"\d{3,}([a-zA-Z]+-\d+)")
+_MD_LIST = [
+    "国产",
+    "國產",
+    "麻豆",
+    "传媒",
+    "傳媒",
+    "皇家华人",
+    "皇家華人",
+    "精东",
+    "精東",
+    "猫爪影像",
+    "貓爪影像",
+    "91CM",
+    "91MS",
+    "导演系列",
+    "導演系列",
+    "MDWP",
+    "MMZ",
+    "MLT",
+    "MSM",
+    "LAA",
+    "MXJ",
+    "SWAG",
+]
+
+
+def _parse_file_name(file_path: Path) -> ParsedName:
+    """解析番号, 分集及马赛克类型. 纯计算, 可在工作线程中执行"""
     # 获取显示路径
     file_path_str = str(file_path).replace("\\", "/")
     file_show_path = showFilePath(file_path_str)
@@ -428,29 +512,34 @@ async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
     # 获取文件名
     folder_path, file_full_name = split_path(file_path)  # 获取去掉文件名的路径、完整文件名（含扩展名）
     file_name, file_ex = os.path.splitext(file_full_name)  # 获取文件名（不含扩展名）、扩展名(含有.)
-    file_name_temp = file_name + "."
-    nfo_old_name = file_name + ".nfo"
-    nfo_old_path = folder_path / nfo_old_name
-    file_show_name = file_name
+    r = ParsedName(file_path_str, file_show_path, folder_path, file_name, file_ex)
+
+    if Flags.file_mode == FileMode.Again and file_path in Flags.new_again_dic:
+        temp_number, temp_url, temp_website = Flags.new_again_dic[file_path]
+        if temp_number:  # 如果指定了番号，则使用指定番号
+            r.number = temp_number
+            r.appoint_number = temp_number
+        if temp_url:
+            r.appoint_url = temp_url
+            r.website_name = temp_website
+    elif Flags.file_mode == FileMode.Single:  # 刮削单文件（工具页面）
+        r.appoint_url = Flags.appoint_url
 
-    # 软链接时，获取原身路径(用来查询原身文件目录是否有字幕)
-    file_ori_path = None
-    if await aiofiles.os.path.islink(file_path):
-        file_ori_path = file_path.resolve()
     try:
         # 清除防屏蔽字符
         prevent_char = manager.config.prevent_char
         if prevent_char:
-            file_path_str = str(file_path).replace(prevent_char, "")
-            file_name = file_name.replace(prevent_char, "")
+            r.file_path_str = file_path_str = str(file_path).replace(prevent_char, "")
+            r.file_name = file_name = file_name.replace(prevent_char, "")
 
         # 获取番号
-        if not movie_number:
-            movie_number = get_file_number(file_path_str, manager.computed.escape_string_list)
+        if not r.number:
+            r.number = get_file_number(file_path_str, manager.computed.escape_string_list)
+        movie_number = r.number
 
         # 259LUXU-1111, 非mgstage、avsex去除前面的数字前缀
-        temp_n = re.findall(r"\d{3,}([a-zA-Z]+-\d+)", movie_number)
-        optional_data["short_number"] = temp_n[0] if temp_n else ""
+        temp_n = _SHORT_NUMBER.search(movie_number)
+        r.short_number = temp_n[1] if temp_n else ""
 
         # 去掉各种乱七八糟的字符
         file_name_cd = remove_escape_string(file_name, "-").replace(movie_number, "-").replace("--", "-").strip()
@@ -473,49 +562,20 @@ async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
         # if 'C.' in config.cnword_char and file_name_cd.endswith('c.'):
         #     file_name_cd = file_name_cd[:-2] + '.'
 
-        temp_cd = re.compile(r"(vol|case|no|cwp|cwpbd|act)[-\.]?\d+")
-        temp_cd_filename = re.sub(temp_cd, "", file_name_cd)
-        cd_path_1 = re.findall(r"[-_ .]{1}(cd|part|hd)([0-9]{1,2})", temp_cd_filename)
-        cd_path_2 = re.findall(r"-([0-9]{1,2})\.?$", temp_cd_filename)
-        cd_path_3 = re.findall(r"(-|\d{2,}|\.)([a-o]{1})\.?$", temp_cd_filename)
-        cd_path_4 = re.findall(r"-([0-9]{1})[^a-z0-9]", temp_cd_filename)
+        cd_part = ""
+        temp_cd_filename = _TEMP_CD.sub("", file_name_cd)
+        cd_path_1 = _CD_PATH_1.findall(temp_cd_filename)
+        cd_path_2 = _CD_PATH_2.findall(temp_cd_filename)
+        cd_path_3 = _CD_PATH_3.findall(temp_cd_filename)
+        cd_path_4 = _CD_PATH_4.findall(temp_cd_filename)
         if cd_path_1 and int(cd_path_1[0][1]) > 0:
             cd_part = cd_path_1[0][1]
         elif cd_path_2:
             if len(cd_path_2[0]) == 1 or CDChar.DIGITAL in cd_char:
                 cd_part = str(int(cd_path_2[0]))
         elif cd_path_3 and CDChar.LETTER in cd_char:
-            letter_list = [
-                "",
-                "a",
-                "b",
-                "c",
-                "d",
-                "e",
-                "f",
-                "g",
-                "h",
-                "i",
-                "j",
-                "k",
-                "l",
-                "m",
-                "n",
-                "o",
-                "p",
-                "q",
-                "r",
-                "s",
-                "t",
-                "u",
-                "v",
-                "w",
-                "x",
-                "y",
-                "z",
-            ]
             if cd_path_3[0][1] != "c" or CDChar.ENDC in cd_char:
-                cd_part = str(letter_list.index(cd_path_3[0][1]))
+                cd_part = str(string.ascii_lowercase.index(cd_path_3[0][1]) + 1)
         elif cd_path_4 and CDChar.MIDDLE_NUMBER in cd_char:
             cd_part = str(int(cd_path_4[0]))
 
@@ -530,82 +590,126 @@ async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
                 cd_part = "-CD" + str(cd_part)
             else:
                 cd_part = "-" + str(cd_part)
+        r.cd_part = cd_part
 
         # 判断是否是马赛克破坏版
+        file_path_lower = file_path_str.lower()
         umr_style = str(manager.config.umr_style)
         if (
-            "-uncensored." in file_path_str.lower()
-            or "umr." in file_path_str.lower()
+            "-uncensored." in file_path_lower
+            or "umr." in file_path_lower
             or "破解" in file_path_str
             or "克破" in file_path_str
             or (umr_style and umr_style in file_path_str)
-            or "-u." in file_path_str.lower()
-            or "-uc." in file_path_str.lower()
+            or "-u." in file_path_lower
+            or "-uc." in file_path_lower
         ):
-            destroyed = umr_style
-            mosaic = "无码破解"
+            r.destroyed = umr_style
+            r.mosaic = "无码破解"
 
         # 判断是否国产
-        if not mosaic:
-            if "国产" in file_path_str or "麻豆" in file_path_str or "國產" in file_path_str:
-                mosaic = "国产"
-            else:
-                md_list = [
-                    "国产",
-                    "國產",
-                    "麻豆",
-                    "传媒",
-                    "傳媒",
-                    "皇家华人",
-                    "皇家華人",
-                    "精东",
-                    "精東",
-                    "猫爪影像",
-                    "貓爪影像",
-                    "91CM",
-                    "91MS",
-                    "导演系列",
-                    "導演系列",
-                    "MDWP",
-                    "MMZ",
-                    "MLT",
-                    "MSM",
-                    "LAA",
-                    "MXJ",
-                    "SWAG",
-                ]
-                for each in md_list:
-                    if each in file_path_str:
-                        mosaic = "国产"
+        if not r.mosaic and any(each in file_path_str for each in _MD_LIST):
+            r.mosaic = "国产"
 
         # 判断是否流出
         leak_style = str(manager.config.leak_style)
-        if not mosaic and (
-            "流出" in file_path_str or "leaked" in file_path_str.lower() or (leak_style and leak_style in file_path_str)
+        if not r.mosaic and (
+            "流出" in file_path_str or "leaked" in file_path_lower or (leak_style and leak_style in file_path_str)
         ):
-            leak = leak_style
-            mosaic = "无码流出"
+            r.leak = leak_style
+            r.mosaic = "无码流出"
 
         # 判断是否无码
-        wuma_style = str(manager.config.wuma_style)
-        if not mosaic and (
+        if not r.mosaic and (
             "无码" in file_path_str
             or "無碼" in file_path_str
             or "無修正" in file_path_str
-            or "uncensored" in file_path_str.lower()
+            or "uncensored" in file_path_lower
             or is_uncensored(movie_number)
         ):
-            wuma = wuma_style
-            mosaic = "无码"
+            r.wuma = str(manager.config.wuma_style)
+            r.mosaic = "无码"
 
         # 判断是否有码
-        youma_style = manager.config.youma_style
-        if not mosaic and ("有码" in file_path_str or "有碼" in file_path_str):
-            youma = youma_style
-            mosaic = "有码"
+        if not r.mosaic and ("有码" in file_path_str or "有碼" in file_path_str):
+            r.youma = manager.config.youma_style
+            r.mosaic = "有码"
+    except Exception:
+        r.error = traceback.format_exc()
+    return r
+
+
+async def get_file_info_v2(file_path: Path, copy_sub: bool = True, parsed: ParsedName | None = None) -> FileInfo:
+    """
+    Args:
+        parsed: `parse_file_names` 预先解析的结果, 省去解析文件名
+    """
+    if parsed is None:
+        parsed = _parse_file_name(file_path)
+    return await _get_file_info(file_path, parsed, copy_sub)
+
+
+async def parse_file_names(file_paths: list[Path]) -> dict[Path, ParsedName]:
+    """批量解析番号, 分集及马赛克类型. 不访问文件系统, 在工作线程中分批进行, 不阻塞事件循环"""
+    parsed: list[ParsedName] = []
+    for i in range(0, len(file_paths), 500):
+        chunk = file_paths[i : i + 500]
+        parsed += await asyncio.to_thread(lambda c=chunk: [_parse_file_name(p) for p in c])
+    return dict(zip(file_paths, parsed, strict=True))
+
+
+async def get_file_info_batch(parsed: dict[Path, ParsedName]) -> dict[Path, FileInfo]:
+    """
+    刮削开始前批量获取文件信息, 用于分组及检查重复文件.
+
+    只读: 不复制字幕包中的字幕. 每个目录只列出一次, 用于判断软链接, 同名字幕及 nfo.
+    刮削时先处理的文件可能移动字幕等文件, 目录列表随之过期, 因此刮削时应使用 `get_file_info_v2` 重新获取.
+    """
+    folders = {split_path(p)[0] for p in parsed}
+    listing = await asyncio.to_thread(DirListing.scan, folders)
+    sem = asyncio.Semaphore(32)  # 读取 nfo 的并发数
+
+    async def one(p: Path, r: ParsedName) -> FileInfo:
+        async with sem:
+            info = await _get_file_info(p, r, False, listing)
+            LogBuffer.clear_task()  # 预先分析时的日志不属于任何刮削任务
+            return info
+
+    infos = await asyncio.gather(*(one(p, r) for p, r in parsed.items()))
+    return dict(zip(parsed, infos, strict=True))
+
+
+async def _get_file_info(file_path: Path, r: ParsedName, copy_sub: bool, listing: DirListing | None = None) -> FileInfo:
+    """查找字幕及读取 nfo, 补全文件信息. listing 为 None 时逐个判断文件是否存在"""
+    exists = listing.exists if listing is not None else aiofiles.os.path.exists
+    islink = listing.islink if listing is not None else aiofiles.os.path.islink
+    has_sub = False
+    c_word = ""
+    sub_list = []
+    cnword_style = manager.config.cnword_style
+    movie_number = r.number
+    cd_part = r.cd_part
+    destroyed, leak, wuma, youma, mosaic = r.destroyed, r.leak, r.wuma, r.youma, r.mosaic
+    file_path_str = r.file_path_str
+    folder_path = r.folder_path
+    file_name = r.file_name
+    file_show_name = file_name
+    # 以下两项使用清除防屏蔽字符前的文件名
+    original_name = os.path.splitext(split_path(file_path)[1])[0]
+    file_name_temp = original_name + "."
+    nfo_old_path = folder_path / (original_name + ".nfo")
+
+    try:
+        if r.error:
+            raise RuntimeError("解析文件名失败")
+
+        # 软链接时，获取原身路径(用来查询原身文件目录是否有字幕)
+        file_ori_path = None
+        if await islink(file_path):
+            file_ori_path = file_path.resolve()
 
         # 查找本地字幕文件
-        cnword_list = manager.config.cnword_char
+        cnword_list = list(manager.config.cnword_char)
         if "-C." in str(cnword_list).upper():
             cnword_list.append("-C ")
         sub_type_list = manager.config.sub_type  # 本地字幕后缀
@@ -613,11 +717,11 @@ async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
             sub_type_chs = ".chs" + sub_type
             sub_path_chs = folder_path / (file_name + sub_type_chs)
             sub_path = folder_path / (file_name + sub_type)
-            if await aiofiles.os.path.exists(sub_path_chs):
+            if await exists(sub_path_chs):
                 sub_list.append(sub_type_chs)
                 c_word = cnword_style  # 中文字幕影片后缀
                 has_sub = True
-            if await aiofiles.os.path.exists(sub_path):
+            if await exists(sub_path):
                 sub_list.append(sub_type)
                 c_word = cnword_style  # 中文字幕影片后缀
                 has_sub = True
@@ -628,6 +732,7 @@ async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
                     has_sub = True
 
         # 判断路径名是否有中文字幕字符
+        cd_char = manager.config.cd_char
         if not has_sub:
             cnword_list.append("-uc.")
             file_name_temp = file_name_temp.upper().replace("CD", "").replace("CARIB", "")  # 去掉cd/carib，避免-c误判
@@ -641,14 +746,18 @@ async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
                     break
 
         # 判断nfo中是否有中文字幕、马赛克
-        if (not has_sub or not mosaic) and await aiofiles.os.path.exists(nfo_old_path):
+        if (not has_sub or not mosaic) and await exists(nfo_old_path):
             try:
                 async with aiofiles.open(nfo_old_path, encoding="utf-8") as f:
                     nfo_content = await f.read()
-                if not has_sub and ">中文字幕</" in nfo_content:
+                if not has_sub and ">中文字幕</" in nfo_content:  # 包括 <genre>中文字幕</genre> 及 <tag>中文字幕</tag>
                     c_word = cnword_style  # 中文字幕影片后缀
                     has_sub = True
                 if not mosaic:
+                    umr_style = str(manager.config.umr_style)
+                    leak_style = str(manager.config.leak_style)
+                    wuma_style = str(manager.config.wuma_style)
+                    youma_style = manager.config.youma_style
                     if ">无码流出</" in nfo_content or ">無碼流出</" in nfo_content:
                         leak = leak_style
                         mosaic = "无码流出"
@@ -673,22 +782,11 @@ async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
             except Exception:
                 signal.show_traceback_log(traceback.format_exc())
 
-        if not has_sub and await aiofiles.os.path.exists(nfo_old_path):
-            try:
-                async with aiofiles.open(nfo_old_path, encoding="utf-8") as f:
-                    nfo_content = await f.read()
-                if "<genre>中文字幕</genre>" in nfo_content or "<tag>中文字幕</tag>" in nfo_content:
-                    c_word = cnword_style  # 中文字幕影片后缀
-                    has_sub = True
-            except Exception:
-                signal.show_traceback_log(traceback.format_exc())
-
         # 查找字幕包目录字幕文件
         subtitle_add = manager.config.subtitle_add
         if not has_sub and copy_sub and subtitle_add:
             subtitle_folder = manager.config.subtitle_folder
-            subtitle_add = manager.config.subtitle_add
-            if subtitle_add and subtitle_folder:  # 复制字幕开
+            if subtitle_folder:  # 复制字幕开
                 for sub_type in sub_type_list:
                     sub_path_1 = os.path.join(subtitle_folder, (movie_number + cd_part + sub_type))
                     sub_path_2 = os.path.join(subtitle_folder, file_name + sub_type)
@@ -716,11 +814,12 @@ async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
         file_show_name += cd_part
 
     except Exception:
+        error = r.error or traceback.format_exc()
         signal.show_traceback_log(file_path)
-        signal.show_traceback_log(traceback.format_exc())
-        signal.show_log_text(traceback.format_exc())
+        signal.show_traceback_log(error)
+        signal.show_log_text(error)
         LogBuffer.log().write("\n" + str(file_path))
-        LogBuffer.log().write("\n" + traceback.format_exc())
+        LogBuffer.log().write("\n" + error)
 
     return FileInfo(
         number=movie_number,
@@ -736,14 +835,14 @@ async def get_file_info_v2(file_path: Path, copy_sub: bool = True) -> FileInfo:
         file_path=Path(file_path),
         folder_path=folder_path,
         file_name=file_name,
-        file_ex=file_ex,
+        file_ex=r.file_ex,
         sub_list=sub_list,
         file_show_name=file_show_name,
-        file_show_path=Path(file_show_path),
-        short_number=optional_data.get("short_number", ""),
-        appoint_number=optional_data.get("appoint_number", ""),
-        appoint_url=optional_data.get("appoint_url", ""),
-        website_name=optional_data.get("website_name", ""),
+        file_show_path=Path(r.file_show_path),
+        short_number=r.short_number,
+        appoint_number=r.appoint_number,
+        appoint_url=r.appoint_url,
+        website_name=r.website_name,
         definition="",
         codec="",
     )
@@ -1,7 +1,9 @@
 import asyncio
 import os
 import re
-from itertools import chain
+import time
+from dataclasses import replace
+from itertools import chain, zip_longest
 from typing import TYPE_CHECKING
 
 from patchright.async_api import Error as PatchrightError
@@ -9,6 +11,7 @@ from patchright.async_api import Error as PatchrightError
 from ..config.models import Language, Website
 from ..gen.field_enums import CrawlerResultFields
 from ..manual import ManualConfig
+from ..metrics import CRAWL_ERRORS, CRAWL_SECONDS
 from ..models.enums import FileMode
 from ..models.flags import Flags
 from ..models.types import CrawlerInput, CrawlerResponse, CrawlerResult, CrawlersResult, CrawlTask
@@ -133,106 +136,168 @@ class FileScraper:
         # 对爬虫函数调用添加超时限制, 超时异常由调用者处理
         if os.getenv("DEBUG"):
             timeout = None
-        r = await asyncio.wait_for(c.run(task_input), timeout=timeout)
+        start = time.perf_counter()
+        try:
+            r = await asyncio.wait_for(c.run(task_input), timeout=timeout)
+        except Exception as e:
+            CRAWL_SECONDS.observe(time.perf_counter() - start, website.value)
+            CRAWL_ERRORS.inc(website.value, "timeout" if isinstance(e, TimeoutError) else "exception")
+            raise
+        # 被取消 (如并发预取中未被采用) 的请求不计入
+        CRAWL_SECONDS.observe(time.perf_counter() - start, website.value)
+        if r.data is None:
+            CRAWL_ERRORS.inc(website.value, "no_data")
         return r
 
+    async def _request_site(self, task_input: CrawlerInput, key: tuple[Website, Language]) -> CrawlerResponse:
+        """按 (网站, 语言) 请求网站数据"""
+        site, lang = key
+        task_input.language = lang
+        task_input.org_language = lang
+        # 多语言网站, 指定一个默认语言
+        if site in MULTI_LANGUAGE_WEBSITES and lang == Language.UNDEFINED:
+            task_input.language = Language.JP
+            task_input.org_language = Language.JP
+        return await self._call_crawler(task_input, site)
+
+    def _start_eager_tasks(
+        self, task_input: CrawlerInput, plans: list[tuple[CrawlerResultFields, Language, list[Website]]]
+    ) -> dict[tuple[Website, Language], asyncio.Task[CrawlerResponse]]:
+        """
+        并发预取模式: 按各字段优先级的排名依次合并网站列表, 同时请求排名最靠前的若干个网站.
+        """
+        keys: dict[tuple[Website, Language], Language] = {}  # key -> 请求语言
+        for sites in zip_longest(*[[(s, lang) for s in sites] for _, lang, sites in plans]):
+            for each in sites:
+                if each is None:
+                    continue
+                site, lang = each
+                key = (site, lang) if site in MULTI_LANGUAGE_WEBSITES else (site, Language.UNDEFINED)
+                keys.setdefault(key, lang)
+        tasks = {}
+        for key, lang in list(keys.items())[: max(self.config.eager_crawl_count, 1)]:
+            # 各任务并发修改 language 等字段, 需使用独立的副本
+            t = asyncio.create_task(self._request_site(replace(task_input), (key[0], lang)))
+            t.add_done_callback(lambda t: t.cancelled() or t.exception())  # 被取消或未被采用的任务, 忽略其异常
+            tasks[key] = t
+        return tasks
+
     async def _call_crawlers(self, task_input: CrawlerInput, type_sites: set[Website]) -> CrawlersResult | None:
         """
         获取一组网站的数据：按照设置的网站组，请求各字段数据，并返回最终的数据
         采用按需请求策略：仅请求必要的网站，失败时才请求下一优先级网站
+        启用并发预取时，同时请求排名靠前的网站，按优先级选取各字段数据，并取消不再可能被采用的请求
         """
         all_res: dict[tuple[Website, Language], CrawlerResult] = {}
         failed: set[tuple[Website, Language]] = set()  # 记录失败的网站
         reduced = CrawlersResult.empty()
         req_info: list[str] = []  # 请求信息列表
+        start_time = time.perf_counter()
+        serial_time = 0.0  # 各请求耗时之和, 即顺序请求时的耗时
 
-        # 按字段分别处理，每个字段按优先级尝试获取
+        plans: list[tuple[CrawlerResultFields, Language, list[Website]]] = []
         for field in ManualConfig.REDUCED_FIELDS:
-            # 获取该字段的优先级列表
             f_config = self.config.get_field_config(field)
-            f_sites = [s for s in f_config.site_prority if s in type_sites]
-            f_lang = f_config.language
-
-            reduced.field_log += (
-                f"\n\n    📌 {field} \n    ====================================\n"
-                f"    🌐 优先级设置: {' -> '.join(s.value for s in f_sites)}"
-            )
-
-            # 按优先级依次尝试获取字段值
-            for site in f_sites:
-                # 检查是否已经请求过该网站
-                key = (site, f_lang)
-
-                # 如果网站不支持多语言, 则使用 UNDEFINED
-                if site not in MULTI_LANGUAGE_WEBSITES:
-                    key = (site, Language.UNDEFINED)
-
-                # 如果已有该网站数据，直接使用
-                if key in all_res:
-                    site_data = all_res[key]
-                elif key in failed:
-                    # 不再请求已失败的网站
-                    reduced.field_log += f"\n    🔴 {site:<15} (已失败, 跳过)"
-                    continue
-                else:
-                    # 如果网站数据尚未请求，则进行请求
-                    try:
-                        task_input.language = f_lang
-                        task_input.org_language = f_lang
-                        # 多语言网站, 指定一个默认语言
-                        if site in MULTI_LANGUAGE_WEBSITES and key[1] == Language.UNDEFINED:
-                            task_input.language = Language.JP
-                            task_input.org_language = Language.JP
-                        web_data = await self._call_crawler(task_input, site)
-                        req_info.append(f"{sprint_source(*key)} ({web_data.debug_info.execution_time:.2f}s)")
-                        if web_data.data is None:
-                            if e := web_data.debug_info.error:
-                                raise e
-                            raise ValueError(f"{site} 返回了空数据")
-                        site_data = web_data.data
-                        # 处理并保存结果
-                        all_res[key] = web_data.data
-                        # 多语言网站, 如果 undefined 尚不存在, 也使用当前语言数据
-                        if site in MULTI_LANGUAGE_WEBSITES and (site, Language.UNDEFINED) not in all_res:
-                            all_res[(site, Language.UNDEFINED)] = web_data.data
-                    except PatchrightError as e:
-                        if "BrowserType.launch: Executable doesn't exist" in e.message:
-                            e = "找不到 Chrome 浏览器, 请安装或关闭对应网站的 use_browser 选项"
-                        reduced.field_log += f"\n    🔴 {site:<15} (失败: {str(e)})"
-                        failed.add(key)
-                        continue
-                    except TimeoutError:
-                        reduced.field_log += f"\n    🔴 {site:<15} (请求超时)"
-                        failed.add(key)
+            plans.append((field, f_config.language, [s for s in f_config.site_prority if s in type_sites]))
+
+        eager_tasks = self._start_eager_tasks(task_input, plans) if self.config.eager_crawl else {}
+
+        def cancel_losers(index: int) -> None:
+            # 剩余字段均不会再使用的网站, 其结果已不可能被采用
+            remain = {
+                (s, lang) if s in MULTI_LANGUAGE_WEBSITES else (s, Language.UNDEFINED)
+                for _, lang, sites in plans[index + 1 :]
+                for s in sites
+            }
+            for key in [k for k in eager_tasks if k not in remain or k in all_res]:
+                eager_tasks.pop(key).cancel()
+
+        try:
+            # 按字段分别处理，每个字段按优先级尝试获取
+            for index, (field, f_lang, f_sites) in enumerate(plans):
+                reduced.field_log += (
+                    f"\n\n    📌 {field} \n    ====================================\n"
+                    f"    🌐 优先级设置: {' -> '.join(s.value for s in f_sites)}"
+                )
+
+                # 按优先级依次尝试获取字段值
+                for site in f_sites:
+                    # 检查是否已经请求过该网站
+                    key = (site, f_lang)
+
+                    # 如果网站不支持多语言, 则使用 UNDEFINED
+                    if site not in MULTI_LANGUAGE_WEBSITES:
+                        key = (site, Language.UNDEFINED)
+
+                    # 如果已有该网站数据，直接使用
+                    if key in all_res:
+                        site_data = all_res[key]
+                    elif key in failed:
+                        # 不再请求已失败的网站
+                        reduced.field_log += f"\n    🔴 {site:<15} (已失败, 跳过)"
                         continue
-                    except Exception as e:
-                        reduced.field_log += f"\n    🔴 {site:<15} (失败: {str(e)})"
-                        failed.add(key)
+                    else:
+                        # 如果网站数据尚未请求，则进行请求; 已预取的网站等待其结果
+                        try:
+                            if key in eager_tasks:
+                                web_data = await eager_tasks.pop(key)
+                            else:
+                                web_data = await self._request_site(task_input, (site, f_lang))
+                            serial_time += web_data.debug_info.execution_time
+                            req_info.append(f"{sprint_source(*key)} ({web_data.debug_info.execution_time:.2f}s)")
+                            if web_data.data is None:
+                                if e := web_data.debug_info.error:
+                                    raise e
+                                raise ValueError(f"{site} 返回了空数据")
+                            site_data = web_data.data
+                            # 处理并保存结果
+                            all_res[key] = web_data.data
+                            # 多语言网站, 如果 undefined 尚不存在, 也使用当前语言数据
+                            if site in MULTI_LANGUAGE_WEBSITES and (site, Language.UNDEFINED) not in all_res:
+                                all_res[(site, Language.UNDEFINED)] = web_data.data
+                        except PatchrightError as e:
+                            if "BrowserType.launch: Executable doesn't exist" in e.message:
+                                e = "找不到 Chrome 浏览器, 请安装或关闭对应网站的 use_browser 选项"
+                            reduced.field_log += f"\n    🔴 {site:<15} (失败: {str(e)})"
+                            failed.add(key)
+                            continue
+                        except TimeoutError:
+                            reduced.field_log += f"\n    🔴 {site:<15} (请求超时)"
+                            failed.add(key)
+                            continue
+                        except Exception as e:
+                            reduced.field_log += f"\n    🔴 {site:<15} (失败: {str(e)})"
+                            failed.add(key)
+                            continue
+
+                    # 检查字段数据
+                    if not getattr(site_data, field.value, None):
+                        reduced.field_log += f"\n    🔴 {site:<15} (未找到)"
                         continue
 
-                # 检查字段数据
-                if not getattr(site_data, field.value, None):
-                    reduced.field_log += f"\n    🔴 {site:<15} (未找到)"
-                    continue
-
-                # 添加来源信息
-                reduced.field_sources[field] = site.value
-
-                # 添加 external_id
-                reduced.external_ids[site] = site_data.external_id
-
-                if field == CrawlerResultFields.POSTER:
-                    reduced.image_download = site_data.image_download
-                elif field == CrawlerResultFields.ORIGINALTITLE and site_data.actor:
-                    reduced.amazon_orginaltitle_actor = site_data.actor.split(",")[0]
-
-                # 保存数据
-                setattr(reduced, field.value, getattr(site_data, field.value))
-                reduced.field_log += f"\n    🟢 {site}\n     ↳{getattr(reduced, field.value)}"
-                # 找到有效数据，跳出循环继续处理下一个字段
-                break
-            else:  # 所有来源都无此字段
-                reduced.field_log += "\n    🔴 所有来源均无数据"
+                    # 添加来源信息
+                    reduced.field_sources[field] = site.value
+
+                    # 添加 external_id
+                    reduced.external_ids[site] = site_data.external_id
+
+                    if field == CrawlerResultFields.POSTER:
+                        reduced.image_download = site_data.image_download
+                    elif field == CrawlerResultFields.ORIGINALTITLE and site_data.actor:
+                        reduced.amazon_orginaltitle_actor = site_data.actor.split(",")[0]
+
+                    # 保存数据
+                    setattr(reduced, field.value, getattr(site_data, field.value))
+                    reduced.field_log += f"\n    🟢 {site}\n     ↳{getattr(reduced, field.value)}"
+                    # 找到有效数据，跳出循环继续处理下一个字段
+                    break
+                else:  # 所有来源都无此字段
+                    reduced.field_log += "\n    🔴 所有来源均无数据"
+                if eager_tasks:
+                    cancel_losers(index)
+        finally:
+            for t in eager_tasks.values():
+                t.cancel()
 
         # 所有来源均失败
         if len(all_res) == 0:
@@ -259,6 +324,11 @@ class FileScraper:
         reduced.all_actors = list(dict.fromkeys(chain(reduced.all_actors, reduced.actors)))
 
         reduced.site_log = f"\n 🌐 [website] {'-> '.join(req_info)}"
+        if self.config.eager_crawl:
+            used_time = time.perf_counter() - start_time
+            reduced.site_log += (
+                f"\n ⚡ [eager] 并发预取用时 {used_time:.2f}s, 节省 {max(serial_time - used_time, 0):.2f}s"
+            )
 
         return reduced
 
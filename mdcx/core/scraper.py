@@ -1,6 +1,8 @@
 import asyncio
+import contextlib
 import time
 import traceback
+from collections.abc import AsyncIterator
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -8,10 +10,11 @@ import aiofiles.os
 from PyQt5.QtWidgets import QMessageBox
 
 from ..base.file import (
+    SCAN_POSITION_PREFIX,
     _clean_empty_fodlers,
     check_file,
     copy_trailer_to_theme_videos,
-    get_movie_list,
+    iter_movie_list,
     move_bif,
     move_file_to_failed_folder,
     move_other_file,
@@ -21,13 +24,15 @@ from ..base.file import (
     save_success_list,
 )
 from ..base.image import extrafanart_copy2, extrafanart_extras_copy
+from ..base.web import get_dmm_trailer
 from ..config.enums import DownloadableFile, EmbyAction, ReadMode, Switch
 from ..config.extend import get_movie_path_setting
 from ..config.manager import manager
 from ..config.resources import resources
 from ..crawler import CrawlerProvider
+from ..metrics import FILES_TOTAL, STAGE_SECONDS, metrics
 from ..models.enums import FileMode
-from ..models.flags import FileDoneDict, Flags
+from ..models.flags import Flags
 from ..models.log_buffer import LogBuffer
 from ..models.types import CrawlersResult, FileInfo, OtherInfo, ScrapeResult, ShowData
 from ..signals import signal
@@ -37,7 +42,17 @@ from ..utils import executor, get_current_time, get_real_time, get_used_time, sp
 from ..utils.dataclass import update
 from ..utils.file import copy_file_async, move_file_async
 from ..utils.path import is_descendant
-from .file import creat_folder, deal_old_files, get_file_info_v2, get_output_name, move_movie
+from .background import ExtrasJob, background_lane
+from .file import (
+    ParsedName,
+    creat_folder,
+    deal_old_files,
+    get_file_info_batch,
+    get_file_info_v2,
+    get_output_name,
+    move_movie,
+    parse_file_names,
+)
 from .file_crawler import FileScraper
 from .image import add_mark
 from .nfo import get_nfo_data, write_nfo
@@ -66,18 +81,73 @@ if TYPE_CHECKING:
 class StopScrape(Exception): ...
 
 
+async def _iter_list(movie_list: list[Path]) -> AsyncIterator[Path]:
+    for each in movie_list:
+        yield each
+
+
+def _walk_key(p: Path, root: Path) -> tuple[tuple[int, str], ...]:
+    """文件在遍历中的顺序: 同一目录中先按名称遍历文件, 再按名称依次进入子目录"""
+    parts = p.relative_to(root).parts
+    return (*((1, d) for d in parts[:-1]), (0, parts[-1]))
+
+
+async def _iter_scan(source: AsyncIterator[Path], root: Path, after: Path | None = None) -> AsyncIterator[Path]:
+    """
+    记录遍历进度. 遍历未完成时, 剩余任务中保存最后发现的文件, 继续刮削时从此处继续遍历.
+
+    Args:
+        after: 跳过遍历顺序在此文件之前 (含) 的文件
+    """
+    position = _walk_key(after, root) if after is not None else None
+    async with contextlib.aclosing(source) as items:
+        async for each in items:
+            if position is not None and _walk_key(each, root) <= position:
+                continue
+            Flags.scan_position = (root, each)
+            yield each
+    Flags.scan_position = None
+    Flags.can_save_remain = True
+
+
+async def _chain(*sources: AsyncIterator[Path]) -> AsyncIterator[Path]:
+    for source in sources:
+        async with contextlib.aclosing(source) as items:
+            async for each in items:
+                yield each
+
+
 class Scraper:
     def __init__(self, crawler_provider: "CrawlerProviderProtocol"):
         self.crawler_provider = crawler_provider
-
-    async def run(self, file_mode: FileMode, movie_list: list[Path] | None) -> None:
+        self._parsed: dict[Path, ParsedName] = {}  # 预先解析的文件名
+
+    async def run(
+        self, file_mode: FileMode, movie_list: list[Path] | None, resume_scan: tuple[Path, Path] | None = None
+    ) -> None:
+        """
+        Args:
+            resume_scan: 继续上次未完成的遍历, (遍历目录, 最后发现的文件). 处理完 movie_list 后从此处继续遍历
+        """
+        cache = manager.computed.async_client.cache
+        if cache is not None:
+            cache.force_refresh = Flags.web_cache_refresh
         try:
-            await self._run(file_mode, movie_list)
+            await self._run(file_mode, movie_list, resume_scan)
         finally:
+            Flags.web_cache_refresh = False
+            if cache is not None:
+                cache.force_refresh = False
             await self.crawler_provider.close()
+            manager.computed.async_client.limiters.save()  # 保存各网站的请求速率, 下次从此速率开始
+            await manager.computed.probe_cache.flush()
 
-    async def _run(self, file_mode: FileMode, movie_list: list[Path] | None) -> None:
+    async def _run(
+        self, file_mode: FileMode, movie_list: list[Path] | None, resume_scan: tuple[Path, Path] | None
+    ) -> None:
         Flags.reset()
+        Flags.scan_position = None
+        metrics.start_loop_probe()
         if movie_list is None:
             movie_list = []
         Flags.scrape_start_time = time.time()  # 开始刮削时间
@@ -110,52 +180,72 @@ class Scraper:
         movie_path = path_settings.movie_path
         ignore_dirs = path_settings.ignore_dirs
         softlink_path = path_settings.softlink_path
+        # 输出目录在刮削中会有文件移入, 与排除目录分开, 始终不遍历
+        output_dirs = [path_settings.success_folder, path_settings.failed_folder, softlink_path]
 
         # 获取待刮削文件列表的相关信息
-        if not movie_list:
+        signal.show_log_text("\n ⏰ Start time: " + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()))
+        if movie_list:
+            if len(movie_list) < thread_number and manager.config.main_mode != 4 and not resume_scan:
+                thread_number = len(movie_list)
+            source = _iter_list(movie_list)
+            if resume_scan:
+                root, after = resume_scan
+                signal.show_log_text(f" 🔎 剩余任务完成后, 从 {after} 之后继续遍历 {root}")
+                scan = iter_movie_list(FileMode.Default, root, ignore_dirs, thread_number, output_dirs)
+                source = _chain(source, _iter_scan(scan, root, after))
+        else:
             if manager.config.scrape_softlink_path:
                 await newtdisk_creat_symlink(
                     Switch.COPY_NETDISK_NFO in manager.config.switch_on, movie_path, softlink_path
                 )
                 movie_path = softlink_path
-            signal.show_log_text("\n ⏰ Start time: " + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()))
-            movie_list = await get_movie_list(file_mode, movie_path, ignore_dirs)
-        else:
-            signal.show_log_text("\n ⏰ Start time: " + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()))
-        Flags.remain_list = movie_list
+            source = iter_movie_list(file_mode, movie_path, ignore_dirs, thread_number, output_dirs)
+            if file_mode == FileMode.Default:
+                source = _iter_scan(source, movie_path)
+        self._parsed = {}
+        if manager.config.pre_analyze and file_mode != FileMode.Single:
+            source = _iter_list(await self._pre_analyze(source))
+        Flags.remain_list = []
         Flags.can_save_remain = True
+        background_lane.start()  # 继续上次未完成的后台任务
 
-        task_count = len(movie_list)
-        Flags.total_count = task_count
+        # 有界队列 + 固定数量的 worker, 边遍历边刮削, 避免一次性为所有文件创建任务
+        queue: asyncio.Queue[Path | None] = asyncio.Queue(thread_number)
 
-        task_list = []
-        for i, each in enumerate(movie_list, 1):
-            task_list.append((each, i, task_count))
+        async def producer():
+            cancelled = False
+            try:
+                # 关闭 source 以通知遍历线程退出
+                async with contextlib.aclosing(source) as items:
+                    async for each in items:
+                        if not Flags.total_count:
+                            self._show_scrape_start(thread_number, thread_time)
+                        Flags.remain_list.append(each)
+                        Flags.can_save_remain = True
+                        Flags.total_count += 1
+                        await queue.put(each)
+            except asyncio.CancelledError:
+                cancelled = True  # worker 也会被取消, 不能等待队列空位
+                raise
+            finally:
+                if not cancelled:
+                    for _ in range(thread_number):
+                        await queue.put(None)
+
+        async def worker():
+            while (each := await queue.get()) is not None:
+                await self.process_one_file(each)
+
+        tasks = [asyncio.create_task(producer()), *(asyncio.create_task(worker()) for _ in range(thread_number))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:  # 停止或任一任务异常时, 取消其余任务
+                task.cancel()
+        task_count = Flags.total_count
 
         if task_count:
-            Flags.count_claw += 1
-            if manager.config.main_mode == 4:
-                signal.show_log_text(f" 🕷 当前为读取模式，并发数（{thread_number}），线程延时（0）秒...")
-            else:
-                if task_count < thread_number:
-                    thread_number = task_count
-                signal.show_log_text(f" 🕷 开启异步并发，并发数（{thread_number}），线程延时（{thread_time}）秒...")
-            if Switch.REST_SCRAPE in manager.config.switch_on and manager.config.main_mode != 4:
-                signal.show_log_text(
-                    f'<font color="brown"> 🍯 间歇刮削 已启用，连续刮削 {manager.config.rest_count} 个文件后，将自动休息 {Flags.rest_time_convert} 秒...</font>'
-                )
-
-            Flags.next_start_time = time.time()
-
-            # 创建信号量来限制并发数量
-            semaphore = asyncio.Semaphore(thread_number)
-
-            async def limited_scrape_exec_thread(task):
-                async with semaphore:
-                    await self.process_one_file(task)
-
-            # 异步并发
-            await asyncio.gather(*[limited_scrape_exec_thread(task) for task in task_list])
             signal.label_result.emit(f" 刮削中：0 成功：{Flags.succ_count} 失败：{Flags.fail_count}")
             await save_success_list()  # 保存成功列表
             if signal.stop:
@@ -190,6 +280,8 @@ class Scraper:
         signal.show_log_text(" ⏱ Used time".ljust(15) + f": {used_time}S")
         signal.show_log_text(" 📺 Movies num".ljust(15) + f": {task_count}")
         signal.show_log_text(" 🍕 Per time".ljust(15) + f": {average_time}S")
+        if background_lane.remaining:
+            signal.show_log_text(" 📦 Background".ljust(15) + f": {background_lane.remaining} 个任务在后台继续下载")
         signal.show_log_text("================================================================================")
         signal.show_scrape_info(f"🎉 刮削完成 {task_count}/{task_count}")
 
@@ -214,9 +306,49 @@ class Scraper:
             await self.crawler_provider.close()
             signal.exec_exit_app.emit()
 
-    async def process_one_file(self, task: tuple[Path, int, int]) -> None:
+    async def _pre_analyze(self, source: AsyncIterator[Path]) -> list[Path]:
+        """遍历完成后批量获取全部文件的信息. 返回同一番号的文件相邻, 分集按顺序排列的文件列表, 并列出重复的文件"""
+        paths = [p async for p in source]
+        if not paths:
+            return paths
+        start_time = time.time()
+        signal.show_log_text(f" 🔎 预先分析 {len(paths)} 个文件...")
+        self._parsed = await parse_file_names(paths)
+        groups: dict[str, list[FileInfo]] = {}
+        for info in (await get_file_info_batch(self._parsed)).values():
+            groups.setdefault(info.number.upper(), []).append(info)
+        ordered: list[Path] = []
+        multi_part = 0
+        for infos in groups.values():
+            infos.sort(key=lambda i: int("0" + "".join(c for c in i.cd_part if c.isdigit())))
+            ordered += [i.file_path for i in infos]
+            multi_part += any(i.cd_part for i in infos)
+            # 显示名称相同的文件将输出为同一文件
+            names: dict[str, list[Path]] = {}
+            for i in infos:
+                names.setdefault(i.file_show_name.upper(), []).append(i.file_path)
+            for name, same in names.items():
+                if len(same) > 1:
+                    signal.show_log_text(f" 🟠 重复文件 {name}:\n    " + "\n    ".join(str(p) for p in same))
+        signal.show_log_text(
+            f" 🔎 预先分析完成: {len(groups)} 个番号, 其中 {multi_part} 个分集影片, 用时 {get_used_time(start_time)} 秒"
+        )
+        return ordered
+
+    def _show_scrape_start(self, thread_number: int, thread_time: int) -> None:
+        Flags.count_claw += 1
+        if manager.config.main_mode == 4:
+            signal.show_log_text(f" 🕷 当前为读取模式，并发数（{thread_number}），线程延时（0）秒...")
+        else:
+            signal.show_log_text(f" 🕷 开启异步并发，并发数（{thread_number}），线程延时（{thread_time}）秒...")
+        if Switch.REST_SCRAPE in manager.config.switch_on and manager.config.main_mode != 4:
+            signal.show_log_text(
+                f'<font color="brown"> 🍯 间歇刮削 已启用，连续刮削 {manager.config.rest_count} 个文件后，将自动休息 {Flags.rest_time_convert} 秒...</font>'
+            )
+        Flags.next_start_time = time.time()
+
+    async def process_one_file(self, file_path: Path) -> None:
         # 获取顺序
-        file_path, count, count_all = task
         Flags.counting_order += 1
         count = Flags.counting_order
 
@@ -240,7 +372,9 @@ class Scraper:
         thread_time = manager.config.thread_time
         if count == 1 or thread_time == 0 or manager.config.main_mode == 4:
             Flags.next_start_time = time.time()
-            signal.show_log_text(f" 🕷 {get_current_time()} 开始刮削：{Flags.scrape_starting}/{count_all} {show_name}")
+            signal.show_log_text(
+                f" 🕷 {get_current_time()} 开始刮削：{Flags.scrape_starting}/{Flags.total_count} {show_name}"
+            )
             thread_time = 0
         else:
             Flags.next_start_time += thread_time
@@ -249,7 +383,7 @@ class Scraper:
         remain_time = int(Flags.next_start_time - time.time())
         if remain_time > 0:
             signal.show_log_text(
-                f" ⏱ {get_current_time()}（{remain_time}）秒后开始刮削：{count}/{count_all} {show_name}"
+                f" ⏱ {get_current_time()}（{remain_time}）秒后开始刮削：{count}/{Flags.total_count} {show_name}"
             )
             for i in range(remain_time):
                 self._check_stop(show_name)
@@ -257,24 +391,28 @@ class Scraper:
 
         Flags.scrape_started += 1
         if count > 1 and thread_time != 0:
-            signal.show_log_text(f" 🕷 {get_current_time()} 开始刮削：{Flags.scrape_started}/{count_all} {show_name}")
+            signal.show_log_text(
+                f" 🕷 {get_current_time()} 开始刮削：{Flags.scrape_started}/{Flags.total_count} {show_name}"
+            )
 
         start_time = time.time()
         file_mode = Flags.file_mode
 
         # 获取文件基础信息
-        file_info = await get_file_info_v2(file_path)
+        # 预先分析时的文件信息可能已过期 (如其他文件移动了字幕), 仅复用文件名的解析结果
+        with STAGE_SECONDS.time("file_info"):
+            file_info = await get_file_info_v2(file_path, parsed=self._parsed.pop(file_path, None))
         number = file_info.number
         folder_old_path = file_info.folder_path
         file_show_name = file_info.file_show_name
         file_show_path = file_info.file_show_path
 
         # 显示刮削信息
-        progress_value = Flags.scrape_started / count_all * 100
+        progress_value = Flags.scrape_started / Flags.total_count * 100
         progress_percentage = f"{progress_value:.2f}%"
         signal.exec_set_processbar.emit(int(progress_value))
         signal.set_label_file_path.emit(
-            f"正在刮削： {Flags.scrape_started}/{count_all} {progress_percentage} \n {file_show_path}"
+            f"正在刮削： {Flags.scrape_started}/{Flags.total_count} {progress_percentage} \n {file_show_path}"
         )
         signal.label_result.emit(
             f" 刮削中：{Flags.scrape_started - Flags.succ_count - Flags.fail_count} 成功：{Flags.succ_count} 失败：{Flags.fail_count}"
@@ -295,16 +433,17 @@ class Scraper:
         other = None
         try:
             json_data, other = await self._process_one_file(file_info, file_mode)
-            if json_data and other:
-                if manager.config.main_mode == 4:
-                    number = json_data.number  # 读取模式且存在nfo时，可能会导致movie_number改变，需要更新
-                Flags.json_data_dic.update({number: ScrapeResult(file_info, json_data, other)})
+            if json_data and other and manager.config.main_mode == 4:
+                number = json_data.number  # 读取模式且存在nfo时，可能会导致movie_number改变，需要更新
         except Exception as e:
             self._check_stop(show_name)
             signal.show_traceback_log(traceback.format_exc())
             signal.show_log_text(traceback.format_exc())
             LogBuffer.error().write("scrape file error: " + str(e))
             LogBuffer.log().write("\n" + traceback.format_exc())
+        finally:
+            # 同一番号的其他分集在等待此结果, 失败时由其中一个接任刮削
+            Flags.scrape_flight.done(ScrapeResult(file_info, json_data, other) if json_data and other else None)
 
         # 显示刮削数据
         try:
@@ -314,6 +453,7 @@ class Scraper:
                 show_data.data = json_data
                 show_data.other = other
                 Flags.succ_count += 1
+                FILES_TOTAL.inc("success")
                 show_data.show_name = (
                     str(Flags.count_claw)
                     + "-"
@@ -326,6 +466,7 @@ class Scraper:
                 signal.show_list_name("succ", show_data, number)
             else:
                 Flags.fail_count += 1
+                FILES_TOTAL.inc("failed")
                 show_data.show_name = (
                     str(Flags.count_claw)
                     + "-"
@@ -357,18 +498,19 @@ class Scraper:
         try:
             Flags.scrape_done += 1
             count = Flags.scrape_done
-            progress_value = count / count_all * 100
+            progress_value = count / Flags.total_count * 100
             progress_percentage = f"{progress_value:.2f}%"
             used_time = get_used_time(start_time)
-            scrape_info_begin = f"{count:d}/{count_all:d} ({progress_percentage}) round({Flags.count_claw}) {split_path(file_path)[1]}    新的刮削线程"
+            STAGE_SECONDS.observe(time.time() - start_time, "total")
+            scrape_info_begin = f"{count:d}/{Flags.total_count:d} ({progress_percentage}) round({Flags.count_claw}) {split_path(file_path)[1]}    新的刮削线程"
             scrape_info_begin = "\n\n\n" + "👇" * 50 + "\n" + scrape_info_begin
-            scrape_info_after = f"\n 🕷 {get_current_time()} {count}/{count_all} {split_path(file_path)[1]} 刮削完成！用时 {used_time} 秒！"
+            scrape_info_after = f"\n 🕷 {get_current_time()} {count}/{Flags.total_count} {split_path(file_path)[1]} 刮削完成！用时 {used_time} 秒！"
             signal.show_log_text(scrape_info_begin + LogBuffer.log().get() + scrape_info_after)
             remain_count = Flags.scrape_started - count
-            if Flags.scrape_started == count_all:
+            if Flags.scrape_started == Flags.total_count:
                 signal.show_log_text(f" 🕷 剩余正在刮削的线程：{remain_count}")
             signal.label_result.emit(f" 刮削中：{remain_count} 成功：{Flags.succ_count} 失败：{Flags.fail_count}")
-            signal.show_scrape_info(f"🔎 已刮削 {count}/{count_all}")
+            signal.show_scrape_info(f"🔎 已刮削 {count}/{Flags.total_count}")
         except Exception as e:
             self._check_stop(show_name)
             signal.show_traceback_log(traceback.format_exc())
@@ -391,17 +533,17 @@ class Scraper:
         # 处理间歇刮削
         try:
             if manager.config.main_mode != 4 and Switch.REST_SCRAPE in manager.config.switch_on:
-                time_note = f" 🏖 已累计刮削 {count}/{count_all}，已连续刮削 {count - Flags.rest_now_begin_count}/{manager.config.rest_count}..."
+                time_note = f" 🏖 已累计刮削 {count}/{Flags.total_count}，已连续刮削 {count - Flags.rest_now_begin_count}/{manager.config.rest_count}..."
                 signal.show_log_text(time_note)
                 if count - Flags.rest_now_begin_count >= manager.config.rest_count:
                     if Flags.scrape_starting > count:
                         time_note = f" 🏖 当前还存在 {Flags.scrape_starting - count} 个已经在刮削的任务，等待这些任务结束将进入休息状态...\n"
                         signal.show_log_text(time_note)
                         await Flags.sleep_end.wait()  # 等待休眠结束
-                    elif Flags.sleep_end.is_set() and count < count_all:
+                    elif Flags.sleep_end.is_set() and count < Flags.total_count:
                         Flags.sleep_end.clear()  # 开始休眠
                         Flags.rest_next_begin_time = time.time()  # 下一轮倒计时开始时间
-                        time_note = f'\n ⏸ 休息 {Flags.rest_time_convert} 秒，将在 <font color="red">{get_real_time(Flags.rest_next_begin_time + Flags.rest_time_convert)}</font> 继续刮削剩余的 {count_all - count} 个任务...\n'
+                        time_note = f'\n ⏸ 休息 {Flags.rest_time_convert} 秒，将在 <font color="red">{get_real_time(Flags.rest_next_begin_time + Flags.rest_time_convert)}</font> 继续刮削剩余的 {Flags.total_count - count} 个任务...\n'
                         signal.show_log_text(time_note)
                         while (
                             Switch.REST_SCRAPE in manager.config.switch_on
@@ -503,20 +645,13 @@ class Scraper:
 
         # 刮削json_data
         # 获取已刮削的json_data
-        if "." in movie_number or file_info.mosaic in ["国产"]:
-            pass
-        elif movie_number not in Flags.json_get_set:
-            # 第一次遇到该番号，刮削
-            Flags.json_get_set.add(movie_number)
-        elif not Flags.json_data_dic.get(movie_number):
-            # 已经获取过该番号的json_data（如同一番号的其他集），但已刮削字典中找不到，说明第一次遇到它的线程还没刮削完，等它结束。
+        pre_data = None
+        if "." not in movie_number and file_info.mosaic not in ["国产"]:
+            # 同一番号的其他分集正在刮削时等待其结果, 若其失败, 则由当前文件接任刮削
             # todo 修改此处实现, 不要对分集启动多个刮削任务
-            while not Flags.json_data_dic.get(movie_number):
-                await asyncio.sleep(1)
-
-        pre_data = Flags.json_data_dic.get(movie_number)
+            _, pre_data = await Flags.scrape_flight.join(movie_number)
         # 已存在该番号数据时直接使用该数据
-        if pre_data and "." not in movie_number and file_info.mosaic not in ["国产"]:
+        if pre_data:
             pre_res = pre_data.data
             res = update(pre_res, file_info)
 
@@ -559,7 +694,8 @@ class Scraper:
             # res = await crawl(file_info.crawl_task(), file_mode)
 
             scraper = FileScraper(manager.config, self.crawler_provider)
-            res = await scraper.run(file_info.crawl_task(), file_mode)
+            with STAGE_SECONDS.time("crawl"):
+                res = await scraper.run(file_info.crawl_task(), file_mode)
             if res is None:
                 return None, None
             # 处理 FileInfo 和 CrawlersResult 的共同字段, 即 number/mosaic/letters
@@ -579,14 +715,17 @@ class Scraper:
         if not pre_data and update_nfo:
             deal_some_field(res)  # 处理字段
             replace_special_word(res)  # 替换特殊字符
-            await translate_title_outline(res, file_info.cd_part, movie_number)  # 翻译json_data（标题/介绍）
+            with STAGE_SECONDS.time("translate"):
+                await translate_title_outline(res, file_info.cd_part, movie_number)  # 翻译json_data（标题/介绍）
             deal_some_field(res)  # 再处理一遍字段，翻译后可能出现要去除的内容
-            await translate_actor(res)  # 映射输出演员名/信息
+            with STAGE_SECONDS.time("actor_map"):
+                await translate_actor(res)  # 映射输出演员名/信息
             translate_info(res, file_info.has_sub)  # 映射输出标签等信息
             replace_word(res)
 
         # 更新视频分辨率
-        definition, codec = await get_video_size(file_path)
+        with STAGE_SECONDS.time("video_probe"):
+            definition, codec = await get_video_size(file_path)
         file_info.definition, file_info.codec = definition, codec
         add_definition_tag(res, definition, codec)
 
@@ -637,17 +776,7 @@ class Scraper:
             return None, None
 
         # 初始化图片已下载地址的字典
-        if not Flags.file_done_dic.get(res.number):
-            Flags.file_done_dic[res.number] = FileDoneDict(
-                poster=None,
-                thumb=None,
-                fanart=None,
-                trailer=None,
-                local_poster=None,
-                local_thumb=None,
-                local_fanart=None,
-                local_trailer=None,
-            )
+        Flags.file_done(res.number)
 
         # 视频模式（原来叫整理模式）
         # 视频模式（仅根据刮削数据把电影命名为番号并分类到对应目录名称的文件夹下）
@@ -697,49 +826,71 @@ class Scraper:
 
         # 如果 final_pic_path 没处理过，这时才需要下载和加水印
         if pic_final_catched and file_can_download:
-            # 下载thumb
-            if not await thumb_download(res, other, file_info.cd_part, folder_new_path, thumb_final_path):
-                return None, None
+            with STAGE_SECONDS.time("image"):
+                # 下载thumb
+                if not await thumb_download(res, other, file_info.cd_part, folder_new_path, thumb_final_path):
+                    return None, None
 
-            # 下载艺术图
-            await fanart_download(res.number, other, file_info.cd_part, fanart_final_path)
+                # 下载艺术图
+                await fanart_download(res.number, other, file_info.cd_part, fanart_final_path)
 
-            # 下载poster
-            if not await poster_download(res, other, file_info.cd_part, folder_new_path, poster_final_path):
-                return None, None
+                # 下载poster
+                if not await poster_download(res, other, file_info.cd_part, folder_new_path, poster_final_path):
+                    return None, None
 
-            # 清理冗余图片
-            await pic_some_deal(res.number, thumb_final_path, fanart_final_path)
+                # 清理冗余图片
+                await pic_some_deal(res.number, thumb_final_path, fanart_final_path)
 
             # 加水印
-            await add_mark(other, file_info, res.mosaic)
+            with STAGE_SECONDS.time("watermark"):
+                await add_mark(other, file_info, res.mosaic)
+
+            if manager.config.defer_extras:
+                # 剧照, 预告片及主题视频在后台下载, 不等待. nfo 中的预告片链接仍需先确定
+                res.trailer = await get_dmm_trailer(res.trailer)
+                await background_lane.add(
+                    ExtrasJob(
+                        number=res.number,
+                        folder_new=str(folder_new_path),
+                        folder_old=str(folder_old_path),
+                        naming_rule=naming_rule,
+                        trailer=res.trailer,
+                        trailer_from=res.trailer_from,
+                        extrafanart=res.extrafanart,
+                        extrafanart_from=res.extrafanart_from,
+                        with_extrafanart=single_folder_catched,
+                    )
+                )
+            else:
+                with STAGE_SECONDS.time("extras"):
+                    # 下载剧照和剧照副本
+                    if single_folder_catched:
+                        await extrafanart_download(res.extrafanart, res.extrafanart_from, folder_new_path)
+                        await extrafanart_copy2(folder_new_path)
+                        await extrafanart_extras_copy(folder_new_path)
+
+                    # 下载trailer、复制主题视频
+                    # 因为 trailer也有带文件名，不带文件名两种情况，不能使用pic_final_catched。比如图片不带文件名，trailer带文件名这种场景需要支持每个分集去下载trailer
+                    await trailer_download(res, folder_new_path, folder_old_path, naming_rule)
+                    await copy_trailer_to_theme_videos(folder_new_path, naming_rule)
 
-            # 下载剧照和剧照副本
-            if single_folder_catched:
-                await extrafanart_download(res.extrafanart, res.extrafanart_from, folder_new_path)
-                await extrafanart_copy2(folder_new_path)
-                await extrafanart_extras_copy(folder_new_path)
+        # 生成nfo文件
+        with STAGE_SECONDS.time("nfo"):
+            await write_nfo(file_info, res, nfo_new_path, folder_new_path, update_nfo)
 
-            # 下载trailer、复制主题视频
-            # 因为 trailer也有带文件名，不带文件名两种情况，不能使用pic_final_catched。比如图片不带文件名，trailer带文件名这种场景需要支持每个分集去下载trailer
-            await trailer_download(res, folder_new_path, folder_old_path, naming_rule)
-            await copy_trailer_to_theme_videos(folder_new_path, naming_rule)
+        with STAGE_SECONDS.time("move"):
+            # 移动字幕、种子、bif、trailer、其他文件
+            if file_info.has_sub:
+                await move_sub(folder_old_path, folder_new_path, file_name, sub_list, naming_rule)
+            await move_torrent(folder_old_path, folder_new_path, file_name, movie_number, naming_rule)
+            await move_bif(folder_old_path, folder_new_path, file_name, naming_rule)
+            # self.move_trailer_video(folder_old_path, folder_new_path, file_name, naming_rule)
+            await move_other_file(res.number, folder_old_path, folder_new_path, file_name, naming_rule)
 
-        # 生成nfo文件
-        await write_nfo(file_info, res, nfo_new_path, folder_new_path, update_nfo)
-
-        # 移动字幕、种子、bif、trailer、其他文件
-        if file_info.has_sub:
-            await move_sub(folder_old_path, folder_new_path, file_name, sub_list, naming_rule)
-        await move_torrent(folder_old_path, folder_new_path, file_name, movie_number, naming_rule)
-        await move_bif(folder_old_path, folder_new_path, file_name, naming_rule)
-        # self.move_trailer_video(folder_old_path, folder_new_path, file_name, naming_rule)
-        await move_other_file(res.number, folder_old_path, folder_new_path, file_name, naming_rule)
-
-        # 移动文件
-        if not await move_movie(other, file_info, file_path, file_new_path):
-            return None, None
-        await save_success_list(file_path, file_new_path)  # 保存成功列表
+            # 移动文件
+            if not await move_movie(other, file_info, file_path, file_new_path):
+                return None, None
+            await save_success_list(file_path, file_new_path)  # 保存成功列表
 
         # 创建软链接及复制文件
         if manager.config.auto_link:
@@ -781,14 +932,26 @@ class Scraper:
         signal.logs_failed_show.emit(info_str)
 
 
-def start_new_scrape(file_mode: FileMode, movie_list: list[Path] | None = None) -> None:
+def start_new_scrape(
+    file_mode: FileMode,
+    movie_list: list[Path] | None = None,
+    resume_scan: tuple[Path, Path] | None = None,
+    refresh_cache: bool = False,
+) -> None:
+    """
+    Args:
+        refresh_cache: 本次刮削忽略已有网页缓存, 重新请求并更新缓存
+    """
+    Flags.web_cache_refresh = refresh_cache
     signal.change_buttons_status.emit()
     signal.exec_set_processbar.emit(0)
     try:
         Flags.start_time = time.time()
-        crawler_provider = CrawlerProvider(manager.config, manager.computed.async_client)
+        crawler_provider = CrawlerProvider(
+            manager.config, manager.computed.async_client, manager.computed.parse_executor
+        )
         scraper = Scraper(crawler_provider)
-        executor.submit(scraper.run(file_mode, movie_list))
+        executor.submit(scraper.run(file_mode, movie_list, resume_scan))
     except Exception:
         signal.show_traceback_log(traceback.format_exc())
         signal.show_log_text(traceback.format_exc())
@@ -799,10 +962,14 @@ def get_remain_list() -> bool:
     remain_list_path = resources.u("remain.txt")
     if not remain_list_path.is_file():
         return False
-    remains = remain_list_path.read_text(encoding="utf-8").strip()
-    remains = [p for path in remains.split("\n") if path.strip() and (p := Path(path.strip())).suffix]
+    lines = remain_list_path.read_text(encoding="utf-8").strip().split("\n")
+    resume_scan = None
+    if lines[0].startswith(SCAN_POSITION_PREFIX):  # 上次遍历未完成
+        root, _, after = lines.pop(0).removeprefix(SCAN_POSITION_PREFIX).partition("\t")
+        resume_scan = (Path(root), Path(after))
+    remains = [p for path in lines if path.strip() and (p := Path(path.strip())).suffix]
     Flags.remain_list = remains
-    if not len(Flags.remain_list) or Switch.REMAIN_TASK not in manager.config.switch_on:
+    if not (Flags.remain_list or resume_scan) or Switch.REMAIN_TASK not in manager.config.switch_on:
         return False
     box = QMessageBox(QMessageBox.Information, "继续刮削", "上次刮削未完成，是否继续刮削剩余任务？")
     box.setStandardButtons(QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
@@ -821,7 +988,7 @@ def get_remain_list() -> bool:
         movie_path = manager.data_folder
     movie_path = Path(movie_path)
 
-    p = Flags.remain_list[0]
+    p = Flags.remain_list[0] if Flags.remain_list else resume_scan[1]
     if not is_descendant(p, movie_path):
         box = QMessageBox(
             QMessageBox.Warning,
@@ -838,7 +1005,7 @@ def get_remain_list() -> bool:
         if reply == QMessageBox.No:
             return True
     signal.show_log_text(f"🍯 🍯 🍯 NOTE: 继续刮削未完成任务！！！ 剩余未刮削文件数量（{len(Flags.remain_list)})")
-    start_new_scrape(FileMode.Default, Flags.remain_list)
+    start_new_scrape(FileMode.Default, Flags.remain_list, resume_scan)
     return True
 
 
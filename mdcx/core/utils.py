@@ -1,4 +1,3 @@
-import asyncio
 import os
 import re
 from pathlib import Path
@@ -16,7 +15,7 @@ from ..models.types import BaseCrawlerResult, CrawlersResult, FileInfo
 from ..number import get_number_first_letter, get_number_letters
 from ..signals import signal
 from ..utils import get_new_release, get_used_time, split_path
-from ..utils.video import get_video_metadata
+from ..utils.video_pool import video_prober
 
 
 def replace_word(json_data: BaseCrawlerResult):
@@ -170,7 +169,7 @@ async def get_video_size(file_path: Path):
     codec = ""
     if hd_get == "video":
         try:
-            height, codec = await asyncio.to_thread(get_video_metadata, file_path)
+            height, codec = await video_prober.probe(file_path)
         except Exception as e:
             signal.show_log_text(f" 🔴 无法获取视频分辨率! 文件地址: {file_path}  错误信息: {e}")
     elif hd_get == "path":
@@ -3,12 +3,15 @@
 """
 
 import asyncio
+import copy
 import re
 import shutil
 import time
 import urllib.parse
 from asyncio import to_thread
+from collections.abc import Coroutine
 from pathlib import Path
+from typing import Any
 
 import aiofiles
 import aiofiles.os
@@ -21,7 +24,10 @@ from ..base.web import (
     get_amazon_data,
     get_big_pic_by_google,
     get_dmm_trailer,
+    get_image,
     get_imgsize,
+    get_imgsizes,
+    save_image,
 )
 from ..config.enums import DownloadableFile, HDPicSource
 from ..config.manager import manager
@@ -30,7 +36,9 @@ from ..models.log_buffer import LogBuffer
 from ..models.types import CrawlersResult, OtherInfo
 from ..signals import signal
 from ..utils import convert_half, get_used_time, split_path
-from ..utils.file import check_pic_async, copy_file_async, delete_file_async, move_file_async
+from ..utils.file import copy_file_async, delete_file_async, move_file_async
+from ..web_download import cleanup_partial
+from ..web_scheduler import DownloadPriority
 from .image import cut_thumb_to_poster
 
 
@@ -150,8 +158,8 @@ async def get_big_pic_by_amazon(result: CrawlersResult, originaltitle_amazon: st
             # 命中演员有多个结果时返回最大的（不等于1759/1758）
             if len(actor_result_list):
                 pic_w = 0
-                for each in actor_result_list:
-                    new_pic_w, _ = await get_imgsize(each)
+                sizes = await get_imgsizes(actor_result_list)  # 并发获取所有候选图的尺寸
+                for each, (new_pic_w, _) in zip(actor_result_list, sizes, strict=True):
                     if new_pic_w > pic_w:
                         if new_pic_w >= 1770 or (1750 > new_pic_w > 600):  # 不要小图 FCDSS-001，截短的图（1758/1759）
                             pic_w = new_pic_w
@@ -261,7 +269,7 @@ async def trailer_download(
     # 选择保留文件，当存在文件时，不下载。（done trailer path 未设置时，把当前文件设置为 done trailer path，以便其他分集复制）
     if DownloadableFile.TRAILER in keep_files and await aiofiles.os.path.exists(trailer_file_path):
         if not Flags.file_done_dic.get(result.number, {}).get("trailer"):
-            Flags.file_done_dic[result.number].update({"trailer": trailer_file_path})
+            Flags.file_done(result.number).update({"trailer": trailer_file_path})
             # 带文件名时，删除掉新、旧文件夹，用不到了。（其他分集如果没有，可以复制第一个文件的预告片。此时不删，没机会删除了）
             if not trailer_name:
                 if await aiofiles.os.path.exists(trailer_old_folder_path):
@@ -300,7 +308,14 @@ async def trailer_download(
         trailer_file_path_temp = trailer_file_path
         if await aiofiles.os.path.exists(trailer_file_path):
             trailer_file_path_temp = trailer_file_path.with_suffix(".[DOWNLOAD].mp4")
-        if await download_file_with_filepath(trailer_url, trailer_file_path_temp, trailer_folder_path):
+        if await download_file_with_filepath(
+            trailer_url,
+            trailer_file_path_temp,
+            trailer_folder_path,
+            file_size=content_length,
+            priority=DownloadPriority.TRAILER,
+            group=str(folder_new),
+        ):
             file_size = await aiofiles.os.path.getsize(trailer_file_path_temp)
             if file_size >= content_length or DownloadableFile.IGNORE_SIZE in download_files:
                 LogBuffer.log().write(
@@ -312,7 +327,7 @@ async def trailer_download(
                     await delete_file_async(trailer_file_path_temp)
                 done_trailer_path = Flags.file_done_dic.get(result.number, {}).get("trailer")
                 if not done_trailer_path:
-                    Flags.file_done_dic[result.number].update({"trailer": trailer_file_path})
+                    Flags.file_done(result.number).update({"trailer": trailer_file_path})
                     if trailer_name == 0:  # 带文件名，已下载成功，删除掉那些不用的文件夹即可
                         if await aiofiles.os.path.exists(trailer_old_folder_path):
                             await to_thread(shutil.rmtree, trailer_old_folder_path, ignore_errors=True)
@@ -326,14 +341,15 @@ async def trailer_download(
                     f"\n 🟠 Trailer size is incorrect! delete it! ({result.trailer_from} {file_size}/{content_length}) "
                 )
 
-        # 删除下载失败的文件
+        # 删除下载失败的文件, 包括分块下载的临时文件及进度
         await delete_file_async(trailer_file_path_temp)
+        await to_thread(cleanup_partial, trailer_file_path_temp)
         LogBuffer.log().write(f"\n 🟠 Trailer download failed! ({trailer_url}) ")
 
     if await aiofiles.os.path.exists(trailer_file_path):  # 使用旧文件
         done_trailer_path = Flags.file_done_dic.get(result.number, {}).get("trailer")
         if not done_trailer_path:
-            Flags.file_done_dic[result.number].update({"trailer": trailer_file_path})
+            Flags.file_done(result.number).update({"trailer": trailer_file_path})
             if trailer_name == 0:  # 带文件名，已下载成功，删除掉那些不用的文件夹即可
                 if await aiofiles.os.path.exists(trailer_old_folder_path):
                     await to_thread(shutil.rmtree, trailer_old_folder_path, ignore_errors=True)
@@ -346,6 +362,32 @@ async def trailer_download(
         return True
 
 
+def _cancel(*tasks: asyncio.Task | None):
+    """取消不再需要的预先查询. 已结束的任务取出其异常, 避免未处理异常的警告"""
+    for task in tasks:
+        if task is None:
+            continue
+        if task.done():
+            if not task.cancelled():
+                task.exception()
+        else:
+            task.cancel()
+
+
+async def _hd_search(search: Coroutine[Any, Any, Any], result: CrawlersResult, other: OtherInfo, name: str):
+    """在时间预算内执行高清图搜索. 超时时放弃本次搜索对 result 及 other 的所有修改, 使用普通图片"""
+    budget = manager.config.hd_pic_timeout
+    saved = copy.copy(result), copy.copy(other)
+    saved[0].field_sources = dict(result.field_sources)  # poster_from 等来源保存在此字典中
+    try:
+        async with asyncio.timeout(budget or None):
+            await search
+    except TimeoutError:
+        result.__dict__.update(saved[0].__dict__)
+        other.__dict__.update(saved[1].__dict__)
+        LogBuffer.log().write(f"\n 🟠 HD {name} search timeout! ({budget}s)")
+
+
 async def _get_big_thumb(result: CrawlersResult, other: OtherInfo):
     """
     获取背景大图：
@@ -353,101 +395,144 @@ async def _get_big_thumb(result: CrawlersResult, other: OtherInfo):
     2，Amazon 图片
     3，Google 搜图
     """
-    start_time = time.time()
     if "thumb" not in manager.config.download_hd_pics:
         return
-    number = result.number
-    letters = result.letters
-    number_lower_line = number.lower()
-    number_lower_no_line = number_lower_line.replace("-", "")
-    thumb_width = 0
-
-    # faleno.jp 番号检查，都是大图，返回即可
-    if result.thumb_from in ["faleno", "dahlia"]:
-        if result.thumb:
-            LogBuffer.log().write(f"\n 🖼 HD Thumb found! ({result.thumb_from})({get_used_time(start_time)}s)")
-        other.poster_big = True
-        return result
+    await _hd_search(_search_big_thumb(result, other), result, other, "Thumb")
 
-    # prestige 图片有的是大图，需要检测图片分辨率
-    elif result.thumb_from in ["prestige", "mgstage"]:
-        if result.thumb:
-            thumb_width, h = await get_imgsize(result.thumb)
-
-    # 片商官网查询
-    elif HDPicSource.OFFICIAL in manager.config.download_hd_pics:
-        # faleno.jp 番号检查
-        if re.findall(r"F[A-Z]{2}SS", number):
-            req_url = f"https://faleno.jp/top/works/{number_lower_no_line}/"
-            response, error = await manager.computed.async_client.get_text(req_url)
-            if response is not None:
-                temp_url = re.findall(
-                    r'src="((https://cdn.faleno.net/top/wp-content/uploads/[^_]+_)([^?]+))\?output-quality=', response
-                )
-                if temp_url:
-                    result.thumb = temp_url[0][0]
-                    result.poster = temp_url[0][1] + "2125.jpg"
-                    result.thumb_from = "faleno"
-                    result.poster_from = "faleno"
-                    other.poster_big = True
-                    trailer_temp = re.findall(r'class="btn09"><a class="pop_sample" href="([^"]+)', response)
-                    if trailer_temp:
-                        result.trailer = trailer_temp[0]
-                        result.trailer_from = "faleno"
-                    LogBuffer.log().write(f"\n 🖼 HD Thumb found! (faleno)({get_used_time(start_time)}s)")
-                    return result
 
-        # km-produce.com 番号检查
-        number_letter = letters.lower()
-        kmp_key = ["vrkm", "mdtm", "mkmp", "savr", "bibivr", "scvr", "slvr", "averv", "kbvr", "cbikmv"]
-        prestige_key = ["abp", "abw", "aka", "prdvr", "pvrbst", "sdvr", "docvr"]
-        if number_letter in kmp_key:
-            req_url = f"https://km-produce.com/img/title1/{number_lower_line}.jpg"
-            real_url = await check_url(req_url)
-            if real_url:
-                result.thumb = real_url
-                result.thumb_from = "km-produce"
-                LogBuffer.log().write(f"\n 🖼 HD Thumb found! (km-produce)({get_used_time(start_time)}s)")
-                return result
-
-        # www.prestige-av.com 番号检查
-        elif number_letter in prestige_key:
-            number_num = re.findall(r"\d+", number)[0]
-            if number_letter == "abw" and int(number_num) > 280:
-                pass
-            else:
-                req_url = f"https://www.prestige-av.com/api/media/goods/prestige/{number_letter}/{number_num}/pb_{number_lower_line}.jpg"
-                if number_letter == "docvr":
-                    req_url = f"https://www.prestige-av.com/api/media/goods/doc/{number_letter}/{number_num}/pb_{number_lower_line}.jpg"
-                if (await get_imgsize(req_url))[0] >= 800:
-                    result.thumb = req_url
-                    result.poster = req_url.replace("/pb_", "/pf_")
-                    result.thumb_from = "prestige"
-                    result.poster_from = "prestige"
-                    other.poster_big = True
-                    LogBuffer.log().write(f"\n 🖼 HD Thumb found! (prestige)({get_used_time(start_time)}s)")
+async def _search_big_thumb(result: CrawlersResult, other: OtherInfo):
+    start_time = time.time()
+    # 官网未找到大图时才使用 Google 搜图. 开启提前搜图时与官网查询同时进行, 官网找到大图时取消
+    google_url = ""
+    google = None
+    if (
+        HDPicSource.GOOGLE in manager.config.download_hd_pics
+        and result.thumb
+        and result.thumb_from not in ["theporndb", "faleno", "dahlia"]
+    ):
+        google_url = result.thumb
+        if manager.config.hd_pic_google_prefetch:
+            google = asyncio.create_task(get_big_pic_by_google(google_url))
+    try:
+        number = result.number
+        letters = result.letters
+        number_lower_line = number.lower()
+        number_lower_no_line = number_lower_line.replace("-", "")
+        thumb_width = 0
+
+        # faleno.jp 番号检查，都是大图，返回即可
+        if result.thumb_from in ["faleno", "dahlia"]:
+            if result.thumb:
+                LogBuffer.log().write(f"\n 🖼 HD Thumb found! ({result.thumb_from})({get_used_time(start_time)}s)")
+            other.poster_big = True
+            return result
+
+        # prestige 图片有的是大图，需要检测图片分辨率
+        elif result.thumb_from in ["prestige", "mgstage"]:
+            if result.thumb:
+                thumb_width, h = await get_imgsize(result.thumb)
+
+        # 片商官网查询
+        elif HDPicSource.OFFICIAL in manager.config.download_hd_pics:
+            # faleno.jp 番号检查
+            if re.findall(r"F[A-Z]{2}SS", number):
+                req_url = f"https://faleno.jp/top/works/{number_lower_no_line}/"
+                response, error = await manager.computed.async_client.get_text(req_url)
+                if response is not None:
+                    temp_url = re.findall(
+                        r'src="((https://cdn.faleno.net/top/wp-content/uploads/[^_]+_)([^?]+))\?output-quality=',
+                        response,
+                    )
+                    if temp_url:
+                        result.thumb = temp_url[0][0]
+                        result.poster = temp_url[0][1] + "2125.jpg"
+                        result.thumb_from = "faleno"
+                        result.poster_from = "faleno"
+                        other.poster_big = True
+                        trailer_temp = re.findall(r'class="btn09"><a class="pop_sample" href="([^"]+)', response)
+                        if trailer_temp:
+                            result.trailer = trailer_temp[0]
+                            result.trailer_from = "faleno"
+                        LogBuffer.log().write(f"\n 🖼 HD Thumb found! (faleno)({get_used_time(start_time)}s)")
+                        return result
+
+            # km-produce.com 番号检查
+            number_letter = letters.lower()
+            kmp_key = ["vrkm", "mdtm", "mkmp", "savr", "bibivr", "scvr", "slvr", "averv", "kbvr", "cbikmv"]
+            prestige_key = ["abp", "abw", "aka", "prdvr", "pvrbst", "sdvr", "docvr"]
+            if number_letter in kmp_key:
+                req_url = f"https://km-produce.com/img/title1/{number_lower_line}.jpg"
+                real_url = await check_url(req_url)
+                if real_url:
+                    result.thumb = real_url
+                    result.thumb_from = "km-produce"
+                    LogBuffer.log().write(f"\n 🖼 HD Thumb found! (km-produce)({get_used_time(start_time)}s)")
                     return result
 
-    # 使用google以图搜图
-    pic_url = result.thumb
-    if HDPicSource.GOOGLE in manager.config.download_hd_pics and pic_url and result.thumb_from != "theporndb":
-        thumb_url, cover_size = await get_big_pic_by_google(pic_url)
-        if thumb_url and cover_size[0] > thumb_width:
-            other.thumb_size = cover_size
-            pic_domain = re.findall(r"://([^/]+)", thumb_url)[0]
-            result.thumb_from = f"Google({pic_domain})"
-            result.thumb = thumb_url
-            LogBuffer.log().write(f"\n 🖼 HD Thumb found! ({result.thumb_from})({get_used_time(start_time)}s)")
+            # www.prestige-av.com 番号检查
+            elif number_letter in prestige_key:
+                number_num = re.findall(r"\d+", number)[0]
+                if number_letter == "abw" and int(number_num) > 280:
+                    pass
+                else:
+                    req_url = f"https://www.prestige-av.com/api/media/goods/prestige/{number_letter}/{number_num}/pb_{number_lower_line}.jpg"
+                    if number_letter == "docvr":
+                        req_url = f"https://www.prestige-av.com/api/media/goods/doc/{number_letter}/{number_num}/pb_{number_lower_line}.jpg"
+                    if (await get_imgsize(req_url))[0] >= 800:
+                        result.thumb = req_url
+                        result.poster = req_url.replace("/pb_", "/pf_")
+                        result.thumb_from = "prestige"
+                        result.poster_from = "prestige"
+                        other.poster_big = True
+                        LogBuffer.log().write(f"\n 🖼 HD Thumb found! (prestige)({get_used_time(start_time)}s)")
+                        return result
+
+        # 使用google以图搜图
+        if google_url:
+            if google is None:
+                google = asyncio.create_task(get_big_pic_by_google(google_url))
+            thumb_url, cover_size = await google
+            if thumb_url and cover_size[0] > thumb_width:
+                other.thumb_size = cover_size
+                pic_domain = re.findall(r"://([^/]+)", thumb_url)[0]
+                result.thumb_from = f"Google({pic_domain})"
+                result.thumb = thumb_url
+                LogBuffer.log().write(f"\n 🖼 HD Thumb found! ({result.thumb_from})({get_used_time(start_time)}s)")
 
-    return result
+        return result
+    finally:
+        _cancel(google)
 
 
-async def _get_big_poster(result: CrawlersResult, other: OtherInfo):
-    start_time = time.time()
+async def _get_official_poster(official_url: str, number: str) -> tuple[str, bool]:
+    """
+    通过番号去官网查询稍微大一些的封面图, 以便去 Google 搜索.
 
+    Returns:
+        (封面图链接, 是否直接下载该图)
+    """
+    url_search = official_url + "/search/list?keyword=" + number.replace("-", "")
+    html_search, error = await manager.computed.async_client.get_text(url_search)
+    if html_search is None:
+        return "", False
+    poster_url_list = re.findall(r'img class="c-main-bg lazyload" data-src="([^"]+)"', html_search)
+    if not poster_url_list:
+        return "", False
+    # vr作品或者官网图片高度大于500时，下载封面图开
+    poster_url = poster_url_list[0]
+    return poster_url, "VR" in number.upper() or (await get_imgsize(poster_url))[1] > 500
+
+
+async def _get_big_poster(result: CrawlersResult, other: OtherInfo):
     # 未勾选下载高清图poster时，返回
     if "poster" not in manager.config.download_hd_pics:
         return
+    await _hd_search(_search_big_poster(result, other), result, other, "Poster")
+
+
+async def _search_big_poster(result: CrawlersResult, other: OtherInfo):
+    start_time = time.time()
+    download_hd_pics = manager.config.download_hd_pics
 
     # 如果有大图时，直接下载
     if other.poster_big and (await get_imgsize(result.poster))[1] > 600:
@@ -457,64 +542,81 @@ async def _get_big_poster(result: CrawlersResult, other: OtherInfo):
 
     # 初始化数据
     number = result.number
-    poster_url = result.poster
     hd_pic_url = ""
     poster_width = 0
 
-    # 通过原标题去 amazon 查询
-    if HDPicSource.AMAZON in manager.config.download_hd_pics and result.mosaic in [
-        "有码",
-        "有碼",
-        "流出",
-        "无码破解",
-        "無碼破解",
-        "里番",
-        "裏番",
-        "动漫",
-        "動漫",
-    ]:
-        hd_pic_url = await get_big_pic_by_amazon(result, result.originaltitle_amazon, result.actor_amazon)
-        if hd_pic_url:
-            result.poster = hd_pic_url
-            result.poster_from = "Amazon"
-        if result.poster_from == "Amazon":
-            result.image_download = True
-
-    # 通过番号去 官网 查询获取稍微大一些的封面图，以便去 Google 搜索
-    if not hd_pic_url and HDPicSource.OFFICIAL in manager.config.download_hd_pics and result.poster_from != "Amazon":
-        letters = result.letters.upper()
-        official_url = manager.computed.official_websites.get(letters)
+    # 官网与 Amazon 同时开始查询, 仍按 Amazon > 官网 > Google 的顺序采用结果, 不需要的查询将被取消.
+    # Google 仅在 Amazon 未找到大图时使用. 开启提前搜图时 Google 使用当前的 poster 同时开始搜索,
+    # 若 Amazon 或官网替换了 poster, 则用新的 poster 重新搜索
+    official_url = ""
+    official = None
+    if HDPicSource.OFFICIAL in download_hd_pics:
+        official_url = manager.computed.official_websites.get(result.letters.upper(), "")
         if official_url:
-            url_search = official_url + "/search/list?keyword=" + number.replace("-", "")
-            html_search, error = await manager.computed.async_client.get_text(url_search)
-            if html_search is not None:
-                poster_url_list = re.findall(r'img class="c-main-bg lazyload" data-src="([^"]+)"', html_search)
-                if poster_url_list:
-                    # 使用官网图作为封面去 google 搜索
-                    poster_url = poster_url_list[0]
-                    result.poster = poster_url
-                    result.poster_from = official_url.split(".")[-2].replace("https://", "")
-                    # vr作品或者官网图片高度大于500时，下载封面图开
-                    if "VR" in number.upper() or (await get_imgsize(poster_url))[1] > 500:
-                        result.image_download = True
-
-    # 使用google以图搜图，放在最后是因为有时有错误，比如 kawd-943
-    poster_url = result.poster
+            official = asyncio.create_task(_get_official_poster(official_url, number))
+    google_url = ""
+    google = None
     if (
-        not hd_pic_url
-        and poster_url
-        and HDPicSource.GOOGLE in manager.config.download_hd_pics
+        manager.config.hd_pic_google_prefetch
+        and HDPicSource.GOOGLE in download_hd_pics
+        and result.poster
         and result.poster_from != "theporndb"
     ):
-        hd_pic_url, poster_size = await get_big_pic_by_google(poster_url, poster=True)
-        if hd_pic_url:
-            if "prestige" in result.poster or result.poster_from == "Amazon":
-                poster_width, _ = await get_imgsize(poster_url)
-            if poster_size[0] > poster_width:
+        google_url = result.poster
+        google = asyncio.create_task(get_big_pic_by_google(google_url, poster=True))
+
+    try:
+        # 通过原标题去 amazon 查询
+        if HDPicSource.AMAZON in download_hd_pics and result.mosaic in [
+            "有码",
+            "有碼",
+            "流出",
+            "无码破解",
+            "無碼破解",
+            "里番",
+            "裏番",
+            "动漫",
+            "動漫",
+        ]:
+            hd_pic_url = await get_big_pic_by_amazon(result, result.originaltitle_amazon, result.actor_amazon)
+            if hd_pic_url:
                 result.poster = hd_pic_url
-                other.poster_size = poster_size
-                pic_domain = re.findall(r"://([^/]+)", hd_pic_url)[0]
-                result.poster_from = f"Google({pic_domain})"
+                result.poster_from = "Amazon"
+            if result.poster_from == "Amazon":
+                result.image_download = True
+
+        # 通过番号去 官网 查询获取稍微大一些的封面图，以便去 Google 搜索
+        if not hd_pic_url and official is not None and result.poster_from != "Amazon":
+            official_poster, big = await official
+            if official_poster:
+                # 使用官网图作为封面去 google 搜索
+                result.poster = official_poster
+                result.poster_from = official_url.split(".")[-2].replace("https://", "")
+                if big:
+                    result.image_download = True
+
+        # 使用google以图搜图，放在最后是因为有时有错误，比如 kawd-943
+        poster_url = result.poster
+        if (
+            not hd_pic_url
+            and poster_url
+            and HDPicSource.GOOGLE in download_hd_pics
+            and result.poster_from != "theporndb"
+        ):
+            if google is None or poster_url != google_url:
+                _cancel(google)
+                google = asyncio.create_task(get_big_pic_by_google(poster_url, poster=True))
+            hd_pic_url, poster_size = await google
+            if hd_pic_url:
+                if "prestige" in result.poster or result.poster_from == "Amazon":
+                    poster_width, _ = await get_imgsize(poster_url)
+                if poster_size[0] > poster_width:
+                    result.poster = hd_pic_url
+                    other.poster_size = poster_size
+                    pic_domain = re.findall(r"://([^/]+)", hd_pic_url)[0]
+                    result.poster_from = f"Google({pic_domain})"
+    finally:
+        _cancel(official, google)
 
     # 如果找到了高清链接，则替换
     if hd_pic_url:
@@ -579,9 +681,6 @@ async def thumb_download(
             cover_list.remove((cover_from, cover_url))
         cover_list.insert(0, (cover_from, cover_url))
 
-        thumb_final_path_temp = thumb_final_path
-        if await aiofiles.os.path.exists(thumb_final_path):
-            thumb_final_path_temp = thumb_final_path.with_suffix(".[DOWNLOAD].jpg")
         for each in cover_list:
             if not each[1]:
                 continue
@@ -592,34 +691,30 @@ async def thumb_download(
                 )
                 continue
             result.thumb_from = cover_from
-            if await download_file_with_filepath(cover_url, thumb_final_path_temp, folder_new_path):
-                cover_size = await check_pic_async(thumb_final_path_temp)
-                if cover_size:
-                    if (
-                        not cover_from.startswith("Google")
-                        or cover_size == other.thumb_size
-                        or (
-                            cover_size[0] >= 800
-                            and abs(cover_size[0] / cover_size[1] - other.thumb_size[0] / other.thumb_size[1]) <= 0.1
-                        )
-                    ):
-                        # 图片下载正常，替换旧的 thumb.jpg
-                        if thumb_final_path_temp != thumb_final_path:
-                            await move_file_async(thumb_final_path_temp, thumb_final_path)
-                            await delete_file_async(thumb_final_path_temp)
+            # 下载到内存并检查, 通过后才写入, 不会覆盖已有的 thumb.jpg
+            if image := await get_image(cover_url, thumb_final_path, group=str(folder_new_path)):
+                content, cover_size = image
+                if (
+                    not cover_from.startswith("Google")
+                    or cover_size == other.thumb_size
+                    or (
+                        cover_size[0] >= 800
+                        and abs(cover_size[0] / cover_size[1] - other.thumb_size[0] / other.thumb_size[1]) <= 0.1
+                    )
+                ):
+                    if await save_image(content, thumb_final_path, folder_new_path):
                         if cd_part:
                             Flags.file_done_dic[result.number].update({"thumb": thumb_final_path})
                         other.thumb_marked = False  # 表示还没有走加水印流程
                         LogBuffer.log().write(f"\n 🍀 Thumb done! ({result.thumb_from})({get_used_time(start_time)}s) ")
                         other.thumb_path = thumb_final_path
                         return True
-                    else:
-                        await delete_file_async(thumb_final_path_temp)
-                        LogBuffer.log().write(
-                            f"\n 🟠 检测到 Thumb 分辨率不对{str(cover_size)}! 已删除 ({cover_from})({get_used_time(start_time)}s)"
-                        )
-                        continue
-                LogBuffer.log().write(f"\n 🟠 Thumb download failed! {cover_from}: {cover_url} ")
+                else:
+                    LogBuffer.log().write(
+                        f"\n 🟠 检测到 Thumb 分辨率不对{str(cover_size)}! 已跳过 ({cover_from})({get_used_time(start_time)}s)"
+                    )
+                    continue
+            LogBuffer.log().write(f"\n 🟠 Thumb download failed! {cover_from}: {cover_url} ")
     else:
         LogBuffer.log().write("\n 🟠 Thumb url is empty! ")
 
@@ -721,31 +816,24 @@ async def poster_download(
     # 下载图片
     poster_url = result.poster
     poster_from = result.poster_from
-    poster_final_path_temp = poster_final_path
-    if await aiofiles.os.path.exists(poster_final_path):
-        poster_final_path_temp = poster_final_path.with_suffix(".[DOWNLOAD].jpg")
     if result.image_download:
         start_time = time.time()
-        if await download_file_with_filepath(poster_url, poster_final_path_temp, folder_new_path):
-            poster_size = await check_pic_async(poster_final_path_temp)
-            if poster_size:
-                if (
-                    not poster_from.startswith("Google")
-                    or poster_size == other.poster_size
-                    or "media-amazon.com" in poster_url
-                ):
-                    if poster_final_path_temp != poster_final_path:
-                        await move_file_async(poster_final_path_temp, poster_final_path)
-                        await delete_file_async(poster_final_path_temp)
+        if image := await get_image(poster_url, poster_final_path, group=str(folder_new_path)):
+            content, poster_size = image
+            if (
+                not poster_from.startswith("Google")
+                or poster_size == other.poster_size
+                or "media-amazon.com" in poster_url
+            ):
+                if await save_image(content, poster_final_path, folder_new_path):
                     if cd_part:
                         Flags.file_done_dic[result.number].update({"poster": poster_final_path})
                     other.poster_marked = False  # 下载的图，还没加水印
                     other.poster_path = poster_final_path
                     LogBuffer.log().write(f"\n 🍀 Poster done! ({poster_from})({get_used_time(start_time)}s)")
                     return True
-                else:
-                    await delete_file_async(poster_final_path_temp)
-                    LogBuffer.log().write(f"\n 🟠 检测到 Poster 分辨率不对{str(poster_size)}! 已删除 ({poster_from})")
+            else:
+                LogBuffer.log().write(f"\n 🟠 检测到 Poster 分辨率不对{str(poster_size)}! 已跳过 ({poster_from})")
 
     # 判断之前有没有 poster 和 thumb
     if not poster_path and not thumb_path:
@@ -767,9 +855,7 @@ async def poster_download(
     poster_final_path_temp = poster_final_path.with_suffix(".[CUT].jpg")
     if fanart_path:
         thumb_path = fanart_path
-    if thumb_path and await asyncio.to_thread(
-        cut_thumb_to_poster, result, thumb_path, poster_final_path_temp, image_cut
-    ):
+    if thumb_path and await cut_thumb_to_poster(result, thumb_path, poster_final_path_temp, image_cut):
         # 裁剪成功，替换旧图
         await move_file_async(poster_final_path_temp, poster_final_path)
         if cd_part:
@@ -917,8 +1003,8 @@ async def extrafanart_download(extrafanart: list[str], extrafanart_from: str, fo
             extrafanart_file_path = extrafanart_folder_path_temp / extrafanart_name
             task_list.append((extrafanart_url, extrafanart_file_path, extrafanart_folder_path_temp, extrafanart_name))
 
-        # 使用异步并发执行下载任务
-        tasks = [download_extrafanart_task(task) for task in task_list]
+        # 使用异步并发执行下载任务, 并发数由下载调度器限制
+        tasks = [download_extrafanart_task(task, str(folder_new_path)) for task in task_list]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
         for res in results:
@@ -9,6 +9,7 @@ if TYPE_CHECKING:
     from .config.models import Config
     from .crawlers.base import GenericBaseCrawler
     from .crawlers.base.compat import LegacyCrawler
+    from .utils.parse_executor import ParseExecutor
     from .web_async import AsyncWebClient
 
 
@@ -18,10 +19,11 @@ class CrawlerProviderProtocol(Protocol):
 
 
 class CrawlerProvider:
-    def __init__(self, config: "Config", client: "AsyncWebClient"):
+    def __init__(self, config: "Config", client: "AsyncWebClient", parse_executor: "ParseExecutor | None" = None):
         self.instances: dict[Website, GenericBaseCrawler[Never] | LegacyCrawler] = {}
         self.config = config
         self.client = client
+        self.parse_executor = parse_executor
         self.browser_provider = BrowserProvider(config)
         self.browser = None
         self.lock = asyncio.Lock()
@@ -39,6 +41,7 @@ class CrawlerProvider:
                     client=self.client,
                     base_url=self.config.get_site_url(site),
                     browser=self.browser,
+                    parse_executor=self.parse_executor,
                 )
         return self.instances[site]
 
@@ -11,8 +11,9 @@ from patchright.async_api import Browser, BrowserContext
 
 from mdcx.config.models import Website
 from mdcx.models.types import CrawlerInput, CrawlerResponse, CrawlerResult
+from mdcx.utils.parse_executor import ParseExecutor, default_parse_executor
 
-from .types import Context, CralwerException, CrawlerData
+from .types import Context, CralwerException, CrawlerData, is_valid
 
 if TYPE_CHECKING:
     from mdcx.web_async import AsyncWebClient
@@ -30,7 +31,13 @@ class GenericBaseCrawler[T: Context = Context](ABC):
     由于爬取逻辑因网站而异, 在最极端情况下可以重写 `_run` 方法以完全自定义爬取流程.
     """
 
-    def __init__(self, client: "AsyncWebClient", base_url: str = "", browser: Browser | None = None):
+    def __init__(
+        self,
+        client: "AsyncWebClient",
+        base_url: str = "",
+        browser: Browser | None = None,
+        parse_executor: ParseExecutor | None = None,
+    ):
         """
         初始化爬虫实例.
 
@@ -38,8 +45,10 @@ class GenericBaseCrawler[T: Context = Context](ABC):
             client (AsyncWebClient): 异步 HTTP 客户端, 用于发送请求.
             base_url (str, optional): 基础 URL, 用于支持自定义 URL. 不提供则使用默认值.
             browser (_type_, optional): 浏览器实例, 如果提供则某些请求可以改用浏览器进行处理.
+            parse_executor (ParseExecutor, optional): HTML 解析执行器. 不提供则使用默认的线程池.
         """
         self.async_client = client
+        self.parse_executor = parse_executor or default_parse_executor
         self.base_url: str = base_url or self.base_url_()
         self.lock = Lock()
         self.browser = browser
@@ -119,9 +128,10 @@ class GenericBaseCrawler[T: Context = Context](ABC):
                 ctx.debug(f"搜索页请求失败: {error=}")
                 continue
             ctx.debug(f"搜索页请求成功: {search_url=}")
-            selector = Selector(text=html)
+            selector = await self.parse_executor.selector(html)
             detail_urls = await self._parse_search_page(ctx, selector, search_url)
             if detail_urls:
+                await self._commit_cache(ctx, search_url)
                 ctx.debug(f"详情页 URL: {detail_urls}")
                 return detail_urls if isinstance(detail_urls, list) else [detail_urls]
 
@@ -132,12 +142,22 @@ class GenericBaseCrawler[T: Context = Context](ABC):
                 ctx.debug(f"详情页请求失败: {error=}")
                 continue
             ctx.debug(f"详情页请求成功: {detail_url=}")
-            selector = Selector(text=html)
-            scraped_data = await self._parse_detail_page(ctx, selector, detail_url)
+            scraped_data = await self._parse_detail_html(ctx, html, detail_url)
+            if scraped_data and is_valid(scraped_data.title):
+                await self._commit_cache(ctx, detail_url)
             if scraped_data and not scraped_data.external_id:
                 scraped_data.external_id = detail_url
             return scraped_data
 
+    async def _parse_detail_html(self, ctx: T, html: str, detail_url: str) -> CrawlerData | None:
+        """
+        解析详情页 HTML. 默认在解析执行器中构造 `Selector` 后调用 `_parse_detail_page`.
+
+        使用 `DetailPageParser` 的爬虫可重写此方法并调用 `DetailPageParser.parse_html`, 使字段提取也在执行器中完成.
+        """
+        selector = await self.parse_executor.selector(html)
+        return await self._parse_detail_page(ctx, selector, detail_url)
+
     @abstractmethod
     async def _generate_search_url(self, ctx: T) -> list[str] | str | None:
         """
@@ -187,23 +207,38 @@ class GenericBaseCrawler[T: Context = Context](ABC):
     async def _fetch_search(self, ctx: T, url: str, use_browser: bool | None = False) -> tuple[str | None, str]:
         """
         获取搜索页. 此方法不应抛出异常.
+
+        搜索结果会随新作品发布变化, 缓存使用较短的搜索页有效期. 解析到详情页 URL 后才写入缓存.
         """
-        return await self._fetch(ctx, url, use_browser)
+        return await self._fetch(ctx, url, use_browser, search=True)
 
     async def _fetch_detail(self, ctx: T, url: str, use_browser: bool | None = False) -> tuple[str | None, str]:
         """
         获取详情页. 此方法不应抛出异常.
+
+        响应在成功解析后才写入缓存, 见 `_commit_cache`.
         """
         return await self._fetch(ctx, url, use_browser)
 
-    async def _fetch(self, ctx: T, url: str, use_browser: bool | None) -> tuple[str | None, str]:
+    async def _commit_cache(self, ctx: T, url: str) -> None:
+        """搜索页或详情页解析成功后调用, 将响应写入缓存"""
+        await self.async_client.commit_cache(url, self._get_cookies(ctx))
+
+    async def _fetch(self, ctx: T, url: str, use_browser: bool | None, search: bool = False) -> tuple[str | None, str]:
         if use_browser is not False:
             content, error = await self._browser_fetch(ctx, url)
             if content is not None:
                 return content, error
             if use_browser is True:
                 return None, f"强制使用浏览器请求但失败: {error=}"
-        return await self.async_client.get_text(url, headers=self._get_headers(ctx), cookies=self._get_cookies(ctx))
+        return await self.async_client.get_text(
+            url,
+            headers=self._get_headers(ctx),
+            cookies=self._get_cookies(ctx),
+            cache_site=self.site().value,
+            cache_deferred=True,
+            cache_search=search,
+        )
 
     async def _browser_fetch(
         self,
@@ -3,6 +3,8 @@ from typing import TypedDict, Unpack
 
 from parsel import Selector
 
+from mdcx.utils.parse_executor import ParseExecutor, default_parse_executor, run_sync
+
 from .types import NOT_SUPPORT, Context, CrawlerData, CSSSelector, FieldRes, FieldValue, SelectorType
 
 
@@ -218,3 +220,29 @@ class DetailPageParser[T: Context = Context]:
             external_id=kwargs.get("external_id", ""),
             source=kwargs.get("source", ""),
         )
+
+    async def parse_html(
+        self, ctx: T, html: str, executor: ParseExecutor | None = None, **kwargs: Unpack[OtherFields]
+    ) -> CrawlerData:
+        """
+        在解析执行器中完成 HTML 解析及所有字段的提取, 不阻塞事件循环.
+
+        各字段方法不应包含 IO 操作. 使用进程池时, 对 ctx 的修改仅保留调试日志.
+
+        Args:
+            html: 详情页 HTML 文本.
+            executor: 解析执行器, 默认使用 `default_parse_executor`.
+        """
+        executor = executor or default_parse_executor
+        data, logs = await executor.run(_parse_html, self, ctx, html, kwargs)
+        if executor.mode == "process":
+            ctx.debug_info.logs.extend(logs)
+        return data
+
+
+def _parse_html[T: Context](
+    parser: DetailPageParser[T], ctx: T, html: str, kwargs: DetailPageParser.OtherFields
+) -> tuple[CrawlerData, list[str]]:
+    start = len(ctx.debug_info.logs)
+    data = run_sync(parser.parse(ctx, Selector(text=html), **kwargs))
+    return data, ctx.debug_info.logs[start:]
@@ -12,6 +12,7 @@ from mdcx.config.models import Website
 from mdcx.models.types import CrawlerInput
 from mdcx.utils.dataclass import update_valid
 from mdcx.utils.gather_group import GatherGroup
+from mdcx.utils.parse_executor import ParseExecutor
 from mdcx.web_async import AsyncWebClient
 
 from ..base import Context, CralwerException, CrawlerData, DetailPageParser, GenericBaseCrawler, is_valid
@@ -29,8 +30,14 @@ class DmmCrawler(GenericBaseCrawler[DMMContext]):
     digital = DigitalParser()
     rental = RentalParser()
 
-    def __init__(self, client: AsyncWebClient, base_url: str = "", browser: Browser | None = None):
-        super().__init__(client, base_url, browser)
+    def __init__(
+        self,
+        client: AsyncWebClient,
+        base_url: str = "",
+        browser: Browser | None = None,
+        parse_executor: ParseExecutor | None = None,
+    ):
+        super().__init__(client, base_url, browser, parse_executor)
 
     @classmethod
     @override
@@ -258,7 +265,10 @@ class DmmCrawler(GenericBaseCrawler[DMMContext]):
             ctx.debug(f"详情页请求失败: {error=}")
             return CrawlerData()
         ctx.debug(f"详情页请求成功: {detail_url=}")
-        return await parser.parse(ctx, Selector(html), external_id=detail_url)
+        data = await parser.parse_html(ctx, html, self.parse_executor, external_id=detail_url)
+        if is_valid(data.title):
+            await self._commit_cache(ctx, detail_url)
+        return data
 
     @override
     async def _fetch_detail(self, ctx: DMMContext, url: str, use_browser=None) -> tuple[str | None, str]:
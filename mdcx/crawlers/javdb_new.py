@@ -196,13 +196,19 @@ class JavdbCrawler(BaseCrawler):
 
         return None
 
+    @override
+    async def _parse_detail_html(self, ctx, html: str, detail_url: str) -> CrawlerData | None:
+        return await self.parser.parse_html(ctx, html, self.parse_executor, external_id=self._javdbid(detail_url))
+
     @override
     async def _parse_detail_page(self, ctx, html: Selector, detail_url: str) -> CrawlerData | None:
-        # 提取 javdbid
-        javdbid = ""
+        return await self.parser.parse(ctx, html, external_id=self._javdbid(detail_url))
+
+    @staticmethod
+    def _javdbid(detail_url: str) -> str:
         if r := re.search(r"/v/([a-zA-Z0-9]+)", detail_url):
-            javdbid = r.group(1)
-        return await self.parser.parse(ctx, html, external_id=javdbid)
+            return r.group(1)
+        return ""
 
     @override
     async def post_process(self, ctx, res: CrawlerResult) -> CrawlerResult:
@@ -0,0 +1,208 @@
+"""
+刮削流程的运行指标. 提供直方图及计数器, 可导出为 JSON 快照或 Prometheus 文本格式.
+
+所有指标仅保存在内存中, 程序重启后清零.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+type Labels = tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """根据分桶线性插值估算分位数"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / c, self.max)
+            seen += c
+        return self.max
+
+
+class Histogram:
+    """按标签分组的直方图"""
+
+    def __init__(self, name: str, help: str, labels: Labels = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._data: dict[Labels, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            if (h := self._data.get(label_values)) is None:
+                h = self._data[label_values] = _Histogram(self.buckets)
+            h.observe(value)
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        """记录代码块耗时 (秒), 代码块抛出异常时同样记录"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            items = list(self._data.items())
+        return [
+            {
+                "labels": dict(zip(self.labels, k, strict=True)),
+                "count": h.count,
+                "sum": round(h.sum, 6),
+                "avg": round(h.sum / h.count, 6) if h.count else 0.0,
+                "max": round(h.max, 6),
+                "p50": round(h.quantile(0.5), 6),
+                "p95": round(h.quantile(0.95), 6),
+                "p99": round(h.quantile(0.99), 6),
+            }
+            for k, h in items
+        ]
+
+    def prometheus(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = list(self._data.items())
+        for k, h in items:
+            labels = _format_labels(self.labels, k)
+            cumulative = 0
+            for le, c in zip((*self.buckets, "+Inf"), h.counts, strict=True):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_format_labels((*self.labels, 'le'), (*k, str(le)))} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {h.sum}")
+            lines.append(f"{self.name}_count{labels} {h.count}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class Counter:
+    """按标签分组的计数器"""
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._data: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, value: float = 1):
+        with self._lock:
+            self._data[label_values] = self._data.get(label_values, 0) + value
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            items = list(self._data.items())
+        return [{"labels": dict(zip(self.labels, k, strict=True)), "value": v} for k, v in items]
+
+    def prometheus(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._data.items())
+        lines.extend(f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in items)
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped, strict=True)) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self._metrics: dict[str, Histogram | Counter] = {}
+        self._lag_task: asyncio.Task | None = None
+
+    def histogram(self, name: str, help: str, labels: Labels = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        h = Histogram(name, help, labels, buckets)
+        self._metrics[name] = h
+        return h
+
+    def counter(self, name: str, help: str, labels: Labels = ()) -> Counter:
+        c = Counter(name, help, labels)
+        self._metrics[name] = c
+        return c
+
+    def snapshot(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "uptime": time.time() - self.started_at,
+            "metrics": {name: m.snapshot() for name, m in self._metrics.items()},
+        }
+
+    def prometheus(self) -> str:
+        lines = []
+        for m in self._metrics.values():
+            lines.extend(m.prometheus())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for m in self._metrics.values():
+            m.clear()
+        self.started_at = time.time()
+
+    def start_loop_probe(self, interval: float = 0.5) -> None:
+        """在当前事件循环中启动延迟探测任务. 已启动时无操作."""
+        if self._lag_task is not None and not self._lag_task.done():
+            return
+        self._lag_task = asyncio.create_task(_probe_loop_lag(interval))
+
+
+async def _probe_loop_lag(interval: float):
+    """按固定间隔休眠, 实际唤醒时间与预期的差值即为事件循环被阻塞的时间"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(time.perf_counter() - start - interval, 0))
+
+
+metrics = Metrics()
+
+STAGE_SECONDS = metrics.histogram("mdcx_stage_seconds", "刮削各阶段耗时", ("stage",))
+"""stage: file_info, crawl, translate, actor_map, video_probe, image, watermark, extras, nfo, move, total"""
+CRAWL_SECONDS = metrics.histogram("mdcx_crawl_seconds", "各网站爬虫耗时", ("site",))
+CRAWL_ERRORS = metrics.counter("mdcx_crawl_errors_total", "各网站爬虫失败次数", ("site", "reason"))
+HTTP_SECONDS = metrics.histogram("mdcx_http_request_seconds", "各域名单次请求耗时", ("host",))
+HTTP_ERRORS = metrics.counter("mdcx_http_errors_total", "各域名请求失败次数", ("host", "reason"))
+FILES_TOTAL = metrics.counter("mdcx_files_total", "已处理文件数", ("result",))
+LOOP_LAG = metrics.histogram(
+    "mdcx_loop_lag_seconds", "事件循环延迟", buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
@@ -3,6 +3,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, TypedDict
 
+from ..utils.path_journal import PathJournal
+from ..utils.single_flight import SingleFlight
 from .enums import FileMode
 from .types import ScrapeResult
 
@@ -23,17 +25,18 @@ class _Flags:
     # 指定刮削 #todo 改为传参
     appoint_url: str = ""
     website_name: str = ""
+    web_cache_refresh: bool = False  # 本次刮削强制刷新网页缓存, 刮削结束后恢复
 
     # 刮削相关
     rest_time_convert: int = 0
     rest_time_convert_: int = 0
     total_kills: int = 0
     now_kill: int = 0
-    success_save_time: float = 0.0
     next_start_time: float = 0.0
     count_claw: int = 0  # 批量刮削次数
     can_save_remain: bool = False  # 保存剩余任务
     remain_list: list[Path] = field(default_factory=list)
+    scan_position: tuple[Path, Path] | None = None  # 遍历未完成时: (遍历目录, 最后发现的文件)
     new_again_dic: dict[Path, tuple[str, str, str]] = field(default_factory=dict)
     again_dic: dict[Path, tuple[str, str, str]] = field(default_factory=dict)  # 待重新刮削的字典
     start_time: float = 0.0
@@ -62,15 +65,13 @@ class _Flags:
     theme_videos_deal_set: set[Path] = field(default_factory=set)
     # 当前文件nfo已处理的标识（如已存在，视为剧照已处理过）
     nfo_deal_set: set[Path] = field(default_factory=set)
-    # 去获取json的番号列表
-    json_get_set: set[str] = field(default_factory=set)
-    # 获取成功的json
-    json_data_dic: dict[str, ScrapeResult] = field(default_factory=dict)
+    # 各番号的刮削结果, 同一番号的多个分集只刮削一次
+    scrape_flight: SingleFlight[str, ScrapeResult] = field(default_factory=SingleFlight)
     img_path: str = ""
     # 失败文件及其错误原因
     failed_list: list[tuple[Path, str]] = field(default_factory=list)
     scrape_start_time: float = 0.0
-    success_list: set[Path] = field(default_factory=set)
+    success_list: PathJournal = field(default_factory=PathJournal)  # 成功刮削列表, 对应 success.txt
     stop_other: bool = True  # 非刮削线程停止标识
 
     # show
@@ -85,6 +86,25 @@ class _Flags:
     local_number_set: set[str] = field(default_factory=set)  # 本地所有番号的集合
     local_number_cnword_set: set[str] = field(default_factory=set)  # 本地所有有字幕的番号的集合
 
+    def file_done(self, number: str) -> FileDoneDict:
+        """
+        番号的已处理文件字典, 不存在时创建.
+
+        后台任务跨越多轮刮削, 新一轮刮削开始时 `reset` 会清空 `file_done_dic`, 因此不能假定字典已存在.
+        """
+        if (d := self.file_done_dic.get(number)) is None:
+            d = self.file_done_dic[number] = FileDoneDict(
+                poster=None,
+                thumb=None,
+                fanart=None,
+                trailer=None,
+                local_poster=None,
+                local_thumb=None,
+                local_fanart=None,
+                local_trailer=None,
+            )
+        return d
+
     def reset(self) -> None:
         self.failed_list = []
         self.counting_order = 0
@@ -103,8 +123,7 @@ class _Flags:
         self.trailer_deal_set = set()
         self.theme_videos_deal_set = set()
         self.nfo_deal_set = set()
-        self.json_get_set = set()
-        self.json_data_dic = {}
+        self.scrape_flight = SingleFlight()
         self.img_path = ""
 
 
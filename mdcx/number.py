@@ -2,94 +2,132 @@ import contextlib
 import os
 import re
 import unicodedata
+from collections.abc import Iterable
+from functools import lru_cache
 
 from .manual import ManualConfig
 
+# 无码车牌BT,CT,EMP,CCDV,CWP,CWPBD,DSAM,DRC,DRG,GACHI,heydouga,JAV,LAF,LAFBD,HEYZO,KTG,KP,KG,LLDV,MCDV,MKD,MKBD,MMDV,NIP,PB,PT,QE,RED,RHJ,S2M,SKY,SKYHD,SMD,SSDV,SSKP,TRG,TS,xxx-av,YKB
+UNCENSORED_PREFIXES = [
+    "BT-",
+    "CT-",
+    "EMP-",
+    "CCDV-",
+    "CWP-",
+    "CWPBD-",
+    "DSAM-",
+    "DRC-",
+    "DRG-",
+    "GACHI-",
+    "heydouga",
+    "JAV-",
+    "LAF-",
+    "LAFBD-",
+    "HEYZO-",
+    "KTG-",
+    "KP-",
+    "KG-",
+    "LLDV-",
+    "MCDV-",
+    "MKD-",
+    "MKBD-",
+    "MMDV-",
+    "NIP-",
+    "PB-",
+    "PT-",
+    "QE-",
+    "RED-",
+    "RHJ-",
+    "S2M-",
+    "SKY-",
+    "SKYHD-",
+    "SMD-",
+    "SSDV-",
+    "SSKP-",
+    "TRG-",
+    "TS-",
+    "xxx-av-",
+    "YKB-",
+    "bird",
+    "bouga",
+]
+
+
+class _PrefixTrie:
+    """前缀树. 一次遍历字符串即可得到其开头匹配的所有前缀的类别"""
+
+    def __init__(self):
+        self._root: dict = {}
+
+    def add(self, prefix: str, kind: int) -> None:
+        node = self._root
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        node[""] = node.get("", 0) | kind  # 空字符串键保存以此结尾的前缀类别
+
+    def match(self, s: str) -> int:
+        node, kinds = self._root, 0
+        for ch in s:
+            if (node := node.get(ch)) is None:
+                break
+            kinds |= node.get("", 0)
+        return kinds
+
+
+_UNCENSORED = 1
+_SUREN = 2
+_PREFIXES = _PrefixTrie()
+for _prefix in UNCENSORED_PREFIXES:
+    _PREFIXES.add(_prefix.upper(), _UNCENSORED)
+for _prefix in ManualConfig.SUREN_DIC:
+    _PREFIXES.add(_prefix, _SUREN)
+
+_UNCENSORED_N = re.compile(r"n\d{4}")
+_DATE_NUMBER = re.compile(r"[^.]+\.\d{2}\.\d{2}\.\d{2}")
+_SUREN_NUMBER = re.compile(r"\d{3,}[A-Z]+-\d{2}")
 
+
+@lru_cache(maxsize=4096)
 def is_uncensored(number: str) -> bool:
-    if re.match(r"n\d{4}", number) or re.search(r"[^.]+\.\d{2}\.\d{2}\.\d{2}", number):
+    if _UNCENSORED_N.match(number) or _DATE_NUMBER.search(number):
         return True
-
-    # 无码车牌BT,CT,EMP,CCDV,CWP,CWPBD,DSAM,DRC,DRG,GACHI,heydouga,JAV,LAF,LAFBD,HEYZO,KTG,KP,KG,LLDV,MCDV,MKD,MKBD,MMDV,NIP,PB,PT,QE,RED,RHJ,S2M,SKY,SKYHD,SMD,SSDV,SSKP,TRG,TS,xxx-av,YKB
-    key_start_word = [
-        "BT-",
-        "CT-",
-        "EMP-",
-        "CCDV-",
-        "CWP-",
-        "CWPBD-",
-        "DSAM-",
-        "DRC-",
-        "DRG-",
-        "GACHI-",
-        "heydouga",
-        "JAV-",
-        "LAF-",
-        "LAFBD-",
-        "HEYZO-",
-        "KTG-",
-        "KP-",
-        "KG-",
-        "LLDV-",
-        "MCDV-",
-        "MKD-",
-        "MKBD-",
-        "MMDV-",
-        "NIP-",
-        "PB-",
-        "PT-",
-        "QE-",
-        "RED-",
-        "RHJ-",
-        "S2M-",
-        "SKY-",
-        "SKYHD-",
-        "SMD-",
-        "SSDV-",
-        "SSKP-",
-        "TRG-",
-        "TS-",
-        "xxx-av-",
-        "YKB-",
-        "bird",
-        "bouga",
-    ]
-    return any(number.upper().startswith(each.upper()) for each in key_start_word)
+    return bool(_PREFIXES.match(number.upper()) & _UNCENSORED)
 
 
+@lru_cache(maxsize=4096)
 def is_suren(number: str) -> bool:
-    if re.search(r"\d{3,}[A-Z]+-\d{2}", number.upper()) or "SIRO" in number.upper():
+    number_upper = number.upper()
+    if _SUREN_NUMBER.search(number_upper) or "SIRO" in number_upper:
         return True
-    return any(number.upper().startswith(key) for key in ManualConfig.SUREN_DIC)
+    return bool(_PREFIXES.match(number_upper) & _SUREN)
+
 
+_LETTERS_DATE = re.compile(r"([A-Za-z0-9-.]{3,})[-_. ]\d{2}\.\d{2}\.\d{2}")
+_LETTERS_PREFIXES = ("FC2", "MYWIFE", "KIN8", "S2M", "T28", "TH101", "XXX-AV")
+_LETTERS_MKY = re.compile(r"(MKY-[A-Z]+)-\d{3,}")
+_LETTERS_CW3D2D = re.compile(r"(CW3D2D?BD)")
+_MCB3D = re.compile(r"MCB3D[BD]*-\d{2,}")
+_H4610 = re.compile(r"(H4610|C0930|H0930)-[A-Z]+\d{4,}")
+_LETTERS = re.compile(r"(\d*[A-Za-z]+)\d*")
 
+
+@lru_cache(maxsize=4096)
 def get_number_letters(number: str) -> str:
     number_upper = number.upper()
-    if r := re.search(r"([A-Za-z0-9-.]{3,})[-_. ]\d{2}\.\d{2}\.\d{2}", number):
+    if r := _LETTERS_DATE.search(number):
         return r[1]
-    if number_upper.startswith("FC2"):
-        return "FC2"
-    if number_upper.startswith("MYWIFE"):
-        return "MYWIFE"
-    if number_upper.startswith("KIN8"):
-        return "KIN8"
-    if number_upper.startswith("S2M"):
-        return "S2M"
-    if number_upper.startswith("T28"):
-        return "T28"
-    if number_upper.startswith("TH101"):
-        return "TH101"
-    if number_upper.startswith("XXX-AV"):
-        return "XXX-AV"
-    if r := re.search(r"(MKY-[A-Z]+)-\d{3,}", number_upper):
+    for prefix in _LETTERS_PREFIXES:
+        if number_upper.startswith(prefix):
+            return prefix
+    if r := _LETTERS_MKY.search(number_upper):
         return r[1]
-    if re.search(r"(CW3D2D?BD)", number_upper):
+    if _LETTERS_CW3D2D.search(number_upper):
         return "CW3D2D"
-    if re.search(r"MCB3D[BD]*-\d{2,}", number_upper):
+    if _MCB3D.search(number_upper):
         return "MCB3D"
-    if re.findall(r"(H4610|C0930|H0930)-[A-Z]+\d{4,}", number_upper):
-        return re.findall(r"(H4610|C0930|H0930)-[A-Z]+\d{4,}", number_upper)[0]
-    result = re.search(r"(\d*[A-Za-z]+)\d*", number)
+    if r := _H4610.search(number_upper):
+        return r[1]
+    result = _LETTERS.search(number)
     return result[1] if result else "未知车牌"
 
 
@@ -103,8 +141,47 @@ def long_name(short_name: str) -> str:
     return long_name.lower().replace("-", "").replace(".", "") if long_name else short_name.lower()
 
 
+_CD_PART = re.compile(r"[-_ .]CD\d{1,2}")
+_EPISODE = re.compile(r"[-_ .][A-Z0-9]\.$")
+_DATE_LONG = re.compile(r"\d{4}[-_.]\d{1,2}[-_.]\d{1,2}")
+_DATE_SHORT = re.compile(r"[-\[]\d{2}[-_.]\d{2}[-_.]\d{2}]?")
+_MYWIFE = re.compile(r"NO\.(\d*)")
+_CW3D2D = re.compile(r"CW3D2D?BD-?\d{2,}")
+_MMR = re.compile(r"MMR-?[A-Z]{2,}-?\d+[A-Z]*")
+_MD = re.compile(r"([^A-Z]|^)(MD[A-Z-]*\d{4,}(-\d)?)")
+_OUMEI_CHECK = re.compile(r"([A-Z0-9_]{2,})[-.]2?0?(\d{2}[-.]\d{2}[-.]\d{2})")
+_OUMEI = re.compile(r"([A-Z0-9-]{2,})[-_.]2?0?(\d{2}[-.]\d{2}[-.]\d{2})")
+_XXX_AV = re.compile(r"XXX-AV-\d{4,}")
+_MKY = re.compile(r"MKY-[A-Z]+-\d{3,}")
+_FC2 = re.compile(r"FC2-\d{5,}")
+_FC2_NO_DASH = re.compile(r"FC2\d{5,}")
+_HEYZO = re.compile(r"HEYZO-\d{3,}")
+_HEYZO_NO_DASH = re.compile(r"HEYZO\d{3,}")
+_KIN8 = re.compile(r"KIN8(TENGOKU)?-?\d{3,}")
+_S2M = re.compile(r"S2M[BD]*-\d{3,}")
+_T28 = re.compile(r"T28-?\d{3,}")
+_TH101 = re.compile(r"TH101-\d{3,}-\d{5,}")
+_ZERO_PADDED = re.compile(r"([A-Z]{2,})00(\d{3})")
+_DIGITS_LETTERS = re.compile(r"\d{2,}[A-Z]{2,}-\d{2,}[A-Z]?")
+_LETTERS_DIGITS = re.compile(r"[A-Z]{2,}-\d{2,}[Z]?")
+_LETTERS_LETTER_DIGITS = re.compile(r"[A-Z]+-[A-Z]\d+")
+_DIGITS_DIGITS = re.compile(r"\d{2,}[-_]\d{2,}")
+_DIGITS_DASH_LETTERS = re.compile(r"\d{3,}-[A-Z]{3,}")
+_N_NUMBER = re.compile(r"([^A-Z]|^)(N\d{4})(\D|$)")
+_H_PREFIX = re.compile(r"H_\d{3,}([A-Z]{2,})(\d{2,})")
+_LOOSE_3_2 = re.compile(r"([A-Z]{3,}).*?(\d{2,})")
+_LOOSE_2_3 = re.compile(r"([A-Z]{2,}).*?(\d{3,})")
+_BRACKETS = re.compile(r"[【(（\[].+?[]）)】]")
+
+
 def get_file_number(filepath: str, escape_string_list: list[str]) -> str:
-    real_name = os.path.splitext(os.path.split(filepath)[1])[0].strip() + "."
+    """从文件路径中提取番号. 结果仅取决于文件名及排除字符, 同一文件在整理过程中多次调用时直接使用缓存"""
+    return _get_file_number(os.path.split(filepath)[1], tuple(escape_string_list))
+
+
+@lru_cache(maxsize=4096)
+def _get_file_number(name: str, escape_string_list: tuple[str, ...]) -> str:
+    real_name = os.path.splitext(name)[0].strip() + "."
 
     # 去除多余字符
     file_name = remove_escape_string1(real_name, escape_string_list) + "."
@@ -119,14 +196,14 @@ def get_file_number(filepath: str, escape_string_list: list[str]) -> str:
     )
 
     # 去除分集
-    filename = re.sub(r"[-_ .]CD\d{1,2}", "", filename)  # xxx-CD1.mp4
-    filename = re.sub(r"[-_ .][A-Z0-9]\.$", "", filename)  # xxx_1.mp4, xxx.1.mp4, xxx.A.mp4, xxx A.mp4
+    filename = _CD_PART.sub("", filename)  # xxx-CD1.mp4
+    filename = _EPISODE.sub("", filename)  # xxx_1.mp4, xxx.1.mp4, xxx.A.mp4, xxx A.mp4
     filename = filename.replace(" ", "-").strip("-_. ")
     oumei_filename = filename
 
     # 去除时间
-    filename = re.sub(r"\d{4}[-_.]\d{1,2}[-_.]\d{1,2}", "", filename)  # 去除文件名中时间
-    filename = re.sub(r"[-\[]\d{2}[-_.]\d{2}[-_.]\d{2}]?", "", filename)  # 去除文件名中时间
+    filename = _DATE_LONG.sub("", filename)  # 去除文件名中时间
+    filename = _DATE_SHORT.sub("", filename)  # 去除文件名中时间
 
     # 转换番号
     filename = (
@@ -134,81 +211,73 @@ def get_file_number(filepath: str, escape_string_list: list[str]) -> str:
     )
 
     # 提取番号
-    if "MYWIFE" in filename and re.search(r"NO\.\d*", filename):  # 提取 mywife No.1111
-        temp_num = re.findall(r"NO\.(\d*)", filename)[0]
-        return f"Mywife No.{temp_num}"
+    if "MYWIFE" in filename and (r := _MYWIFE.search(filename)):  # 提取 mywife No.1111
+        return f"Mywife No.{r[1]}"
 
-    elif r := re.search(r"CW3D2D?BD-?\d{2,}", filename):  # 提取番号 CW3D2DBD-11
+    elif r := _CW3D2D.search(filename):  # 提取番号 CW3D2DBD-11
         file_number = r.group()
         return file_number
 
-    elif r := re.search(r"MMR-?[A-Z]{2,}-?\d+[A-Z]*", filename):  # 提取番号 mmr-ak089sp
+    elif r := _MMR.search(filename):  # 提取番号 mmr-ak089sp
         file_number = r.group()
         return file_number.replace("MMR-", "MMR")
 
-    elif (
-        r := re.search(r"([^A-Z]|^)(MD[A-Z-]*\d{4,}(-\d)?)", file_name)
-    ) and "MDVR" not in file_name:  # 提取番号 md-0165-1
+    elif (r := _MD.search(file_name)) and "MDVR" not in file_name:  # 提取番号 md-0165-1
         file_number = r.group(2)
         return file_number
 
-    elif re.findall(
-        r"([A-Z0-9_]{2,})[-.]2?0?(\d{2}[-.]\d{2}[-.]\d{2})", oumei_filename
-    ):  # 提取欧美番号 sexart.11.11.11
-        result = re.findall(r"([A-Z0-9-]{2,})[-_.]2?0?(\d{2}[-.]\d{2}[-.]\d{2})", oumei_filename)
-        return (long_name(result[0][0].strip("-")) + "." + result[0][1].replace("-", ".")).capitalize()
+    elif _OUMEI_CHECK.search(oumei_filename) and (r := _OUMEI.search(oumei_filename)):  # 提取欧美番号 sexart.11.11.11
+        return (long_name(r[1].strip("-")) + "." + r[2].replace("-", ".")).capitalize()
 
     elif (
-        (r := re.search(r"XXX-AV-\d{4,}", filename))  # MKY-A-11111
-        or (r := re.search(r"MKY-[A-Z]+-\d{3,}", filename))  # 提取xxx-av-11111
+        (r := _XXX_AV.search(filename))  # MKY-A-11111
+        or (r := _MKY.search(filename))  # 提取xxx-av-11111
     ):
         file_number = r.group()
 
     elif "FC2" in filename:
         filename = filename.replace("PPV", "").replace("_", "-").replace("--", "-")
-        if r := re.search(r"FC2-\d{5,}", filename):  # 提取类似fc2-111111番号
+        if r := _FC2.search(filename):  # 提取类似fc2-111111番号
             file_number = r.group()
-        elif r := re.search(r"FC2\d{5,}", filename):
+        elif r := _FC2_NO_DASH.search(filename):
             file_number = r.group().replace("FC2", "FC2-")
         else:
             file_number = filename
 
     elif "HEYZO" in filename:
         filename = filename.replace("_", "-").replace("--", "-")
-        if r := re.search(r"HEYZO-\d{3,}", filename):  # HEYZO-1111番号
+        if r := _HEYZO.search(filename):  # HEYZO-1111番号
             file_number = r.group()
-        elif r := re.search(r"HEYZO\d{3,}", filename):
+        elif r := _HEYZO_NO_DASH.search(filename):
             file_number = r.group().replace("HEYZO", "HEYZO-")
         else:
             file_number = filename
 
-    elif r := re.search(
-        r"(H4610|C0930|H0930)-[A-Z]+\d{4,}", filename
-    ):  # 提取H4610-ki111111 c0930-ki221218 h0930-ori1665
+    elif r := _H4610.search(filename):  # 提取H4610-ki111111 c0930-ki221218 h0930-ori1665
         file_number = r.group()
 
-    elif r := re.search(r"KIN8(TENGOKU)?-?\d{3,}", filename):  # 提取S2MBD-002 或S2MBD-006
+    elif r := _KIN8.search(filename):  # 提取S2MBD-002 或S2MBD-006
         file_number = r.group().replace("TENGOKU", "-").replace("--", "-")
 
     elif (
-        (r := re.search(r"S2M[BD]*-\d{3,}", filename))  # MCB3DBD-33
-        or (r := re.search(r"MCB3D[BD]*-\d{2,}", filename))  # S2MBD-002
+        (r := _S2M.search(filename))  # MCB3DBD-33
+        or (r := _MCB3D.search(filename))  # S2MBD-002
     ):
         file_number = r.group()
 
-    elif r := re.search(r"T28-?\d{3,}", filename):  # 提取T28-223
+    elif r := _T28.search(filename):  # 提取T28-223
         file_number = r.group().replace("T2800", "T28-")
 
-    elif r := re.search(r"TH101-\d{3,}-\d{5,}", filename):  # 提取th101-140-112594
+    elif r := _TH101.search(filename):  # 提取th101-140-112594
         file_number = r.group().lower()
 
-    elif r := re.search(r"([A-Z]{2,})00(\d{3})", filename):  # 提取ssni00644为ssni-644
+    elif r := _ZERO_PADDED.search(filename):  # 提取ssni00644为ssni-644
         file_number = r[1] + "-" + r[2]
 
-    elif r := re.search(r"\d{2,}[A-Z]{2,}-\d{2,}[A-Z]?", filename):  # 提取类似259luxu-1456番号
+    elif r := _DIGITS_LETTERS.search(filename):  # 提取类似259luxu-1456番号
         file_number = r.group()
 
-    elif r := re.search(r"[A-Z]{2,}-\d{2,}[Z]?", filename):  # 提取类似mkbd-120番号
+    elif r := _LETTERS_DIGITS.search(filename):  # 提取类似mkbd-120番号
         file_number = r.group()
         for key, value in ManualConfig.SUREN_DIC.items():
             if key in file_number:
@@ -216,28 +285,27 @@ def get_file_number(filepath: str, escape_string_list: list[str]) -> str:
                 break
 
     elif (
-        (r := re.search(r"[A-Z]+-[A-Z]\d+", filename))  # mkbd-s120
-        or (r := re.search(r"\d{2,}[-_]\d{2,}", filename))  # 111111-000 111111_000
-        or (r := re.search(r"\d{3,}-[A-Z]{3,}", filename))  # 111111-MMMM
+        (r := _LETTERS_LETTER_DIGITS.search(filename))  # mkbd-s120
+        or (r := _DIGITS_DIGITS.search(filename))  # 111111-000 111111_000
+        or (r := _DIGITS_DASH_LETTERS.search(filename))  # 111111-MMMM
     ):
         file_number = r.group()
 
-    elif r := re.search(r"([^A-Z]|^)(N\d{4})(\D|$)", filename):  # 提取n1111
+    elif r := _N_NUMBER.search(filename):  # 提取n1111
         file_number = r.group(2).lower()
 
-    elif r := re.search(r"H_\d{3,}([A-Z]{2,})(\d{2,})", filename):  # 提取类似h_173mega05番号
+    elif r := _H_PREFIX.search(filename):  # 提取类似h_173mega05番号
         a, b = r.groups()
         file_number = a + "-" + b
 
     elif (
-        (r := re.findall(r"([A-Z]{3,}).*?(\d{2,})", filename))  # 3个及以上字母，2个及以上数字
-        or (r := re.findall(r"([A-Z]{2,}).*?(\d{3,})", filename))  # 2个及以上字母，3个及以上数字
+        (r := _LOOSE_3_2.search(filename))  # 3个及以上字母，2个及以上数字
+        or (r := _LOOSE_2_3.search(filename))  # 2个及以上字母，3个及以上数字
     ):
-        temp = r[0]
-        file_number = temp[0] + "-" + temp[1]
+        file_number = r[1] + "-" + r[2]
 
     else:
-        temp_name = re.sub(r"[【(（\[].+?[]）)】]", "", file_name).strip("@. ")  # 去除[]
+        temp_name = _BRACKETS.sub("", file_name).strip("@. ")  # 去除[]
         temp_name = unicodedata.normalize("NFC", temp_name)  # Mac 把会拆成两个字符，即 NFD，而网页请求使用的是 NFC
         with contextlib.suppress(Exception):
             temp_name = temp_name.encode("cp932").decode("shift_jis")  # 转换为常见日文，比如～ 转换成 〜
@@ -248,13 +316,9 @@ def get_file_number(filepath: str, escape_string_list: list[str]) -> str:
     return file_number.strip("-_. ")
 
 
-# pure version of models.base.remove_escape_string
-def remove_escape_string1(filename: str, escape_string_list: list[str], replace_char: str = "") -> str:
-    filename = filename.upper()
-    for string in escape_string_list:
-        if string:
-            filename = filename.replace(string.upper(), replace_char)
-    short_strings = [
+_SHORT_STRINGS = [
+    re.compile(rf"[-_ .\[]{each}[-_ .\]]")
+    for each in (
         "4K",
         "4KS",
         "8K",
@@ -271,7 +335,16 @@ def remove_escape_string1(filename: str, escape_string_list: list[str], replace_
         "AAC",
         "XXX",
         "PRT",
-    ]
-    for each in short_strings:
-        filename = re.sub(rf"[-_ .\[]{each.upper()}[-_ .\]]", "-", filename)
+    )
+]  # 依次替换, 相邻的多个字符串共用分隔符
+
+
+# pure version of models.base.remove_escape_string
+def remove_escape_string1(filename: str, escape_string_list: Iterable[str], replace_char: str = "") -> str:
+    filename = filename.upper()
+    for string in escape_string_list:
+        if string:
+            filename = filename.replace(string.upper(), replace_char)
+    for pattern in _SHORT_STRINGS:
+        filename = pattern.sub("-", filename)
     return filename.replace("--", "-").strip("-_ .")
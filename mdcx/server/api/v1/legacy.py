@@ -21,14 +21,18 @@ from .config import check_path_access
 router = APIRouter(prefix="/legacy", tags=["Legacy"])
 
 
+class ScrapeBody(BaseModel):
+    refresh_cache: bool = Field(default=False, description="本次刮削忽略已有网页缓存, 重新请求并更新缓存")
+
+
 @router.post("/scrape", summary="开始刮削", operation_id="startScrape")
-async def start_scrape():
-    """使用当前配置运行刮削流程, 无需额外参数"""
+async def start_scrape(body: ScrapeBody | None = None):
+    """使用当前配置运行刮削流程"""
     try:
         errors = manager.load()
         if errors:
             raise HTTPException(status_code=500, detail=f"Configuration errors: {', '.join(errors)}")
-        start_new_scrape(FileMode.Default)
+        start_new_scrape(FileMode.Default, refresh_cache=body is not None and body.refresh_cache)
         return {"message": "Scraping started."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from mdcx.metrics import metrics
+
+router = APIRouter(prefix="/metrics", tags=["运行指标"])
+
+
+@router.get("/", operation_id="getMetrics", summary="获取运行指标")
+async def get_metrics() -> dict:
+    """各阶段耗时, 各网站/域名的请求耗时及失败次数, 事件循环延迟等. 耗时单位均为秒."""
+    return metrics.snapshot()
+
+
+@router.get(
+    "/prometheus", operation_id="getPrometheusMetrics", summary="Prometheus 格式指标", response_class=PlainTextResponse
+)
+async def get_prometheus_metrics() -> str:
+    return metrics.prometheus()
+
+
+@router.delete("/", operation_id="clearMetrics", summary="清空运行指标")
+async def clear_metrics():
+    metrics.clear()
+    return {"message": "Metrics cleared."}
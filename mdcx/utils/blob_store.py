@@ -0,0 +1,215 @@
+import asyncio
+import contextlib
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+if sys.platform == "linux":
+    import fcntl
+
+    _FICLONE = 0x40049409  # linux/fs.h
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    """写时复制, 仅支持 Linux 上的 btrfs, xfs 等文件系统. 不支持时抛出 OSError."""
+    if sys.platform != "linux":
+        raise OSError("reflink not supported")
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+
+
+def link_file(src: Path, dst: Path) -> str:
+    """
+    将 src 的内容放置到 dst, 依次尝试写时复制, 硬链接及复制. 通过临时文件原子地替换 dst.
+
+    硬链接与 src 共享数据, 此后不能原地修改 dst, 只能整体替换 (本项目中图片的写入均为先写临时文件再重命名).
+
+    Returns:
+        使用的方式: reflink, hardlink 或 copy
+    """
+    temp = dst.with_name(dst.name + ".part")
+    temp.unlink(missing_ok=True)
+    try:
+        try:
+            _reflink(src, temp)
+            method = "reflink"
+        except OSError:
+            temp.unlink(missing_ok=True)
+            try:
+                os.link(src, temp)  # 跨设备, FAT 等不支持硬链接的文件系统上失败
+                method = "hardlink"
+            except OSError:
+                shutil.copyfile(src, temp)
+                method = "copy"
+        os.replace(temp, dst)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    return method
+
+
+class BlobStore:
+    """
+    内容寻址的本地图片仓库. 图片按 SHA-256 存储, 并记录来源 URL 到内容的映射.
+
+    - 同一 URL 再次下载时 (重新刮削, 分集等) 直接从仓库读取, 不再请求网络
+    - 输出文件与仓库中的图片内容相同时, 优先使用写时复制或硬链接, 不占用额外空间
+
+    总大小超出上限时按最近使用时间淘汰. 淘汰仅删除仓库中的文件, 已输出的硬链接不受影响.
+    数据库操作及文件读写均在线程中执行, 不阻塞事件循环.
+    """
+
+    def __init__(self, root: Path, *, max_size: int = 2 * 1024**3, enabled: bool = True):
+        """
+        Args:
+            root: 仓库目录
+            max_size: 总大小上限 (字节)
+            enabled: 是否启用. 禁用时所有查询均未命中, 也不会写入
+        """
+        self.root = root
+        self.max_size = max_size
+        self.enabled = enabled
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._size = 0
+
+    @staticmethod
+    def digest(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    async def get(self, url: str) -> bytes | None:
+        """按来源 URL 读取图片"""
+        if not self.enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self._get, url)
+        except (OSError, sqlite3.Error):  # 仓库不可用时不影响下载
+            return None
+
+    async def put(self, url: str, content: bytes) -> None:
+        """存入已检查完整的图片"""
+        if not self.enabled:
+            return
+        with contextlib.suppress(OSError, sqlite3.Error):
+            await asyncio.to_thread(self._put, url, content)
+
+    async def link(self, content: bytes, dst: Path) -> bool:
+        """
+        仓库中存在相同内容时, 通过写时复制或硬链接输出到 dst.
+
+        Returns:
+            是否成功. 仓库中没有此内容或链接失败时返回 False, 调用方应自行写入
+        """
+        if not self.enabled:
+            return False
+        try:
+            return await asyncio.to_thread(self._link, content, dst)
+        except (OSError, sqlite3.Error):
+            return False
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._clear)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.root / "index.db", check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER, used_at REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_used_at ON blobs (used_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, digest TEXT)")
+            self._size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _get(self, url: str) -> bytes | None:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT digest FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        digest = row[0]
+        try:
+            content = self._object_path(digest).read_bytes()
+        except OSError:
+            content = None
+        # 硬链接的输出文件被其他程序原地修改时, 仓库中的内容也会改变
+        if content is None or self.digest(content) != digest:
+            with self._lock:
+                self._remove(conn, digest)
+                conn.commit()
+            return None
+        with self._lock:
+            conn.execute("UPDATE blobs SET used_at = ? WHERE digest = ?", (time.time(), digest))
+            conn.commit()
+        return content
+
+    def _put(self, url: str, content: bytes) -> None:
+        digest = self.digest(content)
+        path = self._object_path(digest)
+        with self._lock:
+            conn = self._connect()
+            exists = conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if not exists or not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_suffix(".part")
+            temp.write_bytes(content)
+            os.replace(temp, path)
+        with self._lock:
+            if not conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone():
+                self._size += len(content)
+            conn.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)", (digest, len(content), time.time()))
+            conn.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, digest))
+            if self._size > self.max_size:
+                self._evict(conn)
+            conn.commit()
+
+    def _link(self, content: bytes, dst: Path) -> bool:
+        digest = self.digest(content)
+        with self._lock:
+            conn = self._connect()
+            exists = conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if not exists:
+            return False
+        link_file(self._object_path(digest), dst)
+        return True
+
+    def _remove(self, conn: sqlite3.Connection, digest: str) -> None:
+        row = conn.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        conn.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+        self._object_path(digest).unlink(missing_ok=True)
+        if row:
+            self._size -= row[0]
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """按最近使用时间淘汰, 直到总大小降至上限的 90%"""
+        target = self.max_size * 0.9
+        for (digest,) in conn.execute("SELECT digest FROM blobs ORDER BY used_at").fetchall():
+            if self._size <= target:
+                break
+            self._remove(conn, digest)
+
+    def _clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            for (digest,) in conn.execute("SELECT digest FROM blobs").fetchall():
+                self._object_path(digest).unlink(missing_ok=True)
+            conn.execute("DELETE FROM blobs")
+            conn.execute("DELETE FROM urls")
+            conn.commit()
+            self._size = 0
@@ -140,6 +140,29 @@ async def move_file_async(old: str | Path, new: str | Path):
     return False, error_info
 
 
+def _write_file_atomic(p: Path, content: bytes):
+    temp = p.with_name(p.name + ".part")
+    try:
+        temp.write_bytes(content)
+        os.replace(temp, p)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+async def write_file_atomic(p: str | Path, content: bytes):
+    """异步写入文件. 先写入临时文件再重命名, 写入失败或中断时原文件保持不变"""
+    p = Path(p)
+    try:
+        await asyncio.to_thread(_write_file_atomic, p, content)
+        return True, ""
+    except Exception as e:
+        error_info = f" 写入文件: {p}\n 错误: {e}\n{traceback.format_exc()}"
+        signal.add_log(error_info)
+        print(error_info)
+    return False, error_info
+
+
 async def copy_file_async(old: str | Path, new: str | Path):
     """异步复制文件"""
     old = Path(old)
@@ -156,27 +179,3 @@ async def copy_file_async(old: str | Path, new: str | Path):
         signal.add_log(error_info)
         print(error_info)
     return False, error_info
-
-
-def _check_pic_blocking(p: str | Path):
-    """阻塞版本的图片检查，用于在线程中执行"""
-    with Image.open(p) as img:  # 如果文件不是图片，报错
-        img.load()  # 如果图片不完整，报错OSError: image file is truncated
-        return img.size
-
-
-async def check_pic_async(p: str | Path):
-    """异步检查图片文件"""
-    if await aiofiles.os.path.exists(p):
-        try:
-            # 在线程中执行PIL操作，因为PIL不支持异步
-            result = await asyncio.to_thread(_check_pic_blocking, p)
-            return result
-        except Exception as e:
-            signal.add_log(f"文件损坏: {p} \n Error: {e}")
-            try:
-                await aiofiles.os.remove(p)
-                signal.add_log("删除成功！")
-            except Exception:
-                signal.add_log("删除失败！")
-    return False
@@ -0,0 +1,384 @@
+"""
+图片处理进程池. 裁剪, 水印, 格式转换及完整性检查等 Pillow 操作均在此执行, 不占用事件循环及默认线程池.
+
+在工作进程中执行的函数必须为模块级函数, 且不能访问 manager, signal 等主进程状态, 所需配置由调用方作为参数传入.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import shutil
+import threading
+import traceback
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Literal
+
+from PIL import Image
+
+type ImageMode = Literal["thread", "process"]
+
+
+class _MarkIconCache:
+    """
+    水印图标缓存. 按 (图标路径, 目标高度) 缓存缩放后的图标, 用户替换图标文件后按 mtime 自动失效.
+
+    可在多个线程中使用. 进程池模式下每个工作进程各有一份.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._sources: dict[str, tuple[int, Image.Image]] = {}
+        self._scaled: OrderedDict[tuple[str, int], tuple[int, Image.Image]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, height: int) -> Image.Image:
+        mtime = os.stat(path).st_mtime_ns
+        key = (str(path), height)
+        with self._lock:
+            if (r := self._scaled.get(key)) is not None and r[0] == mtime:
+                self._scaled.move_to_end(key)
+                return r[1]
+            src = self._sources.get(key[0])
+        if src is None or src[0] != mtime:
+            with Image.open(path) as img:
+                src = (mtime, img.convert("RGBA"))
+        icon = src[1].resize((int(height * src[1].width / src[1].height), height), resample=Image.Resampling.LANCZOS)
+        with self._lock:
+            self._sources[key[0]] = src
+            self._scaled[key] = (mtime, icon)
+            while len(self._scaled) > self.maxsize:
+                self._scaled.popitem(last=False)
+        return icon
+
+
+_mark_icons = _MarkIconCache()
+
+
+def verify_image(p: str | Path) -> tuple[int, int]:
+    """完整解码一次图片, 返回尺寸. 文件不是图片或不完整时抛出异常."""
+    with Image.open(p) as img:  # 如果文件不是图片，报错
+        img.load()  # 如果图片不完整，报错OSError: image file is truncated
+        return img.size
+
+
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def parse_image_size(head: bytes) -> tuple[int, int] | None:
+    """
+    从文件开头解析图片尺寸, 不依赖 Pillow. 支持 JPEG, PNG, WebP 及 GIF.
+
+    Returns:
+        (宽, 高). 格式不支持或数据不足时返回 None
+    """
+    if head.startswith(b"\xff\xd8"):
+        # 逐个跳过标记段, 直到帧头 (SOF). EXIF 等段可能较大, 需要足够的数据
+        i = 2
+        while i + 9 <= len(head):
+            if head[i] != 0xFF:
+                return None
+            marker = head[i + 1]
+            if marker == 0xFF:  # 填充字节
+                i += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD9:  # 无长度的标记
+                i += 2
+                continue
+            if marker in _JPEG_SOF:
+                h = int.from_bytes(head[i + 5 : i + 7], "big")
+                w = int.from_bytes(head[i + 7 : i + 9], "big")
+                return (w, h) if w and h else None
+            i += 2 + int.from_bytes(head[i + 2 : i + 4], "big")
+        return None
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and len(head) >= 24 and head[12:16] == b"IHDR":
+        return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP" and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+            return int.from_bytes(head[26:28], "little") & 0x3FFF, int.from_bytes(head[28:30], "little") & 0x3FFF
+        if chunk == b"VP8L" and head[20] == 0x2F:
+            bits = int.from_bytes(head[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+        return None
+    if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+        return int.from_bytes(head[6:8], "little"), int.from_bytes(head[8:10], "little")
+    return None
+
+
+def probe_image(content: bytes) -> tuple[int, int] | None:
+    """
+    不解码像素, 仅通过文件头及文件尾检查图片是否完整. 可在事件循环中直接调用.
+
+    Returns:
+        图片尺寸. 格式无法确定或首尾检查未通过时返回 None, 此时应使用 `decode_image` 完整解码确认.
+        部分服务器会在文件尾部附加额外数据, 因此首尾检查未通过不能直接视为损坏
+    """
+    if len(content) < 2048:  # 过小的文件首尾可能重叠, 如 JPEG 的 EXIF 缩略图
+        return None
+    tail = content[-1024:].rstrip(b"\0\r\n ")
+    if content.startswith(b"\xff\xd8"):
+        # 熵编码数据中的 0xFF 总是跟随 0x00 或 RST 标记, 因此 EOI 只会出现在末尾
+        complete = tail.endswith(b"\xff\xd9")
+    elif content.startswith(b"\x89PNG\r\n\x1a\n"):
+        complete = tail.endswith(b"IEND\xaeB`\x82")
+    elif content.startswith(b"RIFF") and content[8:12] == b"WEBP":
+        complete = int.from_bytes(content[4:8], "little") + 8 <= len(content)
+    else:
+        return None
+    if not complete:
+        return None
+    if size := parse_image_size(content):
+        return size
+    with Image.open(BytesIO(content)) as img:  # 仅读取文件头
+        return img.size
+
+
+def decode_image(content: bytes, jpeg: bool = False) -> tuple[bytes, tuple[int, int]]:
+    """
+    完整解码一次图片, 检查是否完整.
+
+    Args:
+        content: 图片内容
+        jpeg: 是否转换为 JPEG, 如 WebP 图片需保存为 jpg 时
+
+    Returns:
+        (图片内容, 尺寸). 不转换时返回原内容
+    """
+    with Image.open(BytesIO(content)) as img:
+        img.load()  # 如果图片不完整，报错OSError: image file is truncated
+        if not jpeg:
+            return content, img.size
+        out = BytesIO()
+        img.convert("RGB").save(out, format="JPEG", quality=95, subsampling=0)
+        return out.getvalue(), img.size
+
+
+def poster_box(size: tuple[int, int], image_cut: str) -> tuple[str, tuple[float, float, float, float] | None]:
+    """
+    根据 thumb 尺寸确定 poster 的裁剪方式及区域.
+
+    Args:
+        size: thumb 尺寸
+        image_cut: 裁剪方式, 为空时根据宽高比自动选择
+
+    Returns:
+        (裁剪方式, 裁剪区域). 裁剪方式为 no 时区域为 None, 表示直接复制 thumb
+    """
+    w, h = size
+    prop = h / w
+    if not image_cut:
+        if prop >= 1.4:
+            image_cut = "no"
+        elif prop >= 1:
+            image_cut = "center"
+        else:
+            image_cut = "right"
+
+    # 不裁剪
+    if image_cut == "no":
+        return image_cut, None
+    # 中间裁剪
+    if image_cut == "center":
+        ax = int((w - h / 1.5) / 2)
+        return image_cut, (ax, 0, ax + int(h / 1.5), int(h))
+    # 右边裁剪
+    if w == 800:
+        if h == 439:
+            return image_cut, (420, 0, w, h)
+        elif h >= 499 and h <= 503:
+            return image_cut, (437, 0, w, h)
+        return image_cut, (421, 0, w, h)
+    elif w == 840 and h == 472:
+        return image_cut, (473, 0, 788, h)
+    return image_cut, (w / 1.9, 0, w, h)
+
+
+def cut_poster(thumb_path: Path, poster_path: Path, image_cut: str) -> str:
+    """
+    从 thumb 裁剪 poster. thumb 仅解码一次; 写入完成即视为有效, 无需再次解码检查.
+
+    Returns:
+        poster 来源: copy thumb, thumb center 或 thumb right
+    """
+    with Image.open(thumb_path) as img:
+        image_cut, box = poster_box(img.size, image_cut)
+        if box is None:
+            shutil.copy(thumb_path, poster_path)
+            return "copy thumb"
+        img.convert("RGB").crop(box).save(poster_path, format="JPEG", quality=95, subsampling=0)
+    return f"thumb {image_cut}"
+
+
+def mark_position(
+    mark_fixed: str, mark_pos_corner: str, size: tuple[int, int], icon_size: tuple[int, int], count: int
+) -> tuple[int, int]:
+    width, height = size
+    scroll_width, scroll_high = icon_size
+    # 固定一个位置
+    if mark_fixed == "corner":
+        corner_dic = {
+            "top_left": [(0, 0), (scroll_width, 0), (scroll_width * 2, 0)],
+            "bottom_left": [
+                (0, height - scroll_high),
+                (scroll_width, height - scroll_high),
+                (scroll_width * 2, height - scroll_high),
+            ],
+            "top_right": [
+                (width - scroll_width * 4, 0),
+                (width - scroll_width * 2, 0),
+                (width - scroll_width, 0),
+            ],
+            "bottom_right": [
+                (width - scroll_width * 4, height - scroll_high),
+                (width - scroll_width * 2, height - scroll_high),
+                (width - scroll_width, height - scroll_high),
+            ],
+        }
+        return corner_dic[mark_pos_corner][count]
+    # 封面四个角的位置
+    return [
+        (0, 0),
+        (width - scroll_width, 0),
+        (width - scroll_width, height - scroll_high),
+        (0, height - scroll_high),
+    ][count]
+
+
+@dataclass
+class MarkJob:
+    """一部影片的水印任务, 包含需要加水印的全部图片"""
+
+    pics: list[Path]
+    marks: list[tuple[Path, int]]
+    """(图标路径, 位置序号)"""
+    mark_size: int
+    mark_fixed: str
+    mark_pos_corner: str
+    errors: list[str] = field(default_factory=list)
+
+
+def _render_marks(job: MarkJob, content: bytes, name: Path) -> bytes | None:
+    try:
+        img_pic = Image.open(BytesIO(content))
+        img_pic.load()  # 图片下载不完整时在此处失败
+    except Exception:
+        job.errors.append(f"{traceback.format_exc()}\n Open Pic: {name}")
+        return None
+
+    with img_pic:
+        scroll_high = int(img_pic.height * job.mark_size / 40)
+        for icon_path, count in job.marks:
+            try:
+                icon = _mark_icons.get(icon_path, scroll_high)
+            except Exception:
+                job.errors.append(f"{traceback.format_exc()}\n Open Pic: {icon_path}")
+                continue
+            try:
+                position = mark_position(job.mark_fixed, job.mark_pos_corner, img_pic.size, icon.size, count)
+                img_pic.paste(icon, position, mask=icon)  # 以 alpha 通道为蒙版, 保持png的透明性
+            except Exception:
+                job.errors.append(traceback.format_exc())
+        out = BytesIO()
+        try:
+            img_pic.convert("RGB").save(out, format="JPEG", quality=95, subsampling=0)
+        except Exception:
+            job.errors.append(traceback.format_exc())
+            return None
+    return out.getvalue()
+
+
+def add_marks(job: MarkJob) -> list[str]:
+    """
+    为一部影片的所有图片合成水印, 并通过临时文件原子地替换原图.
+
+    fanart 及部分 poster 是 thumb 的副本, 内容相同的图片只解码及编码一次.
+
+    Returns:
+        错误信息列表. 单个水印失败时跳过该水印, 原图无法读取或写入失败时原图保持不变.
+    """
+    rendered: dict[bytes, bytes | None] = {}
+    for pic_path in job.pics:
+        try:
+            content = pic_path.read_bytes()
+        except Exception:
+            job.errors.append(f"{traceback.format_exc()}\n Open Pic: {pic_path}")
+            continue
+        if content not in rendered:
+            rendered[content] = _render_marks(job, content, pic_path)
+        if (result := rendered[content]) is None:
+            continue
+        temp_pic_path = pic_path.with_suffix(".[MARK].jpg")
+        try:
+            temp_pic_path.write_bytes(result)
+            os.replace(temp_pic_path, pic_path)
+        except Exception:
+            job.errors.append(traceback.format_exc())
+            temp_pic_path.unlink(missing_ok=True)
+    return job.errors
+
+
+class ImagePool:
+    """
+    图片处理执行器.
+
+    - thread: 线程池. Pillow 解码及编码时会释放 GIL, 但缩放, 粘贴等操作仍会互相阻塞
+    - process: 进程池. 完全绕过 GIL, 图片较多时可充分利用多核
+
+    进程池启动开销较大, 首次使用时才创建. 工作进程使用 spawn 方式启动, 不继承主进程的线程及锁等状态.
+    """
+
+    def __init__(self, mode: ImageMode = "process", workers: int = 0):
+        """
+        Args:
+            mode: 执行方式
+            workers: 工作线程/进程数, 0 表示根据 CPU 数自动确定
+        """
+        self.mode = mode
+        self.workers = workers or min(os.cpu_count() or 1, 4)
+        self._pool: Executor | None = None
+        self._lock = threading.Lock()
+
+    def configure(self, mode: ImageMode, workers: int = 0) -> None:
+        """
+        修改配置. 配置变化时下次使用按新配置创建新的池.
+
+        刮削中保存设置时, 旧池中已提交的任务仍会执行完毕, 之后旧池自动退出.
+        """
+        workers = workers or min(os.cpu_count() or 1, 4)
+        if (mode, workers) != (self.mode, self.workers):
+            with self._lock:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                    self._pool = None
+                self.mode, self.workers = mode, workers
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="image")
+            return self._pool
+
+    async def run[R](self, fn: Callable[..., R], *args: Any) -> R:
+        """执行一个图片处理函数. 进程池模式下 fn 及参数必须可序列化, 即 fn 必须为模块级函数."""
+        return await asyncio.get_running_loop().run_in_executor(self._get_pool(), fn, *args)
+
+    def close(self) -> None:
+        """关闭并取消尚未开始的任务, 用于程序退出"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+image_pool = ImagePool()
+"""全局实例, 由 `Computed` 根据配置调整"""
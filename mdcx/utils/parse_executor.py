@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable, Coroutine
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Literal
+
+from parsel import Selector
+
+type ParseMode = Literal["none", "thread", "process"]
+
+
+def run_sync[R](coro: Coroutine[Any, Any, R]) -> R:
+    """
+    同步执行不含真实 IO 的协程, 如 `DetailPageParser` 的各字段方法.
+
+    这类协程仅为接口统一而声明为 async, 不会真正挂起. 若协程试图挂起, 说明其中存在 IO, 不能在工作线程/进程中执行.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    coro.close()
+    raise RuntimeError(f"协程 {coro.__qualname__} 在解析过程中挂起, 解析方法中不应包含 IO 操作")
+
+
+def build_selector(html: str) -> Selector:
+    return Selector(text=html)
+
+
+class ParseExecutor:
+    """
+    HTML 解析执行器. 将 lxml 解析及 XPath 查询移出事件循环, 避免大页面阻塞计时器, 限速器及 websocket 心跳等.
+
+    - none: 在事件循环中直接执行, 与旧行为一致
+    - thread: 线程池. lxml 解析时会释放 GIL, 适用于大多数情况
+    - process: 进程池. 完全绕过 GIL, 但参数及结果需在进程间序列化. `Selector` 无法序列化, 因此只有
+      `DetailPageParser.parse_html` 会使用进程池, 构造 `Selector` 仍在线程池中执行
+
+    进程池启动开销较大, 首次使用时才创建. 工作进程使用 spawn 方式启动, 不继承主进程的线程及事件循环状态.
+    """
+
+    def __init__(self, mode: ParseMode = "thread", workers: int = 0):
+        """
+        Args:
+            mode: 执行方式
+            workers: 工作线程/进程数, 0 表示根据 CPU 数自动确定
+        """
+        self.mode = mode
+        self.workers = workers or min(os.cpu_count() or 1, 8)
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def configure(self, mode: ParseMode, workers: int = 0) -> None:
+        """
+        修改配置. 配置变化时下次使用按新配置创建新的池.
+
+        刮削中保存设置时, 旧池中已提交的任务仍会执行完毕, 之后旧池自动退出.
+        """
+        workers = workers or min(os.cpu_count() or 1, 8)
+        if (mode, workers) != (self.mode, self.workers):
+            with self._lock:
+                self._shutdown(cancel_futures=False)
+                self.mode, self.workers = mode, workers
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(self.workers, thread_name_prefix="parse")
+            return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._processes
+
+    async def _run[R](self, pool: Executor | None, fn: Callable[..., R], *args: Any) -> R:
+        if pool is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+    async def selector(self, html: str) -> Selector:
+        """构造 `Selector`. 进程池模式下同样使用线程池."""
+        return await self._run(None if self.mode == "none" else self._thread_pool(), build_selector, html)
+
+    async def run[R](self, fn: Callable[..., R], *args: Any) -> R:
+        """
+        执行一个解析函数. 进程池模式下 fn 及参数必须可序列化, 即 fn 必须为模块级函数.
+        """
+        match self.mode:
+            case "none":
+                pool = None
+            case "thread":
+                pool = self._thread_pool()
+            case "process":
+                pool = self._process_pool()
+        return await self._run(pool, fn, *args)
+
+    def close(self) -> None:
+        """关闭并取消尚未开始的任务, 用于程序退出"""
+        with self._lock:
+            self._shutdown(cancel_futures=True)
+
+    def _shutdown(self, cancel_futures: bool) -> None:
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=cancel_futures)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=cancel_futures)
+            self._processes = None
+
+
+default_parse_executor = ParseExecutor()
+"""全局实例, 由 `Computed` 根据配置调整. 未指定执行器时也使用此实例"""
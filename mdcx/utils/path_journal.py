@@ -0,0 +1,100 @@
+import os
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+
+class PathJournal:
+    """
+    持久化的路径集合, 用于成功刮削列表.
+
+    文件格式为每行一个路径, 与旧版 success.txt 兼容. 新增的路径以追加方式写入, 无需重写整个文件;
+    仅在清空列表或重复行过多时, 才通过临时文件原子地重写 (压缩).
+
+    内存中以 str 保存路径, 占用远小于 Path 对象. 成员检查同时接受 str 和 Path.
+    按 `os.path.normcase` 比较路径, Windows 上不区分大小写及分隔符; 写入文件及遍历时保留原始写法.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._paths: dict[str, str] = {}  # normcase 后的路径 -> 原始路径. POSIX 上两者为同一对象
+        self._pending: list[str] = []
+        self._lines = 0  # 文件中的行数, 包括重复行
+        self._rewrite = False
+        self._newline = False  # 文件末尾缺少换行符, 如手动编辑后
+        self._lock = threading.Lock()
+
+    def __contains__(self, p: object) -> bool:
+        return os.path.normcase(str(p)) in self._paths
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __iter__(self) -> Iterator[Path]:
+        return (Path(p) for p in list(self._paths.values()))
+
+    def add(self, p: str | Path) -> None:
+        s = str(p)
+        key = os.path.normcase(s)
+        with self._lock:
+            if key not in self._paths:
+                self._paths[key] = s
+                self._pending.append(s)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._paths.clear()
+            self._pending.clear()
+            self._rewrite = True
+
+    def load(self, path: Path) -> None:
+        """从文件载入, 替换当前内容. 忽略空行及无扩展名的行."""
+        paths: dict[str, str] = {}
+        lines = 0
+        line = ""
+        try:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    if (s := line.strip()) and (p := Path(s)).suffix:
+                        s = str(p)  # 规范化, 如手动编辑时写入的多余分隔符
+                        paths[os.path.normcase(s)] = s
+                        lines += 1
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.path = path
+            self._paths = paths
+            self._pending = []
+            self._lines = lines
+            self._rewrite = False
+            self._newline = bool(line) and not line.endswith("\n")
+
+    def flush(self) -> None:
+        """将新增路径追加到文件. 文件中重复行超过一半时压缩."""
+        if self.path is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._rewrite or self._lines + len(pending) > 2 * len(self._paths) + 1000:
+                self._compact()
+            elif pending:
+                with open(self.path, "a", encoding="utf-8", errors="ignore") as f:
+                    if self._newline:
+                        f.write("\n")
+                        self._newline = False
+                    f.writelines(p + "\n" for p in pending)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._lines += len(pending)
+
+    def _compact(self) -> None:
+        assert self.path is not None
+        paths = sorted(self._paths.values())
+        temp = self.path.with_name(self.path.name + ".tmp")
+        with open(temp, "w", encoding="utf-8", errors="ignore") as f:
+            f.writelines(p + "\n" for p in paths)
+            f.flush()
+            os.fsync(f.fileno())
+        temp.replace(self.path)
+        self._lines = len(paths)
+        self._rewrite = self._newline = False
@@ -0,0 +1,140 @@
+import asyncio
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+type ProbeResult = tuple[int, str]
+"""(高度, 编码格式)"""
+
+# 刚修改过的文件可能仍在写入 (下载, 复制中), 且低精度文件系统上后续修改可能不改变 mtime, 不缓存
+_RACY_NS = 2 * 10**9
+
+
+def _stat_key(p: Path) -> tuple[str, int, int]:
+    """
+    返回 (键, 大小, mtime_ns). 始终跟随软链接, 软链接与其目标使用同一条记录.
+
+    文件系统不提供 inode 时 (如部分网络文件系统) 以解析后的路径作为键.
+    """
+    st = os.stat(p)
+    key = f"{st.st_dev}:{st.st_ino}" if st.st_ino else "path:" + os.path.realpath(p)
+    return key, st.st_size, st.st_mtime_ns
+
+
+class ProbeCache:
+    """
+    视频探测结果缓存. 以 (设备, inode) 为键, 大小及 mtime 均未变时直接使用缓存结果, 不再打开视频文件.
+
+    重新刮削未修改的媒体库时, 只需 stat 各文件, 对网络文件系统尤其有效.
+    数据库操作在线程中执行; 写入先在内存中累积, 定期或调用 `flush` 时批量提交.
+    """
+
+    def __init__(self, path: Path, *, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[int, int, int, str]] = {}
+        self._last_flush = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, p: Path) -> ProbeResult | None:
+        return (await self.get_many([p])).get(p)
+
+    async def get_many(self, paths: Iterable[Path]) -> dict[Path, ProbeResult]:
+        """批量查询, 仅返回命中的文件"""
+        paths = list(paths)
+        if not self.enabled or not paths:
+            return {}
+        try:
+            return await asyncio.to_thread(self._get_many, paths)
+        except (OSError, sqlite3.Error):
+            return {}
+
+    async def put(self, p: Path, result: ProbeResult) -> None:
+        if not self.enabled:
+            return
+        with contextlib.suppress(OSError, sqlite3.Error):
+            await asyncio.to_thread(self._put, p, result)
+
+    async def flush(self) -> None:
+        with contextlib.suppress(OSError, sqlite3.Error):
+            await asyncio.to_thread(self._flush)
+
+    def close(self) -> None:
+        """写入尚未提交的结果并关闭数据库. 之后再次使用时会重新打开"""
+        with self._lock:
+            with contextlib.suppress(OSError, sqlite3.Error):
+                self._flush_locked()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS probes "
+                "(key TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, height INTEGER, codec TEXT)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _get_many(self, paths: list[Path]) -> dict[Path, ProbeResult]:
+        stats: dict[str, list[tuple[Path, int, int]]] = {}  # 软链接与其目标对应同一个键
+        for p in paths:
+            try:
+                key, size, mtime = _stat_key(p)
+            except OSError:
+                continue
+            stats.setdefault(key, []).append((p, size, mtime))
+        result: dict[Path, ProbeResult] = {}
+        keys = list(stats)
+        with self._lock:
+            conn = self._connect()
+            rows = []
+            for i in range(0, len(keys), 500):  # SQLite 参数数量有上限
+                batch = keys[i : i + 500]
+                rows += conn.execute(
+                    f"SELECT key, size, mtime_ns, height, codec FROM probes WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+            rows += [(k, *v) for k, v in self._pending.items() if k in stats]
+        for key, size, mtime, height, codec in rows:
+            for p, cur_size, cur_mtime in stats[key]:
+                if size == cur_size and mtime == cur_mtime:
+                    result[p] = (height, codec)
+        self.hits += len(result)
+        self.misses += len(paths) - len(result)
+        return result
+
+    def _put(self, p: Path, result: ProbeResult) -> None:
+        key, size, mtime = _stat_key(p)
+        if time.time_ns() - mtime < _RACY_NS:
+            return
+        with self._lock:
+            self._pending[key] = (size, mtime, result[0], result[1])
+            if len(self._pending) >= 100 or time.monotonic() - self._last_flush > 10:
+                self._flush_locked()
+
+    def _flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?)", [(k, *v) for k, v in self._pending.items()]
+        )
+        conn.commit()
+        self._pending.clear()
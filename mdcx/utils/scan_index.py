@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+type DirRecord = tuple[int, list[str], list[str], dict[str, str]]
+"""(mtime_ns, 子目录, 文件, 软链接文件 -> 目标)"""
+
+# mtime 精度较低的文件系统 (如 FAT, 部分网络文件系统) 上, 目录在同一时间单位内的后续修改不会改变 mtime.
+# 因此刚修改过的目录不写入 mtime, 下次仍重新读取
+_RACY_NS = 2 * 10**9
+
+
+class ScanIndex:
+    """
+    目录扫描索引. 记录每个目录的 mtime 及其直接包含的子目录, 文件和软链接.
+
+    目录 mtime 仅在其直接包含的条目增删或重命名时改变, 因此 mtime 未变的目录可直接使用记录的内容, 无需重新读取目录.
+    子目录仍需逐个检查 mtime, 但相比读取目录并逐个判断文件类型, 开销要小得多.
+
+    过滤规则 (扩展名, 跳过标记, 成功列表等) 由调用方在遍历结果上应用, 不影响索引内容, 因此修改配置后无需重建索引.
+    """
+
+    def __init__(self, path: Path | None = None):
+        """
+        Args:
+            path: 索引文件路径, 为 None 时不持久化
+        """
+        self.path = path
+        self._dirs: dict[str, DirRecord] = {}
+        self._visited: set[str] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path is not None:
+            self._load()
+
+    def _load(self):
+        assert self.path is not None
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == 1:
+                self._dirs = {k: (v[0], v[1], v[2], v[3]) for k, v in data["dirs"].items()}
+        except FileNotFoundError:
+            pass
+        except Exception:  # 索引损坏时重建
+            self._dirs = {}
+
+    def save(self, top: Path | None = None):
+        """
+        保存索引.
+
+        Args:
+            top: 已完整遍历的目录. 指定时, 移除此目录下本次未访问到的记录 (已删除或被忽略的目录)
+        """
+        with self._lock:
+            if top is not None:
+                prefix = os.path.join(str(top), "")
+                for key in [k for k in self._dirs if k.startswith(prefix) and k not in self._visited]:
+                    del self._dirs[key]
+            self._visited.clear()
+            if self.path is None:
+                return
+            data = json.dumps({"version": 1, "dirs": self._dirs}, ensure_ascii=False, separators=(",", ":"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(data, encoding="utf-8")
+        temp.replace(self.path)
+
+    def invalidate(self, folder: Path):
+        """目录内容被修改 (如删除文件) 后调用, 下次遍历时重新读取"""
+        with self._lock:
+            self._dirs.pop(str(folder), None)
+
+    def clear(self):
+        with self._lock:
+            self._dirs.clear()
+
+    def listdir(self, folder: Path) -> DirRecord | None:
+        """读取目录内容, mtime 未变时使用索引记录. 目录无法访问时返回 None."""
+        key = str(folder)
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            self._visited.add(key)
+            r = self._dirs.get(key)
+        if r is not None and r[0] == mtime and mtime:
+            self.hits += 1
+            return r
+
+        self.misses += 1
+        dirs, files, links = [], [], {}
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        # 与 Path.walk(follow_symlinks=False) 一致: 指向目录的软链接视为文件
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                            continue
+                        if entry.is_symlink():  # 通常可由 d_type 直接得到, 无需额外的 stat
+                            links[entry.name] = os.readlink(entry.path)
+                    except OSError:
+                        pass
+                    files.append(entry.name)
+        except OSError:
+            return None
+        dirs.sort()
+        files.sort()
+        if time.time_ns() - mtime < _RACY_NS:
+            mtime = 0
+        r = (mtime, dirs, files, links)
+        with self._lock:
+            self._dirs[key] = r
+        return r
+
+    def walk(self, top: Path) -> Iterator[tuple[Path, list[str], list[str], dict[str, str]]]:
+        """
+        与 `Path.walk(top_down=True)` 类似, 调用方可修改 dirs 以跳过子目录. 额外返回目录中的软链接.
+
+        返回的列表是副本, 修改不影响索引.
+        """
+        stack = [top]
+        while stack:
+            root = stack.pop()
+            if (r := self.listdir(root)) is None:
+                continue
+            _, dirs, files, links = r
+            dirs = dirs.copy()
+            yield root, dirs, files.copy(), links
+            stack.extend(root / d for d in reversed(dirs))
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any
+
+
+class SingleFlight[K, V = Any]:
+    """
+    按 key 合并并发执行的同类任务.
+
+    同一 key 仅有一个 leader 执行任务, 其余调用者 (follower) 等待 leader 的结果. leader 失败时, 由一个 follower 接任 leader 重新执行.
+    成功的结果会被保留, 之后加入的调用者直接获得该结果.
+    """
+
+    def __init__(self):
+        self._futures: dict[K, asyncio.Future[V | None]] = {}
+        self._owners: dict[asyncio.Task, K] = {}
+
+    async def join(self, key: K) -> tuple[bool, V | None]:
+        """
+        加入 key 对应的任务.
+
+        Returns:
+            (是否为 leader, leader 的结果). 成为 leader 时结果为 None, 需在结束时调用 done.
+        """
+        task = asyncio.current_task()
+        assert task is not None
+        while (future := self._futures.get(key)) is not None:
+            if self._owners.get(task) == key:
+                return True, None
+            # shield: follower 被取消时不影响 future 本身
+            if (r := await asyncio.shield(future)) is not None:
+                return False, r
+            # leader 失败, 第一个被唤醒的 follower 会发现 key 已被移除, 成为新的 leader
+        self._futures[key] = asyncio.get_running_loop().create_future()
+        self._owners[task] = key
+        return True, None
+
+    def done(self, result: V | None) -> None:
+        """
+        当前任务作为 leader 结束. result 为 None 表示失败, 此时唤醒等待者并提升其中一个为新的 leader.
+
+        当前任务不是 leader 时无操作.
+        """
+        task = asyncio.current_task()
+        if task is None or (key := self._owners.pop(task, None)) is None:
+            return
+        future = self._futures[key]
+        if result is None:
+            del self._futures[key]
+        future.set_result(result)
@@ -1,6 +1,7 @@
 import json
 import os
 import shutil
+import struct
 import subprocess
 from pathlib import Path
 
@@ -52,9 +53,249 @@ def get_video_metadata_ffmpeg(p: Path) -> tuple[int, str]:
     return height, codec_fourcc
 
 
+# 以下仅读取容器头部获取分辨率及编码格式, 不打开解封装器. 对网络共享上的文件, 只需少量小范围读取
+
+_MP4_TOP = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid", b"meta", b"styp", b"sidx"}
+_MP4_CODECS = {
+    b"avc1": "H264",
+    b"avc3": "H264",
+    b"hvc1": "HEVC",
+    b"hev1": "HEVC",
+    b"av01": "AV1",
+    b"vp09": "VP9",
+    b"vp08": "VP8",
+}
+_MKV_CODECS = {
+    "V_MPEG4/ISO/AVC": "H264",
+    "V_MPEGH/ISO/HEVC": "HEVC",
+    "V_AV1": "AV1",
+    "V_VP9": "VP9",
+    "V_VP8": "VP8",
+    "V_MPEG4/ISO/SP": "MPEG4",
+    "V_MPEG4/ISO/ASP": "MPEG4",
+    "V_MPEG4/ISO/AP": "MPEG4",
+    "V_MPEG2": "MPEG2VIDEO",
+    "V_MPEG1": "MPEG1VIDEO",
+    "V_MJPEG": "MJPEG",
+}
+_HEADER_LIMIT = 64 * 1024 * 1024  # moov 或 Tracks 超过此大小时不读取
+
+
+def get_video_metadata_header(p: Path) -> tuple[int, str] | None:
+    """
+    仅读取 MP4/MOV 的 moov 及 MKV/WebM 的 Tracks 获取第一个视频流的高度及编码格式.
+
+    Returns:
+        无法解析 (其他格式, 文件损坏, 未知编码等) 时返回 None
+    """
+    try:
+        with open(p, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            magic = f.read(4)
+            if magic == b"\x1a\x45\xdf\xa3":
+                return _mkv_metadata(f, file_size)
+            if len(magic) == 4:
+                return _mp4_metadata(f, file_size)
+    except (OSError, ValueError, struct.error):
+        pass
+    return None
+
+
+def _mp4_boxes(data: bytes, start: int, end: int):
+    """遍历 [start, end) 内的 box, 生成 (类型, 内容开始, 内容结束)"""
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size, header = struct.unpack_from(">Q", data, pos + 8)[0], 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ValueError("box 大小无效")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _mp4_find(data: bytes, start: int, end: int, *path: bytes) -> tuple[int, int] | None:
+    for name in path:
+        for kind, s, e in _mp4_boxes(data, start, end):
+            if kind == name:
+                start, end = s, e
+                break
+        else:
+            return None
+    return start, end
+
+
+def _mp4_metadata(f, file_size: int) -> tuple[int, str] | None:
+    # 顶层 box 中仅读取 box 头, moov 可能位于 mdat 之后
+    pos = 0
+    moov = None
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        head = f.read(16)
+        size, kind = struct.unpack_from(">I4s", head)
+        header = 8
+        if size == 1:
+            size, header = struct.unpack_from(">Q", head, 8)[0], 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header or (pos == 0 and kind not in _MP4_TOP) or not kind.isascii():
+            return None  # 不是 MP4/MOV
+        if kind == b"moov":
+            if size > _HEADER_LIMIT:
+                return None
+            f.seek(pos + header)
+            moov = f.read(size - header)
+            break
+        pos += size
+    if moov is None:
+        return None
+    for kind, s, e in _mp4_boxes(moov, 0, len(moov)):
+        if kind != b"trak":
+            continue
+        hdlr = _mp4_find(moov, s, e, b"mdia", b"hdlr")
+        if hdlr is None or moov[hdlr[0] + 8 : hdlr[0] + 12] != b"vide":
+            continue
+        stsd = _mp4_find(moov, s, e, b"mdia", b"minf", b"stbl", b"stsd")
+        if stsd is None:
+            return None
+        # stsd: version/flags (4), entry_count (4), 之后为 VisualSampleEntry, 高度位于内容第 26 字节
+        for entry, es, ee in _mp4_boxes(moov, stsd[0] + 8, stsd[1]):
+            codec = _MP4_CODECS.get(entry)
+            if codec is None or ee - es < 28:
+                return None  # 未知编码或加密的视频流 (encv), 交由 pyav/ffprobe 处理
+            height = struct.unpack_from(">H", moov, es + 26)[0]
+            return (height, codec) if height else None
+        return None
+    return None
+
+
+def _vint(data: bytes, pos: int, marker: bool = False) -> tuple[int, int]:
+    """解析 EBML 变长整数, 返回 (值, 结束位置). marker 为 True 时保留长度标记位 (用于元素 ID). 大小未知时值为 -1"""
+    if pos >= len(data) or not data[pos]:
+        raise ValueError("EBML 变长整数无效")
+    length = 9 - data[pos].bit_length()
+    end = pos + length
+    if end > len(data):
+        raise ValueError("EBML 变长整数不完整")
+    value = int.from_bytes(data[pos:end])
+    if not marker:
+        mask = (1 << (7 * length)) - 1
+        value &= mask
+        if value == mask:
+            value = -1
+    return value, end
+
+
+def _ebml_children(data: bytes, start: int, end: int):
+    """遍历 [start, end) 内的 EBML 元素, 生成 (ID, 内容开始, 内容结束)"""
+    pos = start
+    while pos < end:
+        eid, pos = _vint(data, pos, marker=True)
+        size, pos = _vint(data, pos)
+        if size < 0 or pos + size > end:
+            raise ValueError("EBML 元素大小无效")
+        yield eid, pos, pos + size
+        pos += size
+
+
+_EBML_SEGMENT = 0x18538067
+_EBML_SEEK_HEAD = 0x114D9B74
+_EBML_TRACKS = 0x1654AE6B
+_EBML_CLUSTER = 0x1F43B675
+
+
+def _mkv_metadata(f, file_size: int) -> tuple[int, str] | None:
+    def read_header(pos: int) -> tuple[int, int, int]:
+        f.seek(pos)
+        head = f.read(12)
+        eid, n = _vint(head, 0, marker=True)
+        size, n = _vint(head, n)
+        return eid, size, pos + n
+
+    # EBML 头之后为 Segment
+    _, size, pos = read_header(0)
+    if size < 0:
+        return None
+    eid, seg_size, seg_start = read_header(pos + size)
+    if eid != _EBML_SEGMENT:
+        return None
+    seg_end = file_size if seg_size < 0 else min(seg_start + seg_size, file_size)
+    # 依次跳过 Segment 的子元素直到 Tracks. 遇到 Cluster 时按 SeekHead 中记录的位置跳转
+    tracks_pos = None
+    pos = seg_start
+    for _ in range(64):
+        if pos >= seg_end:
+            return None
+        eid, size, start = read_header(pos)
+        if eid == _EBML_TRACKS or eid == _EBML_SEEK_HEAD:
+            if size < 0 or size > _HEADER_LIMIT:
+                return None
+            f.seek(start)
+            data = f.read(size)
+            if eid == _EBML_TRACKS:
+                return _mkv_tracks(data)
+            tracks_pos = _mkv_seek(data, _EBML_TRACKS)
+            if tracks_pos is not None:
+                tracks_pos += seg_start
+        elif eid == _EBML_CLUSTER or size < 0:
+            if tracks_pos is None or tracks_pos <= pos:
+                return None
+            pos = tracks_pos
+            continue
+        pos = start + size
+    return None
+
+
+def _mkv_seek(data: bytes, target: int) -> int | None:
+    """从 SeekHead 中查找元素相对于 Segment 内容开始的位置"""
+    for eid, s, e in _ebml_children(data, 0, len(data)):
+        if eid != 0x4DBB:  # Seek
+            continue
+        seek_id = seek_pos = None
+        for cid, cs, ce in _ebml_children(data, s, e):
+            if cid == 0x53AB:  # SeekID
+                seek_id = _vint(data[cs:ce], 0, marker=True)[0]
+            elif cid == 0x53AC:  # SeekPosition
+                seek_pos = int.from_bytes(data[cs:ce])
+        if seek_id == target:
+            return seek_pos
+    return None
+
+
+def _mkv_tracks(data: bytes) -> tuple[int, str] | None:
+    for eid, s, e in _ebml_children(data, 0, len(data)):
+        if eid != 0xAE:  # TrackEntry
+            continue
+        track_type = height = 0
+        codec_id = ""
+        for cid, cs, ce in _ebml_children(data, s, e):
+            if cid == 0x83:  # TrackType
+                track_type = int.from_bytes(data[cs:ce])
+            elif cid == 0x86:  # CodecID
+                codec_id = data[cs:ce].rstrip(b"\0").decode("ascii", "replace")
+            elif cid == 0xE0:  # Video
+                for vid, vs, ve in _ebml_children(data, cs, ce):
+                    if vid == 0xBA:  # PixelHeight
+                        height = int.from_bytes(data[vs:ve])
+        if track_type == 1:
+            codec = _MKV_CODECS.get(codec_id)
+            return (height, codec) if codec and height else None
+    return None
+
+
 if av is not None:
     VIDEO_BACKEND = "pyav"
-    get_video_metadata = get_video_metadata_pyav
+    _get_video_metadata_backend = get_video_metadata_pyav
 else:
     VIDEO_BACKEND = "ffmpeg"
-    get_video_metadata = get_video_metadata_ffmpeg
+    _get_video_metadata_backend = get_video_metadata_ffmpeg
+
+
+def get_video_metadata(p: Path) -> tuple[int, str]:
+    """优先仅读取容器头部, 无法解析时使用 pyav/ffprobe"""
+    if (result := get_video_metadata_header(p)) is not None:
+        return result
+    return _get_video_metadata_backend(p)
@@ -0,0 +1,146 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from .probe_cache import ProbeCache, ProbeResult
+from .video import VIDEO_BACKEND, get_video_metadata
+
+
+def probe_batch(paths: list[str]) -> list[ProbeResult | str]:
+    """在工作进程中依次读取一批视频. 单个文件失败时返回错误信息, 不影响其他文件"""
+    results: list[ProbeResult | str] = []
+    for p in paths:
+        try:
+            results.append(get_video_metadata(Path(p)))
+        except Exception as e:
+            results.append(f"{type(e).__name__}: {e}")
+    return results
+
+
+class VideoProber:
+    """
+    视频分辨率读取服务.
+
+    收集所有刮削中的文件的读取请求, 按批次交给工作进程, 结果返回给各自等待的文件.
+    每批先从 `ProbeCache` 中批量查询, 仅读取未命中的文件.
+    同时执行的批次数即读取并发数, 与刮削并发数独立, 避免大量并发读取拖慢网络共享.
+
+    - pyav: 进程池 (spawn). 工作进程常驻, 仅在首次使用时导入 av; 损坏的文件导致工作进程崩溃时重建进程池
+    - ffprobe: 线程池. ffprobe 每次只能读取一个文件, 因此每个文件仍启动一次 ffprobe, 但并发数受同样的限制
+    """
+
+    BATCH = 4
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self.cache: ProbeCache | None = None
+        self._pool: Executor | None = None
+        self._lock = threading.Lock()
+        self._pending: dict[Path, list[asyncio.Future[ProbeResult]]] = {}
+        self._dispatcher: asyncio.Task | None = None
+        self._sem: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def configure(self, workers: int, cache: ProbeCache | None = None) -> None:
+        """修改配置. 并发数变化时下次使用按新配置创建新的池, 旧池中已提交的批次仍会执行完毕"""
+        self.cache = cache
+        workers = max(workers, 1)
+        if workers != self.workers:
+            with self._lock:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                    self._pool = None
+                self.workers = workers
+                self._sem = None
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if VIDEO_BACKEND == "pyav":
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="video")
+            return self._pool
+
+    def close(self) -> None:
+        """关闭并取消尚未开始的批次, 等待中的文件将收到异常"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    async def probe(self, p: Path) -> ProbeResult:
+        """
+        读取视频的高度及编码格式. 同一文件同时只读取一次.
+
+        Raises:
+            RuntimeError: 读取失败
+        """
+        future: asyncio.Future[ProbeResult] = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(p, []).append(future)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        return await future
+
+    async def _dispatch(self) -> None:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.workers)
+        sem = self._sem
+        await asyncio.sleep(0)  # 收集同一轮事件循环中的请求
+        while self._pending:
+            await sem.acquire()
+            # 等待期间新增的请求也会进入此批
+            batch = {p: self._pending.pop(p) for p in list(self._pending)[: self.BATCH]}
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(lambda _: sem.release())
+
+    async def _run_batch(self, batch: dict[Path, list[asyncio.Future[ProbeResult]]]) -> None:
+        try:
+            hits = await self.cache.get_many(batch) if self.cache is not None else {}
+            for p, result in hits.items():
+                _resolve(batch.pop(p), result)
+            if not batch:
+                return
+            paths = list(batch)
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self._get_pool(), probe_batch, [str(p) for p in paths]
+                )
+            except BrokenProcessPool:
+                self.close()  # 下次使用时重建
+                results = ["读取视频时工作进程异常退出, 文件可能已损坏"] * len(paths)
+            for p, result in zip(paths, results, strict=True):
+                if isinstance(result, str):
+                    _resolve(batch[p], RuntimeError(result))
+                    continue
+                if self.cache is not None:
+                    await self.cache.put(p, result)
+                _resolve(batch[p], result)
+        except asyncio.CancelledError:
+            # 进程池关闭时取消了尚未开始的批次, 或本任务被取消. 通知等待的文件, 避免一直等待
+            for futures in batch.values():
+                _resolve(futures, RuntimeError("读取视频已取消"))
+            if (task := asyncio.current_task()) is not None and task.cancelling():
+                raise
+        except Exception as e:
+            for futures in batch.values():
+                _resolve(futures, e)
+
+
+def _resolve(futures: list[asyncio.Future[ProbeResult]], result: ProbeResult | BaseException) -> None:
+    for f in futures:
+        if f.done():  # 等待的文件已取消
+            continue
+        if isinstance(result, BaseException):
+            f.set_exception(result)
+        else:
+            f.set_result(result)
+
+
+video_prober = VideoProber()
+"""全局实例, 由 `Computed` 根据配置调整"""
@@ -1,35 +1,149 @@
 import asyncio
+import contextlib
+import json
 import random
+import time
 from collections.abc import Callable
+from email.utils import parsedate_to_datetime
 from io import BytesIO
 from pathlib import Path
 from typing import Any
 
 import aiofiles
+import aiofiles.os
 import httpx
-from aiolimiter import AsyncLimiter
 from curl_cffi import AsyncSession, Response
 from curl_cffi.requests.exceptions import ConnectionError, RequestException, Timeout
 from curl_cffi.requests.session import HttpMethod
 from curl_cffi.requests.utils import not_set
-from PIL import Image
+
+from .metrics import HTTP_ERRORS, HTTP_SECONDS
+from .utils.blob_store import BlobStore
+from .utils.image_pool import decode_image, image_pool, probe_image
+from .web_cache import AsyncWebCache
+from .web_download import WRITE_BUFFER, RangeDownload, RangeUnsupported, cleanup_partial
+from .web_scheduler import DownloadPriority, DownloadScheduler
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 速率限制器: 请求成功时加性增加速率, 被限流时乘性降低速率, 并遵守服务器要求的 Retry-After.
+
+    并发请求可能同时被限流, 这些请求都是按降速前的速率发出的, 因此每次降速后, 只有此后取得许可的请求被限流才会再次降速.
+    """
+
+    def __init__(self, rate: float, *, min_rate: float = 0.2, max_rate: float = 20, increase: float = 1):
+        """
+        Args:
+            rate: 初始速率 (req/s)
+            increase: 以当前速率持续成功 1 秒后增加的速率
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.increase = increase
+        self._next = 0.0  # 下一个请求可开始的时间
+        self._blocked_until = 0.0
+        self._decreased_at = -1.0  # 上次降速的时间
+
+    async def acquire(self) -> float:
+        """等待直到可以发出请求. 返回取得许可的时间, 请求被限流时传给 `on_throttle`"""
+        now = time.monotonic()
+        start = max(now, self._next, self._blocked_until)
+        self._next = start + 1 / self.rate
+        if start > now:
+            await asyncio.sleep(start - now)
+        return now
+
+    def on_success(self):
+        self.rate = min(self.rate + self.increase / self.rate, self.max_rate)
+
+    def on_throttle(self, retry_after: float | None = None, acquired_at: float | None = None):
+        """
+        Args:
+            retry_after: 服务器要求等待的秒数
+            acquired_at: 被限流的请求取得许可的时间. 早于上次降速时不再降速, 为 None 时总是降速
+        """
+        now = time.monotonic()
+        if acquired_at is None or acquired_at >= self._decreased_at:
+            self.rate = max(self.rate / 2, self.min_rate)
+            self._decreased_at = now
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+        self._next = max(self._next, now + 1 / self.rate)
 
 
 class AsyncWebLimiters:
-    def __init__(self):
-        self.limiters: dict[str, AsyncLimiter] = {
-            "127.0.0.1": AsyncLimiter(300, 1),
-            "localhost": AsyncLimiter(300, 1),
+    def __init__(self, path: Path | None = None):
+        """
+        Args:
+            path: 保存各域名速率的文件, 下次运行时从此速率开始. 为 None 时不保存
+        """
+        self.path = path
+        self.limiters: dict[str, AdaptiveLimiter] = {
+            "127.0.0.1": AdaptiveLimiter(300, min_rate=300, max_rate=300),
+            "localhost": AdaptiveLimiter(300, min_rate=300, max_rate=300),
         }
+        self._saved_rates: dict[str, float] = {}
+        self._save_time = 0.0
+        if path is not None and path.is_file():
+            try:
+                self._saved_rates = {k: float(v) for k, v in json.loads(path.read_text(encoding="utf-8")).items()}
+            except Exception:
+                pass
 
-    def get(self, key: str, rate: float = 5, period: float = 1) -> AsyncLimiter:
-        """默认对所有域名启用 5 req/s 的速率限制"""
-        return self.limiters.setdefault(key, AsyncLimiter(rate, period))
+    def get(self, key: str, rate: float = 5, period: float = 1) -> AdaptiveLimiter:
+        """默认对所有域名以 5 req/s 的速率开始, 此后根据响应自动调整"""
+        if key not in self.limiters:
+            self.limiters[key] = AdaptiveLimiter(self._saved_rates.get(key, rate / period))
+        return self.limiters[key]
 
     def remove(self, key: str):
         if key in self.limiters:
             del self.limiters[key]
 
+    def save(self, force: bool = True):
+        """
+        保存各域名当前速率.
+
+        Args:
+            force: 为 False 时距上次保存不足 30 秒则跳过
+        """
+        if self.path is None or (not force and time.monotonic() - self._save_time < 30):
+            return
+        self._save_time = time.monotonic()
+        rates = self._saved_rates | {k: round(v.rate, 2) for k, v in self.limiters.items() if v.min_rate != v.max_rate}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(rates, indent=2), encoding="utf-8")
+        except Exception:
+            pass
+
+
+def _parse_retry_after(value: str | None, max_wait: float = 60) -> float | None:
+    """解析 Retry-After, 支持秒数及 HTTP 日期两种格式. 最多等待 max_wait 秒"""
+    if not value:
+        return None
+    try:
+        return min(max(float(value), 0), max_wait)
+    except ValueError:
+        pass
+    try:
+        return min(max(parsedate_to_datetime(value).timestamp() - time.time(), 0), max_wait)
+    except Exception:
+        return None
+
+
+def _is_throttled(resp: Response, stream: bool) -> bool:
+    """是否为限流响应: 429/503 或 Cloudflare 质询页"""
+    if resp.status_code in (429, 503):
+        return True
+    if resp.headers.get("cf-mitigated") == "challenge":
+        return True
+    if resp.status_code == 403 and not stream and "cloudflare" in (resp.headers.get("Server") or "").lower():
+        return b"Just a moment" in resp.content[:4096]
+    return False
+
 
 class AsyncWebClient:
     def __init__(
@@ -40,6 +154,9 @@ class AsyncWebClient:
         timeout: float,
         log_fn: Callable[[str], None] | None = None,
         limiters: AsyncWebLimiters | None = None,
+        cache: AsyncWebCache | None = None,
+        blobs: BlobStore | None = None,
+        scheduler: DownloadScheduler | None = None,
         loop=None,
     ):
         self.retry = retry
@@ -55,6 +172,11 @@ class AsyncWebClient:
 
         self.log_fn = log_fn if log_fn is not None else lambda _: None
         self.limiters = limiters if limiters is not None else AsyncWebLimiters()
+        self.cache = cache
+        self._cache_pending: dict[str, tuple[str, bytes, str, str]] = {}
+        """等待调用方校验后写入缓存的响应: key -> (url, body, etag, last_modified)"""
+        self.blobs = blobs if blobs is not None else BlobStore(Path(), enabled=False)
+        self.scheduler = scheduler if scheduler is not None else DownloadScheduler()
 
     def _prepare_headers(self, url: str | None = None, headers: dict[str, str] | None = None) -> dict[str, str]:
         """预处理请求头"""
@@ -108,12 +230,16 @@ class AsyncWebClient:
         try:
             u = httpx.URL(url)
             headers = self._prepare_headers(url, headers)
-            await self.limiters.get(u.host).acquire()
+            conditional = "If-None-Match" in headers or "If-Modified-Since" in headers
+            limiter = self.limiters.get(u.host)
             retry_count = self.retry
             error_msg = ""
             for attempt in range(retry_count):
                 # 采用保守的重试策略, 除特定状态码外不进行重试
                 retry = False
+                retry_after = None
+                acquired_at = await limiter.acquire()
+                start = time.perf_counter()
                 try:
                     resp: Response = await self.curl_session.request(
                         method,
@@ -127,31 +253,49 @@ class AsyncWebClient:
                         stream=stream,
                         allow_redirects=allow_redirects,
                     )
+                    HTTP_SECONDS.observe(time.perf_counter() - start, u.host)
                     # 检查响应状态
-                    if resp.status_code >= 300 and not (resp.status_code == 302 and resp.headers.get("Location")):
+                    if (
+                        resp.status_code >= 300
+                        and not (resp.status_code == 302 and resp.headers.get("Location"))
+                        and not (resp.status_code == 304 and conditional)
+                    ):
                         error_msg = f"HTTP {resp.status_code}"
+                        HTTP_ERRORS.inc(u.host, str(resp.status_code))
                         retry = resp.status_code in (
                             408,  # Request Timeout
                             429,  # Too Many Requests
                             504,  # Gateway Timeout
                         )
+                        if _is_throttled(resp, stream):
+                            # 被限流, 降低该域名的请求速率
+                            retry = True
+                            retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+                            limiter.on_throttle(retry_after, acquired_at)
+                            self.limiters.save(force=False)
+                            self.log_fn(f"🐢 {u.host} 触发限流, 速率降至 {limiter.rate:.2f} req/s")
                     else:
+                        limiter.on_success()
                         self.log_fn(f"✅ {method} {url} 成功")
                         return resp, ""
                 except Timeout:
                     error_msg = "连接超时"
+                    HTTP_ERRORS.inc(u.host, "timeout")
                 except ConnectionError as e:
                     error_msg = f"连接错误: {str(e)}"
+                    HTTP_ERRORS.inc(u.host, "connection")
                 except RequestException as e:
                     error_msg = f"请求异常: {str(e)} {e.code}"
+                    HTTP_ERRORS.inc(u.host, "request")
                 except Exception as e:
                     error_msg = f"curl-cffi 异常: {str(e)}"
+                    HTTP_ERRORS.inc(u.host, "other")
                 if not retry:
                     break
                 self.log_fn(f"🔴 {method} {url} 失败: {error_msg} ({attempt + 1}/{retry_count})")
                 # 重试前等待
                 if attempt < retry_count - 1:
-                    await asyncio.sleep(attempt * 3 + 2)
+                    await asyncio.sleep(retry_after if retry_after is not None else attempt * 3 + 2)
             return None, f"{method} {url} 失败: {error_msg}"
         except Exception as e:
             error_msg = f"{method} {url} 未知错误:  {str(e)}"
@@ -166,8 +310,22 @@ class AsyncWebClient:
         cookies: dict[str, str] | None = None,
         encoding: str = "utf-8",
         use_proxy: bool = True,
+        cache_site: str | None = None,
+        cache_deferred: bool = False,
+        cache_search: bool = False,
     ) -> tuple[str | None, str]:
-        """请求文本内容"""
+        """
+        请求文本内容
+
+        Args:
+            cache_site: 使用响应缓存, 并按此网站的设置确定有效期. 为 None 时不使用缓存
+            cache_deferred: 响应不立即写入缓存, 调用方校验内容 (如成功解析) 后调用 `commit_cache` 写入.
+                避免缓存验证页, 错误页等
+            cache_search: 为搜索页, 使用搜索页的有效期
+        """
+        if cache_site is not None and self.cache is not None and self.cache.enabled:
+            ttl = self.cache.get_ttl(cache_site, cache_search)
+            return await self._get_text_cached(url, ttl, headers, cookies, encoding, use_proxy, cache_deferred)
         resp, error = await self.request("GET", url, headers=headers, cookies=cookies, use_proxy=use_proxy)
         if resp is None:
             return None, error
@@ -177,6 +335,61 @@ class AsyncWebClient:
         except Exception as e:
             return None, f"文本解析失败: {str(e)}"
 
+    async def _get_text_cached(
+        self,
+        url: str,
+        ttl: float,
+        headers: dict[str, str] | None,
+        cookies: dict[str, str] | None,
+        encoding: str,
+        use_proxy: bool,
+        deferred: bool,
+    ) -> tuple[str | None, str]:
+        """优先使用有效期内的缓存; 过期后如有 ETag/Last-Modified 则发送条件请求, 304 时继续使用缓存"""
+        assert self.cache is not None
+        cache = self.cache
+        key = cache.make_key(url, cookies)
+        entry = None if cache.force_refresh else await cache.get(key)
+        if entry is not None and entry.fresh(ttl):
+            self.log_fn(f"💾 GET {url} 使用缓存")
+            return entry.body.decode(encoding, errors="replace"), ""
+
+        headers = dict(headers) if headers else {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        resp, error = await self.request("GET", url, headers=headers, cookies=cookies, use_proxy=use_proxy)
+        if resp is None:
+            return None, error
+        if resp.status_code == 304 and entry is not None:
+            self.log_fn(f"💾 GET {url} 未修改, 使用缓存")
+            await cache.touch(key)
+            return entry.body.decode(encoding, errors="replace"), ""
+        try:
+            resp.encoding = encoding
+            text = resp.text
+        except Exception as e:
+            return None, f"文本解析失败: {str(e)}"
+        if resp.status_code == 200:
+            item = (url, resp.content, resp.headers.get("ETag") or "", resp.headers.get("Last-Modified") or "")
+            if deferred:
+                self._cache_pending.pop(key, None)
+                self._cache_pending[key] = item
+                if len(self._cache_pending) > 256:  # 未校验通过的响应不会被提交, 丢弃最早的
+                    del self._cache_pending[next(iter(self._cache_pending))]
+            else:
+                await cache.put(key, *item)
+        return text, ""
+
+    async def commit_cache(self, url: str, cookies: dict[str, str] | None = None) -> None:
+        """将 `get_text(..., cache_deferred=True)` 获取的响应写入缓存. 响应来自缓存或已提交时无操作"""
+        if self.cache is None:
+            return
+        if (item := self._cache_pending.pop(self.cache.make_key(url, cookies), None)) is not None:
+            await self.cache.put(self.cache.make_key(url, cookies), *item)
+
     async def get_content(
         self,
         url: str,
@@ -192,6 +405,50 @@ class AsyncWebClient:
 
         return resp.content, ""
 
+    async def get_image(
+        self,
+        url: str,
+        *,
+        jpeg: bool = False,
+        use_proxy: bool = True,
+        priority: DownloadPriority = DownloadPriority.IMAGE,
+        group: str = "",
+    ) -> tuple[tuple[bytes, tuple[int, int]] | None, str]:
+        """
+        下载图片到内存并检查完整性. 优先通过文件头及文件尾检查, 无法确定时在图片处理池中完整解码一次.
+        启用图片仓库时, 先从仓库中查找相同 URL 的图片, 下载的图片也会存入仓库.
+
+        Args:
+            url: 图片链接
+            jpeg: 是否转换为 JPEG
+            use_proxy: 是否使用代理
+            priority: 下载优先级
+            group: 下载调度的分组, 通常为番号
+
+        Returns:
+            ((图片内容, 尺寸) 或 None, 错误信息)
+        """
+        key = url + "#jpeg" if jpeg else url
+        if content := await self.blobs.get(key):
+            # 仓库中的图片已检查过完整性, 不再转换格式
+            try:
+                return (content, probe_image(content) or (await image_pool.run(decode_image, content))[1]), ""
+            except Exception:
+                pass
+        async with self.scheduler.slot(url, priority, group):
+            content, error = await self.get_content(url, use_proxy=use_proxy)
+            if content:
+                await self.scheduler.consume(len(content))
+        if not content:
+            return None, error
+        try:
+            if jpeg or not (size := probe_image(content)):
+                content, size = await image_pool.run(decode_image, content, jpeg)
+        except Exception as e:
+            return None, f"图片损坏: {str(e)}"
+        await self.blobs.put(key, content)
+        return (content, size), ""
+
     async def get_json(
         self,
         url: str,
@@ -288,119 +545,143 @@ class AsyncWebClient:
         self.log_fn(f"🔴 获取文件大小失败: {url} HTTP {response.status_code}")
         return None
 
-    async def download(self, url: str, file_path: Path, *, use_proxy: bool = True) -> bool:
+    async def download(
+        self,
+        url: str,
+        file_path: Path,
+        *,
+        use_proxy: bool = True,
+        file_size: int | None = None,
+        priority: DownloadPriority = DownloadPriority.IMAGE,
+        group: str = "",
+    ) -> bool:
         """
-        下载文件. 当文件较大时分块下载
+        下载文件. 当文件较大时分块下载, 支持续传
 
         Args:
             url: 下载链接
             file_path: 保存路径
             use_proxy: 是否使用代理
+            file_size: 文件大小, 调用方已知时传入, 可省去一次 HEAD 请求
+            priority: 下载优先级
+            group: 下载调度的分组, 通常为番号
 
         Returns:
             bool: 下载是否成功
         """
         # 获取文件大小
-        file_size = await self.get_filesize(url, use_proxy=use_proxy)
+        if file_size is None:
+            file_size = await self.get_filesize(url, use_proxy=use_proxy)
         # 判断是不是webp文件
         webp = False
-        if file_path.suffix == "jpg" and ".webp" in url:
+        if file_path.suffix == ".jpg" and ".webp" in url:
             webp = True
 
         MB = 1024**2
         # 2 MB 以上使用分块下载, 不清楚为什么 webp 不分块, 可能是因为要转换成 jpg
         if file_size and file_size > 2 * MB and not webp:
-            return await self._download_chunks(url, file_path, file_size, use_proxy)
+            ok = await self._download_chunks(url, file_path, file_size, use_proxy, priority, group)
+            if ok is not None:
+                return ok
+            # 服务器不支持 Range 请求, 整体下载
 
-        content, error = await self.get_content(url, use_proxy=use_proxy)
-        if not content:
-            self.log_fn(f"🔴 下载失败: {url} {error}")
-            return False
         if not webp:
-            try:
-                async with aiofiles.open(file_path, "wb") as f:
-                    await f.write(content)
-                return True
-            except Exception as e:
-                self.log_fn(f"🔴 文件写入失败: {url} {file_path} {str(e)}")
-                return False
-        try:
-            byte_stream = BytesIO(content)
-            img: Image.Image = Image.open(byte_stream)
-            if img.mode == "RGBA":
-                img = img.convert("RGB")
-            img.save(file_path, quality=95, subsampling=0)
-            img.close()
-            return True
-        except Exception as e:
-            self.log_fn(f"🔴 WebP转换失败: {url} {file_path} {str(e)}")
-            return False
-
-    async def _download_chunks(self, url: str, file_path: Path, file_size: int, use_proxy: bool = True) -> bool:
-        """分块下载大文件"""
-        # 分块，每块 1 MB
-        MB = 1024**2
-        each_size = min(1 * MB, file_size)
-        parts = [(s, min(s + each_size, file_size)) for s in range(0, file_size, each_size)]
-
-        self.log_fn(f"📦 分块下载: {url} {len(parts)} 个分块, 总大小: {file_size} bytes")
-
-        # 先创建文件并预分配空间
-        try:
-            async with aiofiles.open(file_path, "wb") as f:
-                await f.truncate(file_size)
-        except Exception as e:
-            self.log_fn(f"🔴 文件创建失败: {url} {str(e)}")
+            return await self._download_stream(url, file_path, use_proxy, priority, group)
+        image, error = await self.get_image(url, jpeg=True, use_proxy=use_proxy, priority=priority, group=group)
+        if image is None:
+            self.log_fn(f"🔴 WebP转换失败: {url} {file_path} {error}")
             return False
-
-        # 创建下载任务
-        semaphore = asyncio.Semaphore(10)  # 限制并发数
-        tasks = []
-
-        for i, (start, end) in enumerate(parts):
-            task = self._download_chunk(semaphore, url, file_path, start, end, i, use_proxy)
-            tasks.append(task)
-
-        # 并发执行所有下载任务
+        # 先写入临时文件再重命名, 避免中断时留下不完整的文件
+        temp_path = file_path.with_name(file_path.name + ".part")
         try:
-            errors = await asyncio.gather(*tasks, return_exceptions=True)
-            # 检查所有任务是否成功
-            for i, err in enumerate(errors):
-                if isinstance(err, Exception):
-                    self.log_fn(f"🔴 分块 {i} 下载失败: {url} {str(err)}")
-                    return False
-                elif err:
-                    self.log_fn(f"🔴 分块 {i} 下载失败: {url} {err}")
-                    return False
-            self.log_fn(f"✅ 多分块下载完成: {url} {file_path}")
+            async with aiofiles.open(temp_path, "wb") as f:
+                await f.write(image[0])
+            await aiofiles.os.replace(temp_path, file_path)
             return True
         except Exception as e:
-            self.log_fn(f"🔴 并发下载异常: {url} {str(e)}")
+            self.log_fn(f"🔴 文件写入失败: {url} {file_path} {str(e)}")
+            with contextlib.suppress(OSError):
+                await aiofiles.os.remove(temp_path)
             return False
 
-    async def _download_chunk(
+    async def _download_stream(
+        self,
+        url: str,
+        file_path: Path,
+        use_proxy: bool = True,
+        priority: DownloadPriority = DownloadPriority.IMAGE,
+        group: str = "",
+    ) -> bool:
+        """
+        单个请求下载, 边接收边写入临时文件, 完成后重命名. 内存中最多保留 `WRITE_BUFFER` 字节
+        """
+        async with self.scheduler.slot(url, priority, group):
+            resp, error = await self.request("GET", url, use_proxy=use_proxy, stream=True)
+            if resp is None:
+                self.log_fn(f"🔴 下载失败: {url} {error}")
+                return False
+            temp_path = file_path.with_name(file_path.name + ".part")
+            size = 0
+            try:
+                async with aiofiles.open(temp_path, "wb") as f:
+                    buf = bytearray()
+                    async for data in resp.aiter_content():
+                        buf += data
+                        await self.scheduler.consume(len(data))
+                        if len(buf) >= WRITE_BUFFER:
+                            await f.write(buf)
+                            size += len(buf)
+                            buf.clear()
+                    await f.write(buf)
+                    size += len(buf)
+                expected = resp.headers.get("Content-Length")
+                if not size or (
+                    expected and expected.isdigit() and "Content-Encoding" not in resp.headers and int(expected) != size
+                ):
+                    raise OSError(f"文件大小不符: {size}/{expected}")
+                await aiofiles.os.replace(temp_path, file_path)
+                return True
+            except Exception as e:
+                self.log_fn(f"🔴 下载失败: {url} {file_path} {str(e)}")
+                with contextlib.suppress(OSError):
+                    await aiofiles.os.remove(temp_path)
+                return False
+            finally:
+                await resp.aclose()
+
+    async def _download_chunks(
         self,
-        semaphore: asyncio.Semaphore,
         url: str,
         file_path: Path,
-        start: int,
-        end: int,
-        chunk_id: int,
+        file_size: int,
         use_proxy: bool = True,
-    ) -> str | None:
-        """下载单个分块"""
-        async with semaphore:
-            res, error = await self.request(
-                "GET",
-                url,
-                headers={"Range": f"bytes={start}-{end}"},
-                use_proxy=use_proxy,
-                stream=True,
-            )
-            if res is None:
-                return error
-        # 写入文件
-        async with aiofiles.open(file_path, "rb+") as fp:
-            await fp.seek(start)
-            await fp.write(await res.acontent())
-        return ""
+        priority: DownloadPriority = DownloadPriority.IMAGE,
+        group: str = "",
+    ) -> bool | None:
+        """
+        分块下载大文件, 支持续传.
+
+        Returns:
+            是否成功. 服务器不支持 Range 请求时返回 None
+        """
+        download = RangeDownload(
+            self,
+            url,
+            file_path,
+            file_size,
+            use_proxy=use_proxy,
+            retry=max(self.retry, 3),
+            priority=priority,
+            group=group,
+        )
+        self.log_fn(f"📦 分块下载: {url} 总大小: {file_size} bytes")
+        try:
+            if await download.run():
+                self.log_fn(f"✅ 多分块下载完成: {url} {file_path}")
+                return True
+        except RangeUnsupported:
+            await asyncio.to_thread(cleanup_partial, file_path)
+            return None
+        except Exception as e:
+            self.log_fn(f"🔴 分块下载异常: {url} {str(e)}")
+        return False
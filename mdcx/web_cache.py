@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    last_modified: str
+    stored_at: float
+
+    def fresh(self, ttl: float) -> bool:
+        return time.time() - self.stored_at < ttl
+
+
+class AsyncWebCache:
+    """
+    基于 SQLite 的 HTTP 响应缓存. 响应体使用 zlib 压缩存储, 总大小超出上限时按最近访问时间淘汰.
+
+    所有数据库操作均在线程中执行, 不阻塞事件循环.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_size: int = 500 * 1024**2,
+        ttl: float = 7 * 24 * 3600,
+        site_ttls: dict[str, float] | None = None,
+        search_ttl: float = 24 * 3600,
+        site_search_ttls: dict[str, float] | None = None,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            path: 数据库文件路径
+            max_size: 缓存总大小上限 (字节, 压缩后)
+            ttl: 默认有效期 (秒)
+            site_ttls: 各网站的有效期 (秒), 覆盖默认值
+            search_ttl: 搜索页的默认有效期 (秒). 搜索结果会随新作品发布变化, 通常短于详情页
+            site_search_ttls: 各网站搜索页的有效期 (秒), 覆盖默认值
+            enabled: 是否启用. 禁用时所有查询均未命中, 也不会写入
+        """
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.site_ttls = site_ttls or {}
+        self.search_ttl = search_ttl
+        self.site_search_ttls = site_search_ttls or {}
+        self.enabled = enabled
+        self.force_refresh = False
+        """强制刷新: 忽略有效期及条件请求, 总是重新请求并更新缓存"""
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._size = 0
+
+    @staticmethod
+    def make_key(url: str, cookies: dict[str, str] | None = None) -> str:
+        raw = url
+        if cookies:  # 登录状态等可能影响页面内容
+            raw += "\n" + "&".join(f"{k}={v}" for k, v in sorted(cookies.items()))
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def get_ttl(self, site: str, search: bool = False) -> float:
+        if search:
+            return self.site_search_ttls.get(site, self.search_ttl)
+        return self.site_ttls.get(site, self.ttl)
+
+    async def get(self, key: str) -> CacheEntry | None:
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, url: str, body: bytes, etag: str = "", last_modified: str = "") -> None:
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self._put, key, url, body, etag, last_modified)
+
+    async def touch(self, key: str) -> None:
+        """重新验证成功后刷新存储时间"""
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self._execute, "UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._clear)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, url TEXT, body BLOB, etag TEXT, last_modified TEXT, "
+                "stored_at REAL, accessed_at REAL, size INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed_at ON responses (accessed_at)")
+            self._size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(sql, params)
+            conn.commit()
+
+    def _get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        body, etag, last_modified, stored_at = row
+        try:
+            return CacheEntry(zlib.decompress(body), etag, last_modified, stored_at)
+        except zlib.error:
+            return None
+
+    def _put(self, key: str, url: str, body: bytes, etag: str, last_modified: str) -> None:
+        data = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            old = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, data, etag, last_modified, now, now, len(data)),
+            )
+            self._size += len(data) - (old[0] if old else 0)
+            if self._size > self.max_size:
+                self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """按最近访问时间淘汰, 直到总大小降至上限的 90%"""
+        target = self.max_size * 0.9
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if self._size <= target:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._size -= size
+
+    def _clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            conn.execute("VACUUM")
+            self._size = 0
@@ -0,0 +1,305 @@
+import asyncio
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import aiofiles
+import aiofiles.os
+
+from .web_scheduler import DownloadPriority
+
+if TYPE_CHECKING:
+    from .web_async import AsyncWebClient
+
+KB = 1024
+MB = 1024**2
+WRITE_BUFFER = 256 * KB
+"""每个连接在内存中缓冲的最大字节数, 超出后写入文件"""
+
+
+class RangeUnsupported(Exception):
+    """服务器不支持 Range 请求"""
+
+
+class RemoteChanged(Exception):
+    """续传时远程文件已改变"""
+
+
+class RangeDownload:
+    """
+    可续传的分块下载.
+
+    数据写入 `<文件名>.part`, 已完成的区间记录在 `<文件名>.part.json`, 中断或程序重启后从已完成的位置继续.
+    响应数据边接收边写入对应位置, 不在内存中保留整个分块. 每个分块单独重试, 从中断处继续; 分块大小根据实测速度调整, 使每块耗时约为 `TARGET_SECONDS`.
+    全部完成后检查文件大小, 再重命名为目标文件.
+    """
+
+    TARGET_SECONDS = 4
+    MIN_CHUNK = 256 * KB
+    MAX_CHUNK = 16 * MB
+
+    def __init__(
+        self,
+        client: "AsyncWebClient",
+        url: str,
+        file_path: Path,
+        size: int,
+        *,
+        use_proxy: bool = True,
+        connections: int = 10,
+        retry: int = 5,
+        priority: DownloadPriority = DownloadPriority.TRAILER,
+        group: str = "",
+    ):
+        """
+        Args:
+            client: 用于发送请求
+            url: 下载链接
+            file_path: 保存路径
+            size: 文件大小, 即 Content-Length
+            connections: 并发连接数
+            retry: 每个分块的最大尝试次数
+            priority: 下载优先级, 每个分块单独向调度器申请名额
+            group: 下载调度的分组
+        """
+        self.client = client
+        self.url = url
+        self.file_path = file_path
+        self.size = size
+        self.use_proxy = use_proxy
+        self.connections = connections
+        self.retry = retry
+        self.priority = priority
+        self.group = group
+        self.part_path = file_path.with_name(file_path.name + ".part")
+        self.state_path = file_path.with_name(file_path.name + ".part.json")
+        self.chunk_size = 1 * MB
+        self.validator = ""
+        """ETag 或 Last-Modified, 用于续传时确认远程文件未改变"""
+        self._done: list[tuple[int, int]] = []
+        self._gaps: list[list[int]] = []
+        self._rate = 0.0
+        self._last_save = 0.0
+        self._save_lock = asyncio.Lock()
+
+    @property
+    def downloaded(self) -> int:
+        return sum(e - s for s, e in self._done)
+
+    async def run(self) -> bool:
+        """
+        Returns:
+            是否下载成功. 服务器不支持 Range 时抛出 `RangeUnsupported`
+        """
+        await self._prepare(resume=True)
+        if self.downloaded:
+            self.client.log_fn(f"📦 续传: {self.url} 已完成 {self.downloaded}/{self.size} bytes")
+        try:
+            ok = await self._run_workers()
+        except RemoteChanged:
+            self.client.log_fn(f"🟠 远程文件已改变, 重新下载: {self.url}")
+            await self._prepare(resume=False)
+            ok = await self._run_workers()
+        if not ok:
+            await self._save_state()  # 保留进度, 下次继续
+            return False
+        return await self._finish()
+
+    async def _prepare(self, resume: bool) -> None:
+        state = await asyncio.to_thread(self._load_state) if resume else None
+        if state is not None and await aiofiles.os.path.exists(self.part_path):
+            self._done = [(s, e) for s, e in state["done"]]
+            self.validator = state.get("validator", "")
+        else:
+            self._done = []
+            self.validator = ""
+            async with aiofiles.open(self.part_path, "wb") as f:
+                await f.truncate(self.size)
+        self._gaps = _gaps(self._done, self.size)
+
+    def _load_state(self) -> dict | None:
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if state.get("url") != self.url or state.get("size") != self.size:
+            return None
+        return state
+
+    async def _save_state(self, force: bool = True) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_save < 1:
+            return
+        self._last_save = now
+        async with self._save_lock:
+            data = json.dumps({"url": self.url, "size": self.size, "validator": self.validator, "done": self._done})
+            temp = self.state_path.with_suffix(".tmp")
+            await asyncio.to_thread(temp.write_text, data, encoding="utf-8")
+            await aiofiles.os.replace(temp, self.state_path)
+
+    async def _finish(self) -> bool:
+        if _gaps(self._done, self.size) or await aiofiles.os.path.getsize(self.part_path) != self.size:
+            self.client.log_fn(f"🔴 下载文件大小不符: {self.url}")
+            return False
+        await aiofiles.os.replace(self.part_path, self.file_path)
+        try:
+            await aiofiles.os.remove(self.state_path)
+        except OSError:
+            pass
+        return True
+
+    async def _run_workers(self) -> bool:
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.connections)]
+        try:
+            results = await asyncio.gather(*workers)
+        except BaseException:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        return all(results)
+
+    def _take(self) -> tuple[int, int] | None:
+        """从第一个未下载区间的开头取一个分块"""
+        if not self._gaps:
+            return None
+        gap = self._gaps[0]
+        start, end = gap[0], min(gap[0] + self.chunk_size, gap[1])
+        gap[0] = end
+        if gap[0] >= gap[1]:
+            self._gaps.pop(0)
+        return start, end
+
+    async def _worker(self) -> bool:
+        while (chunk := self._take()) is not None:
+            start, end = chunk
+            pos = [start]
+            for attempt in range(self.retry):
+                try:
+                    async with self.client.scheduler.slot(self.url, self.priority, self.group):
+                        await self._fetch(pos, end)
+                    break
+                except (RangeUnsupported, RemoteChanged):
+                    raise
+                except Exception as e:
+                    # 已写入的部分已记录, 重试时从中断处继续
+                    self.client.log_fn(
+                        f"🟠 分块 {pos[0]}-{end - 1} 下载失败 ({attempt + 1}/{self.retry}): {self.url} {str(e)}"
+                    )
+                    if attempt < self.retry - 1:
+                        await asyncio.sleep(min(2**attempt, 30) + random.random())
+            else:
+                return False
+        return True
+
+    async def _fetch(self, pos: list[int], end: int) -> None:
+        """
+        下载 [pos[0], end) 并边接收边写入文件, 内存中最多保留 `WRITE_BUFFER` 字节.
+
+        Args:
+            pos: 当前写入位置, 随写入推进. 出错时调用方据此从中断处重试
+        """
+        begin, start = time.perf_counter(), pos[0]
+        resp, error = await self.client.request(
+            "GET",
+            self.url,
+            headers={"Range": f"bytes={start}-{end - 1}"},  # Range 的结束位置包含在内
+            use_proxy=self.use_proxy,
+            stream=True,
+        )
+        if resp is None:
+            raise OSError(error)
+        try:
+            if resp.status_code != 206:
+                raise RangeUnsupported(f"HTTP {resp.status_code}")
+            validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified") or ""
+            if not self.validator:
+                self.validator = validator
+            elif validator and validator != self.validator:
+                raise RemoteChanged(validator)
+            fd = await asyncio.to_thread(os.open, self.part_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+            try:
+                buf = bytearray()
+                async for data in resp.aiter_content():
+                    buf += data
+                    await self.client.scheduler.consume(len(data))
+                    if len(buf) >= WRITE_BUFFER or pos[0] + len(buf) >= end:
+                        await self._flush(fd, buf, pos, end)
+                await self._flush(fd, buf, pos, end)
+            finally:
+                os.close(fd)
+        finally:
+            await resp.aclose()
+        if pos[0] != end:
+            raise OSError(f"分块不完整: {pos[0] - start}/{end - start}")
+        self._adapt(end - start, time.perf_counter() - begin)
+
+    async def _flush(self, fd: int, buf: bytearray, pos: list[int], end: int) -> None:
+        if not buf:
+            return
+        extra = pos[0] + len(buf) - end
+        if extra > 0:  # 不能覆盖相邻分块
+            del buf[-extra:]
+        await asyncio.to_thread(_write_at, fd, buf, pos[0])
+        self._done = _merge(self._done, (pos[0], pos[0] + len(buf)))
+        pos[0] += len(buf)
+        buf.clear()
+        await self._save_state(force=False)
+        if extra > 0:
+            raise OSError(f"分块大小不符: 多出 {extra} bytes")
+
+    def _adapt(self, size: int, elapsed: float) -> None:
+        """根据实测速度 (指数移动平均) 调整后续分块大小"""
+        rate = size / max(elapsed, 1e-3)
+        self._rate = rate if not self._rate else self._rate * 0.7 + rate * 0.3
+        chunk = int(self._rate * self.TARGET_SECONDS) // (64 * KB) * (64 * KB)
+        self.chunk_size = max(self.MIN_CHUNK, min(chunk, self.MAX_CHUNK))
+
+
+def _write_at(fd: int, data: bytes | bytearray, offset: int) -> None:
+    """在指定位置写入. 每个分块使用独立的文件描述符, 因此不支持 pwrite 的平台 (Windows) 上 lseek + write 同样安全"""
+    view = memoryview(data)
+    while view:
+        if hasattr(os, "pwrite"):
+            n = os.pwrite(fd, view, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            n = os.write(fd, view)
+        view = view[n:]
+        offset += n
+
+
+def _merge(done: list[tuple[int, int]], new: tuple[int, int]) -> list[tuple[int, int]]:
+    """合并已完成区间, 返回有序且不重叠的新列表"""
+    result: list[tuple[int, int]] = []
+    for s, e in sorted([*done, new]):
+        if result and s <= result[-1][1]:
+            result[-1] = (result[-1][0], max(result[-1][1], e))
+        else:
+            result.append((s, e))
+    return result
+
+
+def _gaps(done: list[tuple[int, int]], size: int) -> list[list[int]]:
+    """[0, size) 中未完成的区间"""
+    gaps = []
+    pos = 0
+    for s, e in done:
+        if s > pos:
+            gaps.append([pos, s])
+        pos = max(pos, e)
+    if pos < size:
+        gaps.append([pos, size])
+    return gaps
+
+
+def cleanup_partial(file_path: Path) -> None:
+    """删除未完成的下载数据"""
+    for suffix in (".part", ".part.json"):
+        try:
+            os.remove(file_path.with_name(file_path.name + suffix))
+        except OSError:
+            pass
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+import httpx
+
+
+class DownloadPriority(IntEnum):
+    """下载优先级, 数值越小越优先"""
+
+    IMAGE = 0
+    """thumb, poster 等刮削结果必需的图片"""
+    EXTRAFANART = 1
+    TRAILER = 2
+
+
+class DownloadScheduler:
+    """
+    全局下载调度器. 每个传输 (一个图片请求, 或分块下载中的一个分块) 开始前申请名额.
+
+    - 限制总并发数及每个域名的并发数
+    - 有空闲名额时, 优先级高的请求先开始
+    - 同一优先级内, 按分组 (通常为影片番号) 轮流分配, 避免某部影片的大量剧照或分块占满名额
+    - 可选的总带宽上限, 由传输过程中调用 `consume` 实现
+    """
+
+    def __init__(self, max_total: int = 16, max_per_host: int = 6, bandwidth: int = 0):
+        """
+        Args:
+            max_total: 总并发数
+            max_per_host: 每个域名的并发数
+            bandwidth: 总带宽上限 (bytes/s), 0 为不限制
+        """
+        self.max_total = max_total
+        self.max_per_host = max_per_host
+        self.bandwidth = bandwidth
+        self._active = 0
+        self._hosts: dict[str, int] = {}
+        # 优先级 -> 分组 -> 等待中的 (域名, future). 分组按轮转顺序排列
+        self._queues: dict[int, OrderedDict[str, deque[tuple[str, asyncio.Future]]]] = {}
+        self._next = 0.0  # 带宽: 下一段数据可开始接收的时间
+
+    @asynccontextmanager
+    async def slot(self, url: str, priority: DownloadPriority = DownloadPriority.IMAGE, group: str = ""):
+        """
+        申请一个传输名额, 退出时释放.
+
+        Args:
+            url: 请求链接, 用于按域名限制并发
+            priority: 优先级
+            group: 公平分配的分组. 未指定分组的请求视为同一分组
+        """
+        host = httpx.URL(url).host
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(priority, OrderedDict()).setdefault(group, deque()).append((host, future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():  # 已分配名额后被取消
+                self._release(host)
+            else:
+                self._discard(priority, group, future)
+            raise
+        try:
+            yield
+        finally:
+            self._release(host)
+
+    async def consume(self, size: int) -> None:
+        """记录接收的数据量. 超出带宽上限时等待"""
+        if not self.bandwidth:
+            return
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + size / self.bandwidth
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def _take(self, host: str) -> None:
+        self._active += 1
+        self._hosts[host] = self._hosts.get(host, 0) + 1
+
+    def _release(self, host: str) -> None:
+        self._active -= 1
+        if (n := self._hosts[host] - 1) > 0:
+            self._hosts[host] = n
+        else:
+            del self._hosts[host]
+        self._wake()
+
+    def _discard(self, priority: int, group: str, future: asyncio.Future) -> None:
+        groups = self._queues.get(priority)
+        if groups is None or group not in groups:
+            return
+        waiters = groups[group]
+        for item in waiters:
+            if item[1] is future:
+                waiters.remove(item)
+                break
+        if not waiters:
+            del groups[group]
+        if not groups:
+            del self._queues[priority]
+
+    def _wake(self) -> None:
+        """按优先级及分组轮转唤醒等待中的请求, 跳过域名名额已满的请求"""
+        for priority in sorted(self._queues):
+            groups = self._queues[priority]
+            progress = True
+            while progress and self._active < self.max_total:
+                progress = False
+                for group in list(groups):
+                    waiters = groups[group]
+                    for item in waiters:
+                        if self._hosts.get(item[0], 0) < self.max_per_host:
+                            break
+                    else:
+                        continue
+                    waiters.remove(item)
+                    if waiters:
+                        groups.move_to_end(group)  # 此分组本轮已分配, 排到最后
+                    else:
+                        del groups[group]
+                    self._take(item[0])
+                    item[1].set_result(None)
+                    progress = True
+                    break
+            if not groups:
+                del self._queues[priority]
+            if self._active >= self.max_total:
+                return
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+大文件下载内存基准测试
+在本地启动支持 Range 请求的 HTTP 服务, 并发下载多个大文件, 测量下载进程的峰值内存 (RSS)
+
+对比:
+    buffered: 整个文件读入内存后再写入 (get_content)
+    stream:   单个请求, 边接收边写入
+    chunks:   分块下载 (download 的默认方式), 边接收边写入各分块的位置
+
+curl_cffi 的流式响应队列没有背压, 接收速度远超写入速度时 (如不限速的本地服务) 数据仍会在队列中堆积,
+因此默认限制每个连接的速度, 模拟实际网络
+
+使用示例:
+    python -m scripts.bench_download
+    python -m scripts.bench_download --files 50 --size 30 --rate 0 --modes stream chunks
+"""
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BLOCK = bytes(range(256)) * 256  # 64 KB, 服务端按偏移量循环生成内容, 不占用内存
+
+
+def block_at(offset: int, length: int) -> bytes:
+    start = offset % len(BLOCK)
+    data = BLOCK[start:] + BLOCK * (length // len(BLOCK) + 1)
+    return data[:length]
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, size: int, rate: float):
+    try:
+        while line := await reader.readline():
+            method = line.split()[0].decode()
+            headers = {}
+            while (h := await reader.readline()) not in (b"\r\n", b""):
+                k, _, v = h.decode().partition(":")
+                headers[k.strip().lower()] = v.strip()
+            start, end, status = 0, size, "200 OK"
+            if r := headers.get("range"):
+                a, _, b = r.removeprefix("bytes=").partition("-")
+                start, end, status = int(a), min(int(b) + 1 if b else size, size), "206 Partial Content"
+            head = f'HTTP/1.1 {status}\r\nContent-Length: {end - start}\r\nAccept-Ranges: bytes\r\nETag: "bench"\r\n'
+            if status.startswith("206"):
+                head += f"Content-Range: bytes {start}-{end - 1}/{size}\r\n"
+            writer.write((head + "\r\n").encode())
+            if method == "GET":
+                pos, begin = start, time.perf_counter()
+                while pos < end:
+                    n = min(len(BLOCK), end - pos)
+                    writer.write(block_at(pos, n))
+                    pos += n
+                    await writer.drain()
+                    if rate and (wait := (pos - start) / rate - (time.perf_counter() - begin)) > 0:
+                        await asyncio.sleep(wait)
+            await writer.drain()
+    except (ConnectionError, IndexError):
+        pass
+    finally:
+        writer.close()
+
+
+def serve(port: int, size: int, rate: float, ready):
+    async def main():
+        server = await asyncio.start_server(lambda r, w: handle(r, w, size, rate), "127.0.0.1", port)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024**2 if sys.platform == "darwin" else rss / 1024  # macOS 单位为字节, Linux 为 KB
+
+
+async def download(mode: str, port: int, files: int, folder: Path) -> tuple[float, int]:
+    from mdcx.web_async import AsyncWebClient
+    from mdcx.web_scheduler import DownloadScheduler
+
+    # 不限制并发, 各方式的连接数相同
+    client = AsyncWebClient(timeout=60, retry=3, scheduler=DownloadScheduler(files * 10, files * 10))
+    url = f"http://127.0.0.1:{port}/trailer.mp4"
+
+    async def one(i: int) -> bool:
+        path = folder / f"{i}.mp4"
+        if mode == "chunks":
+            return await client.download(url, path, use_proxy=False)
+        if mode == "stream":
+            return await client._download_stream(url, path, use_proxy=False)
+        content, _ = await client.get_content(url, use_proxy=False)
+        if not content:
+            return False
+        path.write_bytes(content)
+        return True
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(files)))
+    elapsed = time.perf_counter() - start
+    await client.curl_session.close()
+    return elapsed, sum(results)
+
+
+def child(mode: str, port: int, files: int, size: int, queue):
+    import mdcx.web_async  # noqa: F401  导入开销不计入下载内存
+
+    base = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as folder:
+        elapsed, ok = asyncio.run(download(mode, port, files, Path(folder)))
+        good = sum(p.stat().st_size == size for p in Path(folder).glob("*.mp4"))
+    queue.put((elapsed, ok, good, base, peak_rss_mb()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大文件下载内存基准测试")
+    parser.add_argument("--files", type=int, default=50, help="并发下载的文件数")
+    parser.add_argument("--size", type=int, default=30, help="文件大小 (MB)")
+    parser.add_argument("--rate", type=float, default=2, help="每个连接的速度上限 (MB/s), 0 为不限")
+    parser.add_argument("--port", type=int, default=18765, help="本地服务端口")
+    parser.add_argument("--modes", nargs="+", default=["buffered", "stream", "chunks"], help="测试的下载方式")
+    args = parser.parse_args()
+    size = args.size * 1024**2
+
+    ctx = mp.get_context("spawn")
+    ready = ctx.Event()
+    server = ctx.Process(target=serve, args=(args.port, size, args.rate * 1024**2, ready), daemon=True)
+    server.start()
+    ready.wait(10)
+
+    print(f"文件数: {args.files}, 文件大小: {args.size} MB, 单连接限速: {args.rate or '不限'} MB/s")
+    print(f"{'方式':<9} {'总耗时':>8} {'成功':>6} {'基线 RSS':>10} {'峰值 RSS':>10} {'增量':>10}")
+    for mode in args.modes:
+        queue = ctx.Queue()
+        p = ctx.Process(target=child, args=(mode, args.port, args.files, size, queue))
+        p.start()
+        elapsed, ok, good, base, peak = queue.get()
+        p.join()
+        print(f"{mode:<9} {elapsed:>7.2f}s {good:>3}/{ok:<3}{base:>8.0f} MB {peak:>7.0f} MB {peak - base:>7.0f} MB")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
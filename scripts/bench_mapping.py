@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+映射表查询基准测试
+对比 keyword 索引与原 XPath 全表扫描的查询耗时. 两者结果一致性见 tests/test_resources.py
+
+使用示例:
+    python -m scripts.bench_mapping
+    python -m scripts.bench_mapping --rounds 3 --limit 500
+"""
+
+import argparse
+import time
+
+from mdcx.config.resources import MAPPING_XPATH, find_mapping, normalize_mapping_name, resources
+
+
+def xpath_find(root, name: str):
+    """原实现: 每次查询对整个映射表执行 XPath"""
+    r = root.xpath(MAPPING_XPATH, name=f",{normalize_mapping_name(name)},")
+    return r[0] if r else None
+
+
+def collect_names(root, limit: int) -> list[str]:
+    """从映射表中取出查询样本, 并混入一些不存在的名字"""
+    names = []
+    for node in root.iter("a"):
+        names.extend(k for k in (node.get("keyword") or "").strip(",").split(",") if k)
+        if len(names) >= limit:
+            break
+    names = names[:limit]
+    names += [f"not-exist-{i}" for i in range(max(limit // 10, 1))]
+    return names
+
+
+def bench(title: str, root, find, names: list[str], rounds: int):
+    xpath_time = index_time = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for n in names:
+            xpath_find(root, n)
+        xpath_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for n in names:
+            find(n)
+        index_time += time.perf_counter() - start
+
+    count = len(names) * rounds
+    print(f"{title}: {len(root.xpath('//a'))} 条, 查询 {count} 次")
+    print(f"    XPath: {xpath_time:.3f}s ({xpath_time / count * 1e6:.1f}us/次)")
+    print(f"    索引:  {index_time:.3f}s ({index_time / count * 1e6:.1f}us/次)")
+    print(f"    加速:  {xpath_time / max(index_time, 1e-9):.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="映射表查询基准测试")
+    parser.add_argument("--rounds", type=int, default=1, help="重复次数")
+    parser.add_argument("--limit", type=int, default=1000, help="每个映射表的查询样本数")
+    args = parser.parse_args()
+
+    for title, root, index in (
+        ("演员映射表", resources.actor_mapping_data, resources.actor_mapping_index),
+        ("信息映射表", resources.info_mapping_data, resources.info_mapping_index),
+    ):
+        if root is None:
+            print(f"{title}: 未载入")
+            continue
+        names = collect_names(root, args.limit)
+        bench(title, root, lambda n, index=index, root=root: find_mapping(root, index, n), names, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+番号提取吞吐量基准测试
+对一批文件名调用 get_file_number, 再对番号多次调用 is_uncensored 及 get_number_letters,
+与整理流程中的调用方式一致 (获取文件信息, 刮削, 翻译等步骤分别调用)
+
+未指定语料时按常见命名方式随机生成文件名, 也可指定每行一个路径的文件, 如:
+    find /media/av -type f > names.txt
+
+使用示例:
+    python -m scripts.bench_number
+    python -m scripts.bench_number --corpus names.txt --repeat 3
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+from mdcx.number import _get_file_number, get_file_number, get_number_letters, is_uncensored
+
+EXTS = [".mp4", ".mkv", ".avi", ".wmv", ".mp4", ".mp4"]
+PREFIXES = ["SSIS", "ABP", "IPX", "MIDE", "STARS", "JUL", "PRED", "SNIS", "MKBD", "HEYZO", "CAWD", "DVAJ", "SIRO"]
+SUFFIXES = ["", "", "", "-C", "-CD1", "-CD2", "_1", ".part2", "-4K", " HD", "-uncensored", "[中文字幕]"]
+DECORATIONS = ["", "", "[javdb.com]", "@hhd800.com@", "【高清】", "(1080P)", "www.98T.la@"]
+TITLES = ["新人デビュー", "巨乳美少女", "出張先相部屋", "sample title"]
+
+
+def random_name(rng: random.Random) -> str:
+    n = rng.randint(1, 999)
+    prefix = rng.choice(PREFIXES)
+    kind = rng.randrange(16)
+    if kind == 0:
+        name = f"FC2-PPV-{rng.randint(100000, 4000000)}"
+    elif kind == 1:
+        name = f"fc2ppv_{rng.randint(100000, 4000000)}"
+    elif kind == 2:
+        name = f"HEYZO_{rng.randint(100, 3500):04d}"
+    elif kind == 3:
+        name = f"{rng.randint(200, 500)}{rng.choice(['LUXU', 'MIUM', 'GANA', 'ARA', 'SIRO'])}-{rng.randint(100, 3000)}"
+    elif kind == 4:
+        name = f"{rng.randint(10, 12):02d}{rng.randint(10, 28):02d}{rng.randint(15, 23)}-{n:03d}"  # 1pondo
+    elif kind == 5:
+        name = f"{rng.randint(10, 12):02d}{rng.randint(10, 28):02d}{rng.randint(15, 23)}_{n:03d}"  # caribbean
+    elif kind == 6:
+        name = f"{rng.choice(['sexart', 'blacked', 'tushy', 'vixen'])}.{rng.randint(15, 24)}.{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}.{rng.choice(TITLES).replace(' ', '.')}"
+    elif kind == 7:
+        name = f"n{rng.randint(0, 2000):04d}"
+    elif kind == 8:
+        name = f"h_{rng.randint(100, 999)}{prefix.lower()}{n:02d}"
+    elif kind == 9:
+        name = f"{prefix.lower()}00{n:03d}"
+    elif kind == 10:
+        name = rng.choice(
+            [
+                f"Mywife No.{rng.randint(100, 2000)}",
+                f"MKY-A-{rng.randint(100, 999)}",
+                f"XXX-AV-{rng.randint(10000, 30000)}",
+                f"KIN8TENGOKU-{rng.randint(1000, 3800)}",
+                f"T28-{n:03d}",
+                f"TH101-{n:03d}-{rng.randint(10000, 99999)}",
+                f"H4610-ki{rng.randint(100000, 999999)}",
+                f"CW3D2DBD-{n:02d}",
+                f"MMR-AK{n:03d}SP",
+                f"MD-{rng.randint(100, 9999):04d}-1",
+            ]
+        )
+    elif kind == 11:
+        name = f"{rng.choice(TITLES)} {prefix}-{n:03d}"
+    else:
+        name = f"{prefix.lower() if rng.random() < 0.3 else prefix}{rng.choice(['-', '', '_'])}{n:03d}"
+    name = rng.choice(DECORATIONS) + name + rng.choice(SUFFIXES)
+    return f"/media/av/{prefix}/{name}{rng.choice(EXTS)}"
+
+
+def run(paths: list[str], escape: list[str], calls: int) -> float:
+    for func in (_get_file_number, is_uncensored, get_number_letters):
+        func.cache_clear()
+    start = time.perf_counter()
+    for p in paths:
+        number = get_file_number(p, escape)
+        for _ in range(calls):
+            is_uncensored(number)
+            get_number_letters(number)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="番号提取吞吐量基准测试")
+    parser.add_argument("--corpus", type=Path, help="文件名语料, 每行一个路径. 未指定时随机生成")
+    parser.add_argument("--count", type=int, default=100_000, help="随机生成的文件名数量")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数, 取最快的一次")
+    parser.add_argument("--calls", type=int, default=3, help="每个番号调用 is_uncensored 及 get_number_letters 的次数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.corpus:
+        paths = [line for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+    else:
+        rng = random.Random(args.seed)
+        paths = [random_name(rng) for _ in range(args.count)]
+    escape = ["h_720", "hhd800.com", "www.98T.la", "javdb.com", "1080p", "720p", "uncensored", "中文字幕"]
+
+    print(f"文件名: {len(paths)}, 不同文件名: {len({Path(p).name for p in paths})}")
+    best = min(run(paths, escape, args.calls) for _ in range(args.repeat))
+    print(f"耗时: {best:.3f}s, {len(paths) / best:,.0f} 个/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+HTML 解析执行器基准测试
+并发解析大页面时, 测量事件循环延迟 (loop lag) 的分位数, 对比在事件循环中解析与使用线程池/进程池解析
+
+使用示例:
+    python -m scripts.bench_parse
+    python -m scripts.bench_parse --pages 400 --concurrency 50 --rows 3000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from parsel import Selector
+
+from mdcx.crawlers.base import Context, DetailPageParser, extract_all_texts, extract_text
+from mdcx.models.types import CrawlerInput
+from mdcx.utils.parse_executor import ParseExecutor
+
+
+class BenchParser(DetailPageParser):
+    async def title(self, ctx, html: Selector):
+        return extract_text(html, '//h1[@class="title"]/text()')
+
+    async def actors(self, ctx, html: Selector):
+        return extract_all_texts(html, '//div[@class="actor"]/a/text()')
+
+    async def tags(self, ctx, html: Selector):
+        return extract_all_texts(html, '//td[contains(@class, "genre")]/a/text()')
+
+    async def extrafanart(self, ctx, html: Selector):
+        return extract_all_texts(html, '//div[@id="sample"]//img/@src')
+
+    async def release(self, ctx, html: Selector):
+        return extract_text(html, '//td[text()="発売日："]/following-sibling::td/text()')
+
+    async def outline(self, ctx, html: Selector):
+        return extract_text(html, '//div[@class="outline"]/p/text()')
+
+
+def make_page(rows: int) -> str:
+    """生成与 DMM 详情页规模相近的 HTML"""
+    parts = ['<html><head><title>bench</title></head><body><h1 class="title">ABC-123 タイトル</h1>']
+    parts.append("<table><tr><td>発売日：</td><td>2024/01/01</td></tr>")
+    parts.extend(f'<tr><td class="genre g{i}"><a href="/g/{i}">ジャンル{i}</a></td></tr>' for i in range(rows))
+    parts.append("</table>")
+    parts.extend(f'<div class="actor"><a href="/a/{i}">女優{i}</a></div>' for i in range(rows // 20))
+    parts.append('<div id="sample">')
+    parts.extend(f'<a href="#"><img src="https://example.com/{i}.jpg"/></a>' for i in range(rows // 10))
+    parts.append('</div><div class="outline"><p>' + "あらすじ" * 200 + "</p></div></body></html>")
+    return "".join(parts)
+
+
+async def probe(samples: list[float], stop: asyncio.Event, interval: float):
+    """按固定间隔休眠, 记录实际唤醒时间与预期的差值"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def run(mode: str, html: str, pages: int, concurrency: int, workers: int) -> tuple[float, list[float]]:
+    executor = ParseExecutor(mode, workers)  # type: ignore[arg-type]
+    parser = BenchParser()
+    ctx = Context(input=CrawlerInput.empty())
+    await executor.run(len, "")  # 预热, 不计入进程池启动时间
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            data = await parser.parse_html(ctx, html, executor)
+            assert data.title
+
+    samples: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(samples, stop, 0.001))
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(pages)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    executor.close()
+    return elapsed, samples
+
+
+def percentile(data: list[float], p: float) -> float:
+    if len(data) < 2:
+        return data[0] if data else 0.0
+    return statistics.quantiles(data, n=100, method="inclusive")[int(p) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 解析执行器基准测试")
+    parser.add_argument("--pages", type=int, default=200, help="解析页面数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数, 对应刮削并发数")
+    parser.add_argument("--rows", type=int, default=2000, help="页面规模")
+    parser.add_argument("--workers", type=int, default=0, help="工作线程/进程数, 0 为自动")
+    parser.add_argument("--modes", nargs="+", default=["none", "thread", "process"], help="测试的解析方式")
+    args = parser.parse_args()
+
+    html = make_page(args.rows)
+    print(f"页面大小: {len(html) / 1024:.0f} KB, 页面数: {args.pages}, 并发数: {args.concurrency}")
+    print(f"{'方式':<8} {'总耗时':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (事件循环延迟, ms)")
+    for mode in args.modes:
+        elapsed, samples = asyncio.run(run(mode, html, args.pages, args.concurrency, args.workers))
+        lags = [s * 1000 for s in samples]
+        print(
+            f"{mode:<8} {elapsed:>7.2f}s {percentile(lags, 50):>9.2f} {percentile(lags, 95):>9.2f} "
+            f"{percentile(lags, 99):>9.2f} {max(lags, default=0):>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
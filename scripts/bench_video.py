@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+视频分辨率读取基准测试
+对比仅读取容器头部 (header) 与 pyav, ffprobe 读取同一批视频的耗时, 并检查结果是否一致
+
+未指定文件时用 pyav 生成若干测试视频 (MP4 的 moov 位于文件末尾, 与多数下载的视频一致)
+网络共享上的文件差异更明显, 可直接指定其中的视频文件
+
+使用示例:
+    python -m scripts.bench_video
+    python -m scripts.bench_video /mnt/nas/*.mp4 /mnt/nas/*.mkv --repeat 1
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from mdcx.utils.video import av, get_video_metadata_ffmpeg, get_video_metadata_header, get_video_metadata_pyav
+
+SAMPLES = [
+    ("h264.mp4", "libx264", 1920, 1080),
+    ("hevc.mp4", "libx265", 1280, 720),
+    ("h264.mkv", "libx264", 1280, 720),
+    ("hevc.mkv", "libx265", 854, 480),
+    ("vp9.webm", "libvpx-vp9", 640, 360),
+    ("mpeg4.avi", "mpeg4", 640, 360),  # header 不支持, 用于确认会返回 None
+]
+
+
+def make_samples(folder: Path, frames: int) -> list[Path]:
+    paths = []
+    for name, codec, width, height in SAMPLES:
+        path = folder / name
+        try:
+            with av.open(str(path), "w") as container:
+                stream = container.add_stream(codec, rate=25)
+                stream.width, stream.height, stream.pix_fmt = width, height, "yuv420p"
+                for i in range(frames):
+                    frame = av.VideoFrame(width, height, "yuv420p")
+                    frame.pts = i
+                    container.mux(stream.encode(frame))
+                container.mux(stream.encode())
+        except Exception as e:  # 缺少编码器
+            print(f"跳过 {name}: {e}")
+            continue
+        paths.append(path)
+    return paths
+
+
+def bench(func, paths: list[Path], repeat: int) -> tuple[float, list]:
+    results = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = []
+        for p in paths:
+            try:
+                results.append(func(p))
+            except Exception as e:
+                results.append(type(e).__name__)
+    return (time.perf_counter() - start) / repeat / len(paths) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视频分辨率读取基准测试")
+    parser.add_argument("files", nargs="*", type=Path, help="视频文件. 未指定时生成测试视频")
+    parser.add_argument("--repeat", type=int, default=20, help="重复次数")
+    parser.add_argument("--frames", type=int, default=50, help="生成的测试视频帧数")
+    args = parser.parse_args()
+
+    funcs = {"header": get_video_metadata_header}
+    if av is not None:
+        funcs["pyav"] = get_video_metadata_pyav
+    if shutil.which("ffprobe"):
+        funcs["ffprobe"] = get_video_metadata_ffmpeg
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = args.files
+        if not paths:
+            if av is None:
+                parser.error("未安装 pyav, 无法生成测试视频, 请指定视频文件")
+            paths = make_samples(Path(folder), args.frames)
+        results = {}
+        print(f"文件数: {len(paths)}, 重复: {args.repeat} 次")
+        print(f"{'方式':<8} {'平均每个文件':>12}")
+        for name, func in funcs.items():
+            ms, results[name] = bench(func, paths, args.repeat)
+            print(f"{name:<8} {ms:>10.3f}ms")
+
+    print("\n结果:")
+    for i, p in enumerate(paths):
+        print(f"  {p.name:<24} " + "  ".join(f"{name}={results[name][i]}" for name in funcs))
+
+
+if __name__ == "__main__":
+    main()
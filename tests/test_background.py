@@ -0,0 +1,33 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from mdcx.core.background import BackgroundLane, ExtrasJob
+from mdcx.models.flags import Flags
+
+
+@pytest.mark.asyncio
+async def test_background_lane_persist_and_resume(tmp_path, monkeypatch):
+    path = tmp_path / "background.json"
+    lane = BackgroundLane()
+    lane.load(path)
+    monkeypatch.setattr(lane, "start", lambda: None)  # 模拟程序在任务开始前退出
+    job = ExtrasJob("ABC-123", str(tmp_path / "out"), str(tmp_path / "in"), "number", trailer="https://a/t.mp4")
+    await lane.add(job)
+    await lane.add(ExtrasJob("ABC-124", str(tmp_path / "out2"), "", "number"))
+
+    processed = []
+
+    async def process(job):
+        Flags.reset()  # 新一轮刮削开始
+        Flags.file_done(job.number).update(trailer=Path(job.folder_new) / "trailer.mp4")
+        processed.append(job)
+
+    resumed = BackgroundLane()
+    monkeypatch.setattr(resumed, "_process", process)
+    resumed.load(path)
+    assert (resumed.remaining, resumed.total) == (2, 2)
+    await resumed._run()
+    assert processed[0] == job and [j.number for j in processed] == ["ABC-123", "ABC-124"]
+    assert resumed.remaining == 0 and json.loads(path.read_text()) == []
@@ -0,0 +1,30 @@
+import shutil
+
+import pytest
+
+from mdcx.base.file import iter_movie_lists
+from mdcx.config.manager import manager
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failed", ["failed", "first_folder_name/failed"])
+async def test_walk_skips_output_dirs(tmp_path, monkeypatch, failed):
+    monkeypatch.setattr(manager.config, "scan_cache", False)
+    media = tmp_path / "media"
+    (media / "a").mkdir(parents=True)
+    (media / "a" / "ABC-001.mp4").touch()
+    # b 下文件较多, 队列容量为 1 时遍历线程必然停在 b, 之后才会列出失败目录
+    (media / "b").mkdir()
+    for i in range(20):
+        (media / "b" / f"ABC-1{i:02}.mp4").touch()
+    failed_folder = media / failed
+    target = media / failed.replace("first_folder_name", "a")
+    target.mkdir(parents=True)  # 上次刮削留下的失败目录
+
+    found = []
+    async for path in iter_movie_lists([], [".mp4"], media, 1, [failed_folder]):
+        found.append(path)
+        if path.name == "ABC-001.mp4":
+            shutil.move(path, target / path.name)  # 刮削失败, 移入失败目录
+    assert len(found) == 21
+    assert target / "ABC-001.mp4" not in found
@@ -0,0 +1,19 @@
+import pytest
+
+from mdcx.utils.blob_store import BlobStore
+
+
+@pytest.mark.asyncio
+async def test_blob_store_link_and_evict(tmp_path):
+    store = BlobStore(tmp_path / "store", max_size=25)
+    await store.put("https://a/1.jpg", b"1" * 10)
+    assert await store.get("https://a/1.jpg") == b"1" * 10
+    assert await store.link(b"1" * 10, tmp_path / "thumb.jpg")
+    assert (tmp_path / "thumb.jpg").read_bytes() == b"1" * 10
+    assert not await store.link(b"2" * 10, tmp_path / "poster.jpg")
+
+    await store.put("https://a/2.jpg", b"2" * 10)
+    await store.put("https://a/3.jpg", b"3" * 10)  # 超出上限, 淘汰最久未使用的
+    assert await store.get("https://a/1.jpg") is None
+    assert (tmp_path / "thumb.jpg").read_bytes() == b"1" * 10
+    store.close()
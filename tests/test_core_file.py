@@ -0,0 +1,46 @@
+import pytest
+
+from mdcx.config.manager import manager
+from mdcx.core.file import DirListing, get_file_info_batch, get_file_info_v2, parse_file_names
+
+
+@pytest.mark.asyncio
+async def test_dir_listing(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "ABC-123.mp4").write_bytes(b"")
+    (tmp_path / "a" / "ABC-123.srt").write_text("")
+    (tmp_path / "a" / "link.mp4").symlink_to(tmp_path / "a" / "ABC-123.mp4")
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "ABC-456.nfo").write_text("")
+    listing = DirListing.scan([tmp_path / "a", tmp_path / "missing"])
+    (tmp_path / "a" / "ABC-123.nfo").write_text("")  # 列出后新增的文件不可见
+
+    assert await listing.exists(tmp_path / "a" / "ABC-123.srt")
+    assert not await listing.exists(tmp_path / "a" / "ABC-123.nfo")
+    assert await listing.islink(tmp_path / "a" / "link.mp4")
+    assert not await listing.islink(tmp_path / "a" / "ABC-123.mp4")
+    # 未列出的目录逐个判断
+    assert await listing.exists(tmp_path / "b" / "ABC-456.nfo")
+    assert not await listing.exists(tmp_path / "missing" / "x.srt")
+
+
+@pytest.mark.asyncio
+async def test_file_info_batch_is_read_only(tmp_path, monkeypatch):
+    subs = tmp_path / "subs"
+    subs.mkdir()
+    (subs / "ABC-123.srt").write_text("")
+    monkeypatch.setattr(manager.config, "subtitle_folder", str(subs))
+    monkeypatch.setattr(manager.config, "subtitle_add", True)
+    monkeypatch.setattr(manager.config, "subtitle_add_chs", False)
+    media = tmp_path / "media"
+    media.mkdir()
+    video = media / "ABC-123.mp4"
+    video.write_bytes(b"")
+
+    parsed = await parse_file_names([video])
+    infos = await get_file_info_batch(parsed)
+    assert infos[video].number == "ABC-123" and not infos[video].has_sub
+    assert not (media / "ABC-123.srt").exists()  # 预先分析时不复制字幕
+
+    info = await get_file_info_v2(video, parsed=parsed[video])
+    assert info.has_sub and (media / "ABC-123.srt").exists()
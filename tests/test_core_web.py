@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+import mdcx.core.web as web
+from mdcx.config.enums import HDPicSource
+from mdcx.config.manager import manager
+from mdcx.core.web import _get_big_poster, _get_big_thumb
+from mdcx.models.types import CrawlersResult, OtherInfo
+
+
+@pytest.fixture
+def hd_pic_search(monkeypatch):
+    """模拟高清图各来源, 记录调用顺序"""
+    sources = {"amazon": "", "official": ("", False), "google": ("", (0, 0))}
+    calls = []
+
+    async def amazon(result, title, actors):
+        calls.append("amazon")
+        return sources["amazon"]
+
+    async def official(url, number):
+        calls.append("official")
+        return sources["official"]
+
+    async def google(url, poster=False):
+        calls.append(("google", url))
+        if sources["google"] is None:
+            await asyncio.sleep(10)
+        return sources["google"]
+
+    async def imgsize(url):
+        return 400, 300
+
+    monkeypatch.setattr(web, "get_big_pic_by_amazon", amazon)
+    monkeypatch.setattr(web, "_get_official_poster", official)
+    monkeypatch.setattr(web, "get_big_pic_by_google", google)
+    monkeypatch.setattr(web, "get_imgsize", imgsize)
+    monkeypatch.setattr(manager.computed, "official_websites", {"ABC": "https://www.studio.com"}, raising=False)
+    monkeypatch.setattr(
+        manager.config,
+        "download_hd_pics",
+        [HDPicSource.POSTER, HDPicSource.AMAZON, HDPicSource.OFFICIAL, HDPicSource.GOOGLE],
+    )
+    return sources, calls
+
+
+def _poster_result():
+    result = CrawlersResult.empty()
+    result.number, result.letters, result.mosaic = "ABC-123", "ABC", "有码"
+    result.poster, result.poster_from = "https://a/small.jpg", "javdb"
+    return result, OtherInfo.empty()
+
+
+@pytest.mark.asyncio
+async def test_hd_poster_priority(hd_pic_search, monkeypatch):
+    sources, calls = hd_pic_search
+
+    # Amazon 找到时不请求 Google
+    sources["amazon"] = "https://amazon/big.jpg"
+    result, other = _poster_result()
+    await _get_big_poster(result, other)
+    assert (result.poster, result.poster_from) == ("https://amazon/big.jpg", "Amazon")
+    assert not [c for c in calls if c[0] == "google"]
+
+    # Amazon 未找到时使用官网图, 再以官网图搜索 Google
+    sources.update(amazon="", official=("https://studio/mid.jpg", False), google=("https://g/big.jpg", (1000, 1400)))
+    calls.clear()
+    result, other = _poster_result()
+    await _get_big_poster(result, other)
+    assert sorted(calls[:2]) == ["amazon", "official"] and calls[2:] == [("google", "https://studio/mid.jpg")]
+    assert (result.poster, other.poster_size, result.image_download) == ("https://g/big.jpg", (1000, 1400), True)
+
+    # 提前搜图: 先以原图搜索, 官网替换 poster 后重新搜索
+    monkeypatch.setattr(manager.config, "hd_pic_google_prefetch", True)
+    calls.clear()
+    result, other = _poster_result()
+    await _get_big_poster(result, other)
+    assert ("google", "https://a/small.jpg") in calls and calls[-1] == ("google", "https://studio/mid.jpg")
+
+
+@pytest.mark.asyncio
+async def test_hd_poster_timeout_rollback(hd_pic_search, monkeypatch):
+    sources, calls = hd_pic_search
+    sources.update(official=("https://studio/mid.jpg", True), google=None)  # Google 无响应
+    monkeypatch.setattr(manager.config, "hd_pic_timeout", 0.1)
+    result, other = _poster_result()
+    await _get_big_poster(result, other)
+    assert calls[-1] == ("google", "https://studio/mid.jpg")  # 超时前官网已修改 result
+    assert (result.poster, result.poster_from, result.image_download) == ("https://a/small.jpg", "javdb", False)
+
+
+@pytest.mark.asyncio
+async def test_hd_thumb_google_after_official(hd_pic_search, monkeypatch):
+    sources, calls = hd_pic_search
+    monkeypatch.setattr(manager.config, "download_hd_pics", [HDPicSource.THUMB, HDPicSource.GOOGLE])
+    sources["google"] = ("https://g/thumb.jpg", (1600, 1080))
+    result, other = _poster_result()
+    result.thumb, result.thumb_from = "https://a/thumb.jpg", "javdb"
+    await _get_big_thumb(result, other)
+    assert calls == [("google", "https://a/thumb.jpg")]
+    assert (result.thumb, result.thumb_from, other.thumb_size) == ("https://g/thumb.jpg", "Google(g)", (1600, 1080))
+
+    # 官网已是大图时不请求 Google
+    calls.clear()
+    result, other = _poster_result()
+    result.thumb, result.thumb_from = "https://faleno/thumb.jpg", "faleno"
+    await _get_big_thumb(result, other)
+    assert not calls and other.poster_big
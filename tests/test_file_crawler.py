@@ -0,0 +1,108 @@
+import asyncio
+import gc
+
+import pytest
+
+from mdcx.config.models import Config, FieldConfig, Website
+from mdcx.core.file_crawler import FileScraper
+from mdcx.gen.field_enums import CrawlerResultFields
+from mdcx.manual import ManualConfig
+from mdcx.models.types import CrawlerDebugInfo, CrawlerInput, CrawlerResponse, CrawlerResult
+
+# 各字段的来源优先级, 未列出的字段只使用 javbus
+PRIORITY = {
+    CrawlerResultFields.TITLE: [Website.DMM, Website.JAVDB, Website.JAVBUS, Website.FC2],
+    CrawlerResultFields.OUTLINE: [Website.DMM, Website.JAVBUS, Website.MGSTAGE, Website.AVSEX],
+}
+
+
+def _data(**kwargs) -> CrawlerResponse:
+    data = CrawlerResult.empty()
+    for k, v in kwargs.items():
+        setattr(data, k, v)
+    return CrawlerResponse(data=data, debug_info=CrawlerDebugInfo())
+
+
+class StubCrawler:
+    def __init__(self, site: Website, calls: list[Website], cancelled: list[Website]):
+        self.site, self.calls, self.cancelled = site, calls, cancelled
+
+    async def run(self, task_input: CrawlerInput) -> CrawlerResponse:
+        self.calls.append(self.site)
+        try:
+            match self.site:
+                case Website.DMM:  # 失败
+                    await asyncio.sleep(0.02)
+                    return CrawlerResponse(debug_info=CrawlerDebugInfo(error=ValueError("dmm failed")))
+                case Website.JAVDB:  # 超时
+                    await asyncio.sleep(0.05)
+                    raise TimeoutError
+                case Website.JAVBUS:  # 没有简介
+                    await asyncio.sleep(0.03)
+                    return _data(title="javbus title", thumb="https://javbus/thumb.jpg")
+                case Website.MGSTAGE:
+                    await asyncio.sleep(0.01)
+                    return _data(title="mgstage title", outline="mgstage outline")
+                case Website.AVSEX:  # 未被采用, 且在需要前就已失败
+                    raise RuntimeError("avsex failed")
+                case _:  # 未被采用, 一直等待
+                    await asyncio.sleep(10)
+                    return _data(title="never")
+        except asyncio.CancelledError:
+            self.cancelled.append(self.site)
+            raise
+
+
+class StubProvider:
+    def __init__(self):
+        self.calls: list[Website] = []
+        self.cancelled: list[Website] = []
+
+    async def get(self, site: Website) -> StubCrawler:
+        return StubCrawler(site, self.calls, self.cancelled)
+
+
+async def _crawl(eager: bool) -> tuple:
+    config = Config()
+    config.field_configs = {
+        field: FieldConfig(site_prority=PRIORITY.get(field, [Website.JAVBUS])) for field in ManualConfig.REDUCED_FIELDS
+    }
+    config.eager_crawl = eager
+    config.eager_crawl_count = 6
+    provider = StubProvider()
+    res = await FileScraper(config, provider)._call_crawlers(CrawlerInput.empty(), set(Website))
+    assert res is not None
+    return res, provider
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("eager", [False, True])
+async def test_call_crawlers_eager_matches_sequential(eager):
+    unhandled = []
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+    try:
+        res, provider = await _crawl(eager)
+        await asyncio.sleep(0.05)
+        gc.collect()  # 未读取的任务异常在回收时报告
+    finally:
+        loop.set_exception_handler(None)
+
+    assert (res.title, res.outline, res.thumb) == ("javbus title", "mgstage outline", "https://javbus/thumb.jpg")
+    assert res.field_sources[CrawlerResultFields.TITLE] == Website.JAVBUS.value
+    assert res.field_sources[CrawlerResultFields.OUTLINE] == Website.MGSTAGE.value
+    assert res.field_sources[CrawlerResultFields.THUMB] == Website.JAVBUS.value
+    assert unhandled == []
+    if eager:
+        assert set(provider.calls) == {
+            Website.DMM,
+            Website.JAVDB,
+            Website.JAVBUS,
+            Website.MGSTAGE,
+            Website.FC2,
+            Website.AVSEX,
+        }
+        assert provider.cancelled == [Website.FC2]  # 标题已确定, 不再需要 fc2
+    else:
+        assert provider.calls == [Website.DMM, Website.JAVDB, Website.JAVBUS, Website.MGSTAGE]
+        assert provider.cancelled == []
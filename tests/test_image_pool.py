@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from mdcx.utils.image_pool import (
+    ImagePool,
+    MarkJob,
+    add_marks,
+    cut_poster,
+    decode_image,
+    parse_image_size,
+    probe_image,
+    verify_image,
+)
+
+
+def test_image_pool_cut_and_mark(tmp_path):
+
+    thumb, fanart, poster = tmp_path / "thumb.jpg", tmp_path / "fanart.jpg", tmp_path / "poster.jpg"
+    Image.new("RGB", (800, 538), (200, 30, 30)).save(thumb)
+    fanart.write_bytes(thumb.read_bytes())
+    icon = tmp_path / "icon.png"
+    Image.new("RGBA", (40, 40), (0, 0, 255, 255)).save(icon)
+
+    assert cut_poster(thumb, poster, "") == "thumb right"
+    with Image.open(poster) as img:
+        assert img.size == (379, 538)
+
+    job = MarkJob(
+        pics=[thumb, fanart, poster], marks=[(icon, 0)], mark_size=5, mark_fixed="not_fixed", mark_pos_corner=""
+    )
+    assert add_marks(job) == []
+    assert thumb.read_bytes() == fanart.read_bytes()
+    with Image.open(thumb) as img:
+        r, g, b = img.getpixel((5, 5))
+        assert b > 200 and r < 50
+    assert not list(tmp_path.glob("*.[[]MARK[]].jpg"))
+
+
+@pytest.mark.asyncio
+async def test_image_pool_configure_keeps_queued_work(tmp_path):
+
+    gate = threading.Event()
+    pool = ImagePool("thread", 1)
+    blocked = asyncio.ensure_future(pool.run(gate.wait))
+    queued = asyncio.ensure_future(pool.run(sum, [1, 2]))
+    await asyncio.sleep(0.05)
+    pool.configure("process", 1)  # 刮削中修改设置
+    gate.set()
+    assert await blocked is True and await queued == 3
+
+    Image.new("RGB", (30, 20)).save(tmp_path / "a.png")
+    assert await pool.run(verify_image, str(tmp_path / "a.png")) == (30, 20)  # spawn 进程池
+    pool.close()
+
+
+def test_probe_image_header_and_trailer():
+
+    for fmt in ("JPEG", "PNG", "WEBP"):
+        out = BytesIO()
+        Image.effect_noise((300, 200), 64).convert("RGB").save(out, format=fmt)
+        content = out.getvalue()
+        assert probe_image(content) == (300, 200)
+        assert probe_image(content[: len(content) // 2]) is None
+        with pytest.raises(OSError):
+            decode_image(content[: len(content) // 2])
+
+
+@pytest.mark.parametrize(
+    "fmt, mode, kwargs",
+    [
+        ("JPEG", "RGB", {}),
+        ("JPEG", "RGB", {"progressive": True}),
+        ("PNG", "RGBA", {}),
+        ("WEBP", "RGB", {}),
+        ("WEBP", "RGBA", {}),
+        ("WEBP", "RGB", {"lossless": True}),
+        ("GIF", "RGB", {}),
+    ],
+)
+def test_parse_image_size(fmt, mode, kwargs):
+
+    out = BytesIO()
+    Image.new(mode, (1234, 567)).save(out, format=fmt, **kwargs)
+    assert parse_image_size(out.getvalue()[:4096]) == (1234, 567)
+    assert parse_image_size(out.getvalue()[:8]) is None
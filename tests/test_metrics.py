@@ -0,0 +1,53 @@
+import pytest
+
+from mdcx.metrics import Metrics
+
+
+def test_metrics_histogram_and_counter():
+    m = Metrics()
+    h = m.histogram("t_seconds", "耗时", ("stage",), buckets=(1, 2, 4))
+    c = m.counter("t_total", "次数", ("result",))
+    for v in (0.5, 1.5, 1.5, 3):
+        h.observe(v, "crawl")
+    with pytest.raises(ValueError), h.time("nfo"):  # 异常时同样记录
+        raise ValueError
+    c.inc('a"b')
+    c.inc('a"b', value=2)
+
+    crawl, nfo = m.snapshot()["metrics"]["t_seconds"]
+    assert crawl["labels"] == {"stage": "crawl"} and (crawl["count"], crawl["sum"], crawl["max"]) == (4, 6.5, 3)
+    assert 1 < crawl["p50"] <= 2 and 2 < crawl["p99"] <= 3
+    assert nfo["count"] == 1
+    assert m.snapshot()["metrics"]["t_total"] == [{"labels": {"result": 'a"b'}, "value": 3}]
+
+    text = m.prometheus()
+    assert 't_seconds_bucket{stage="crawl",le="2"} 3' in text
+    assert 't_seconds_bucket{stage="crawl",le="+Inf"} 4' in text
+    assert 't_seconds_count{stage="crawl"} 4' in text
+    assert 't_total{result="a\\"b"} 3' in text
+
+    m.clear()
+    assert m.snapshot()["metrics"] == {"t_seconds": [], "t_total": []}
+
+
+def test_metrics_api():
+    pytest.importorskip("fastapi")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from mdcx.metrics import STAGE_SECONDS, metrics
+    from mdcx.server.api.v1.metrics import router
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    metrics.clear()
+    STAGE_SECONDS.observe(0.2, "translate")
+
+    stages = client.get("/metrics/").json()["metrics"]["mdcx_stage_seconds"]
+    assert [(s["labels"], s["count"]) for s in stages] == [({"stage": "translate"}, 1)]
+    resp = client.get("/metrics/prometheus")
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'mdcx_stage_seconds_count{stage="translate"} 1' in resp.text
+    assert client.delete("/metrics/").status_code == 200
+    assert metrics.snapshot()["metrics"]["mdcx_stage_seconds"] == []
@@ -0,0 +1,28 @@
+import pytest
+
+from mdcx.number import get_file_number, get_number_letters, is_suren, is_uncensored
+
+
+@pytest.mark.parametrize(
+    "path,number,uncensored,letters",
+    [
+        ("/a/[javdb.com]ssis00123-C.mp4", "SSIS-123", False, "SSIS"),
+        ("/a/FC2-PPV-1234567_1.mp4", "FC2-1234567", False, "FC2"),
+        ("/a/HEYZO_1234.HD.X264.mp4", "HEYZO-1234", True, "HEYZO"),
+        ("/a/259LUXU-1456.mp4", "259LUXU-1456", False, "259LUXU"),
+        ("/a/sexart.21.01.02.title.mp4", "Sexart.21.01.02", True, "Sexart"),
+        ("/a/h_173mega05.mp4", "MEGA-05", False, "MEGA"),
+        ("/a/Mywife No.1234.mp4", "Mywife No.1234", False, "MYWIFE"),
+        ("/a/n1234.mp4", "n1234", True, "n"),
+    ],
+)
+def test_get_file_number(path, number, uncensored, letters):
+    for _ in range(2):  # 第二次命中缓存
+        assert get_file_number(path, ["javdb.com"]) == number
+    assert is_uncensored(number) == uncensored
+    assert get_number_letters(number) == letters
+
+
+def test_number_prefixes():
+    assert is_uncensored("heydouga-4030-123") and is_uncensored("Bird-001") and not is_uncensored("BTS-001")
+    assert is_suren("GANA-2556") and is_suren("300MIUM-123") and not is_suren("SSIS-123")
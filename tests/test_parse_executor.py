@@ -0,0 +1,45 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from mdcx.utils.parse_executor import ParseExecutor, run_sync
+
+
+def test_run_sync():
+    async def parse(x):
+        return x * 2
+
+    async def fetch():
+        await asyncio.sleep(0)
+
+    assert run_sync(parse(2)) == 4
+    with pytest.raises(RuntimeError, match="挂起"):
+        run_sync(fetch())
+
+
+@pytest.mark.asyncio
+async def test_parse_executor_modes():
+    executor = ParseExecutor("none", 1)
+    assert await executor.run(threading.get_ident) == threading.get_ident()
+    assert (await executor.selector("<p>a</p>")).css("p::text").get() == "a"
+
+    executor.configure("thread", 1)
+    assert await executor.run(threading.get_ident) != threading.get_ident()
+    assert executor._processes is None
+
+    executor.configure("process", 1)
+    assert executor._threads is None  # 配置变化时关闭旧池
+    assert await executor.run(os.getpid) != os.getpid()
+    assert executor._processes is not None
+    assert executor._processes._mp_context.get_start_method() == "spawn"
+    # Selector 无法序列化, 进程池模式下仍在线程池中构造
+    assert (await executor.selector("<p>b</p>")).css("p::text").get() == "b"
+    assert executor._threads is not None
+
+    processes = executor._processes
+    executor.configure("process", 1)  # 配置未变化时保留已有的池
+    assert executor._processes is processes
+    executor.close()
+    assert executor._threads is None and executor._processes is None
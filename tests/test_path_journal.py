@@ -0,0 +1,36 @@
+import ntpath
+import os
+from pathlib import Path
+
+from mdcx.utils.path_journal import PathJournal
+
+
+def test_path_journal_append_and_compact(tmp_path):
+    f = tmp_path / "success.txt"
+    f.write_text("/a/1.mp4\n/a/1.mp4\n/a/2")  # 重复行, 无扩展名, 末尾无换行
+    journal = PathJournal()
+    journal.load(f)
+    assert len(journal) == 1 and Path("/a/1.mp4") in journal and "/a/2" not in journal
+
+    journal.add(Path("/b/3.mp4"))
+    journal.flush()
+    assert f.read_text().splitlines() == ["/a/1.mp4", "/a/1.mp4", "/a/2", "/b/3.mp4"]
+
+    journal.clear()
+    journal.add("/c/4.mp4")
+    journal.flush()
+    assert f.read_text() == "/c/4.mp4\n"
+
+
+def test_path_journal_normcase(tmp_path, monkeypatch):
+    monkeypatch.setattr(os.path, "normcase", ntpath.normcase)  # 模拟 Windows
+    f = tmp_path / "success.txt"
+    f.write_text("C:/Media/A.mp4\n")
+    journal = PathJournal()
+    journal.load(f)
+    assert "c:\\media\\a.MP4" in journal and Path("C:/MEDIA/a.mp4") in journal
+    journal.add("c:\\media\\a.mp4")
+    journal.add("C:/Media/B.mp4")
+    assert len(journal) == 2 and "c:/media/b.mp4" in journal
+    journal.flush()
+    assert f.read_text().splitlines() == ["C:/Media/A.mp4", "C:/Media/B.mp4"]  # 保留原始写法
@@ -0,0 +1,53 @@
+import os
+import time
+
+import pytest
+
+from mdcx.config.computed import Computed
+from mdcx.config.models import Config
+from mdcx.utils.probe_cache import ProbeCache
+from mdcx.utils.video_pool import video_prober
+
+
+@pytest.mark.asyncio
+async def test_probe_cache_invalidates_on_change(tmp_path):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"0" * 100)
+    old = time.time() - 60
+    os.utime(video, (old, old))
+    link = tmp_path / "link.mp4"
+    link.symlink_to(video)
+
+    cache = ProbeCache(tmp_path / "probe.db")
+    await cache.put(video, (1080, "H264"))
+    assert await cache.get_many([video, link, tmp_path / "missing.mp4"]) == {
+        video: (1080, "H264"),
+        link: (1080, "H264"),
+    }
+    await cache.flush()
+    cache.close()
+
+    cache = ProbeCache(tmp_path / "probe.db")
+    assert await cache.get(video) == (1080, "H264")
+    video.write_bytes(b"1" * 101)
+    assert await cache.get(video) is None
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_probe_cache_kept_on_config_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(video_prober, "cache", None)
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"0" * 100)
+    old = time.time() - 60
+    os.utime(video, (old, old))
+    config = Config()
+    first = Computed(config, tmp_path).probe_cache
+    await first.put(video, (1080, "H264"))  # 尚未提交
+    config.video_probe_cache = False
+    assert Computed(config, tmp_path).probe_cache is first and not first.enabled
+
+    other = Computed(config, tmp_path / "other").probe_cache
+    assert other is not first and first._conn is None  # 路径变化时关闭旧缓存
+    assert await ProbeCache(first.path).get(video) == (1080, "H264")
+    other.close()
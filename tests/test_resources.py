@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from lxml import etree
+
+from mdcx.config.resources import MAPPING_XPATH, build_mapping_index, find_mapping, normalize_mapping_name, resources
+
+MAPPING = """<?xml version='1.0' encoding='utf-8'?>
+<actor>
+  <a zh_cn="甲" zh_tw="甲" jp="甲" keyword=",Alice,ａｌｉｃｅ・Ｂ,甲," href="" />
+  <a zh_cn="乙" zh_tw="乙" jp="乙" keyword=",alice,乙,丙," href="" />
+  <a zh_cn="丙" zh_tw="丙" jp="丙" keyword=",丙,Bob," href="" />
+</actor>
+"""
+
+
+def _parse(content: str):
+    return etree.HTML(content.encode("utf-8"), parser=etree.HTMLParser(encoding="utf-8"))
+
+
+def _xpath_find(root, name: str):
+    r = root.xpath(MAPPING_XPATH, name=f",{normalize_mapping_name(name)},")
+    return r[0] if r else None
+
+
+def _sample_names(root, count: int) -> list[str]:
+    """从映射表中均匀取出 count 个节点的关键词作为查询样本. XPath 每次查询都扫描全表, 样本不宜过多"""
+    nodes = list(root.iter("a"))
+    names = []
+    for node in nodes[:: max(len(nodes) // count, 1)]:
+        keywords = [k for k in (node.get("keyword") or "").strip(",").split(",") if k][:2]
+        names += keywords + [k.lower() for k in keywords if k.lower() != k]
+        if len(keywords) > 1:
+            names.append(",".join(keywords))  # 跨越多个关键词
+    return names + ["not-exist", ""]
+
+
+def test_find_mapping_matches_xpath():
+    sample = _parse(MAPPING)
+    index = build_mapping_index(sample)
+    assert find_mapping(sample, index, "ALICE").get("zh_cn") == "甲"  # 多个节点包含同一关键词时取第一个
+    assert find_mapping(sample, index, "alice・b").get("zh_cn") == "甲"
+    assert find_mapping(sample, index, "乙,丙").get("zh_cn") == "乙"
+    assert find_mapping(sample, index, "丙,bob").get("zh_cn") == "丙"
+    assert find_mapping(sample, index, "Ali") is None
+    assert find_mapping(None, {}, "Alice") is None
+
+    for root in (resources.actor_mapping_data, resources.info_mapping_data, sample):
+        assert root is not None
+        index = build_mapping_index(root)
+        for name in _sample_names(root, 10):
+            assert find_mapping(root, index, name) is _xpath_find(root, name), name
+
+
+@pytest.mark.parametrize("get, kind", [(resources.get_actor_data, "actor"), (resources.get_info_data, "info")])
+def test_mapping_reloaded_before_lookup(tmp_path, monkeypatch, get, kind):
+    paths = {"actor": tmp_path / "mapping_actor.xml", "info": tmp_path / "mapping_info.xml"}
+    for p in paths.values():
+        p.write_text(MAPPING, encoding="utf-8")
+    monkeypatch.setattr(resources, "_actor_map_path", paths["actor"])
+    monkeypatch.setattr(resources, "_info_map_path", paths["info"])
+    for attr in ("actor_mapping_data", "info_mapping_data", "actor_mapping_index", "info_mapping_index"):
+        monkeypatch.setattr(resources, attr, getattr(resources, attr))
+    monkeypatch.setattr(resources, "_mapping_mtime", (0.0, 0.0))
+
+    assert get("Bob")["zh_cn"] == "丙"
+    paths[kind].write_text(MAPPING.replace('zh_cn="丙"', 'zh_cn="丁"'), encoding="utf-8")
+    mtime = os.path.getmtime(paths[kind]) + 10
+    os.utime(paths[kind], (mtime, mtime))
+    assert get("Bob")["zh_cn"] == "丁"  # 首次查询即使用新映射表
@@ -0,0 +1,25 @@
+import os
+import time
+
+from mdcx.utils.scan_index import ScanIndex
+
+
+def test_scan_index_reuse_unchanged_dirs(tmp_path):
+    media = tmp_path / "media"
+    (media / "a").mkdir(parents=True)
+    (media / "b").mkdir()
+    (media / "a" / "1.mp4").touch()
+    old = time.time() - 60
+    for d in (media, media / "a", media / "b"):
+        os.utime(d, (old, old))
+
+    index = ScanIndex(tmp_path / "index.json")
+    first = [(r, f) for r, _, f, _ in index.walk(media)]
+    index.save(media)
+
+    (media / "b" / "2.mp4").touch()
+    os.utime(media / "b", (old + 1, old + 1))
+    index = ScanIndex(tmp_path / "index.json")
+    second = [(r, f) for r, _, f, _ in index.walk(media)]
+    assert (index.hits, index.misses) == (2, 1)
+    assert second == [(r, ["2.mp4"] if r.name == "b" else f) for r, f in first]
@@ -0,0 +1,21 @@
+import asyncio
+
+from mdcx.core.scraper import _iter_list, _iter_scan, _walk_key
+from mdcx.utils.scan_index import ScanIndex
+
+
+def test_resume_scan_order(tmp_path):
+    media = tmp_path / "media"
+    for f in ("z.mp4", "a/2.mp4", "a/b/1.mp4", "a/c.mp4", "b/0.mp4"):
+        (media / f).parent.mkdir(parents=True, exist_ok=True)
+        (media / f).touch()
+    walked = []
+    for root, dirs, files, _ in ScanIndex(None).walk(media):
+        dirs.sort()  # 与 iter_movie_lists 相同
+        walked += [root / f for f in sorted(files)]
+    assert walked == sorted(walked, key=lambda p: _walk_key(p, media))
+
+    async def resume(after):
+        return [p async for p in _iter_scan(_iter_list(walked), media, after)]
+
+    assert asyncio.run(resume(media / "a" / "c.mp4")) == [media / "a" / "b" / "1.mp4", media / "b" / "0.mp4"]
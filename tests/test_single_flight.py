@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+from mdcx.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_promote_on_failure():
+    sf = SingleFlight[str, str]()
+    runs = []
+
+    async def job(i: int, fail: bool):
+        is_leader, r = await sf.join("ABC-123")
+        if not is_leader:
+            return r
+        runs.append(i)
+        await asyncio.sleep(0.01)
+        sf.done(None if fail else f"result-{i}")
+        return None if fail else f"result-{i}"
+
+    results = await asyncio.gather(job(1, True), job(2, False), job(3, False))
+    assert runs == [1, 2]
+    assert results == [None, "result-2", "result-2"]
+    assert await job(4, False) == "result-2"
@@ -1,9 +1,15 @@
 import os
+import struct
 import subprocess
 
 import pytest
 
-from mdcx.utils.video import get_video_metadata_ffmpeg, get_video_metadata_pyav
+from mdcx.utils.video import (
+    get_video_metadata,
+    get_video_metadata_ffmpeg,
+    get_video_metadata_header,
+    get_video_metadata_pyav,
+)
 
 
 def create_dummy_video(path, size="320x240", vcodec="libx264", fmt="mp4", pix_fmt=None):
@@ -27,7 +33,7 @@ VIDEO_CASES = [
 
 
 @pytest.mark.parametrize("fname,size,vcodec,fmt,pix_fmt,expect_height,expect_codec", VIDEO_CASES)
-@pytest.mark.parametrize("func", [get_video_metadata_pyav, get_video_metadata_ffmpeg])
+@pytest.mark.parametrize("func", [get_video_metadata_pyav, get_video_metadata_ffmpeg, get_video_metadata])
 def test_get_video_metadata_all(tmpdir, fname, size, vcodec, fmt, pix_fmt, expect_height, expect_codec, func):
     video_path = os.path.join(tmpdir, fname)
     create_dummy_video(video_path, size=size, vcodec=vcodec, fmt=fmt, pix_fmt=pix_fmt)
@@ -37,3 +43,46 @@ def test_get_video_metadata_all(tmpdir, fname, size, vcodec, fmt, pix_fmt, expec
         assert c == expect_codec, f"{func.__name__} codec mismatch for {video_path}"
     except ImportError:
         pytest.skip(f"{func.__name__} not available (ImportError)")
+
+
+def box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def ebml(eid: int, payload: bytes) -> bytes:
+    return eid.to_bytes((eid.bit_length() + 7) // 8) + (0x01 << 56 | len(payload)).to_bytes(8) + payload
+
+
+def make_mp4(fourcc: bytes, height: int) -> bytes:
+    entry = box(fourcc, bytes(24) + struct.pack(">HH", height * 16 // 9, height) + bytes(50))
+    stbl = box(b"stbl", box(b"stsd", struct.pack(">II", 0, 1) + entry))
+    sound = box(b"trak", box(b"mdia", box(b"hdlr", bytes(8) + b"soun" + bytes(12))))
+    video = box(b"trak", box(b"mdia", box(b"hdlr", bytes(8) + b"vide" + bytes(12)) + box(b"minf", stbl)))
+    # moov 位于 mdat 之后
+    return box(b"ftyp", b"isom" + bytes(4)) + box(b"mdat", bytes(1000)) + box(b"moov", sound + video)
+
+
+def make_mkv(codec_id: str, height: int) -> bytes:
+    track = ebml(0x83, b"\x01") + ebml(0x86, codec_id.encode()) + ebml(0xE0, ebml(0xBA, height.to_bytes(2)))
+    tracks = ebml(0x1654AE6B, ebml(0xAE, ebml(0x83, b"\x02")) + ebml(0xAE, track))
+    segment = b"\x18\x53\x80\x67\x01\xff\xff\xff\xff\xff\xff\xff" + ebml(0x1549A966, bytes(10)) + tracks  # 大小未知
+    return ebml(0x1A45DFA3, ebml(0x4282, b"matroska")) + segment
+
+
+@pytest.mark.parametrize(
+    "data,expected",
+    [
+        (make_mp4(b"avc1", 1080), (1080, "H264")),
+        (make_mp4(b"hev1", 2160), (2160, "HEVC")),
+        (make_mp4(b"encv", 720), None),
+        (make_mkv("V_MPEGH/ISO/HEVC", 720), (720, "HEVC")),
+        (make_mkv("V_MS/VFW/FOURCC", 720), None),
+        (b"RIFF" + bytes(100), None),
+        (make_mp4(b"avc1", 1080)[:-20], None),
+    ],
+    ids=["mp4", "mp4-hevc", "mp4-encrypted", "mkv", "mkv-unknown-codec", "avi", "mp4-truncated"],
+)
+def test_get_video_metadata_header(tmp_path, data, expected):
+    p = tmp_path / "video"
+    p.write_bytes(data)
+    assert get_video_metadata_header(p) == expected
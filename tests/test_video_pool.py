@@ -0,0 +1,64 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from mdcx.utils import video_pool
+from mdcx.utils.probe_cache import ProbeCache
+
+
+@pytest.mark.asyncio
+async def test_video_prober_batches_and_caches(tmp_path, monkeypatch):
+
+    calls = []
+
+    def fake_metadata(p: Path):
+        calls.append(p.name)
+        if p.name == "bad.mp4":
+            raise ValueError("broken")
+        return 1080, "HEVC"
+
+    old = time.time() - 60
+    for name in ["a.mp4", "b.mp4", "bad.mp4"]:
+        (tmp_path / name).write_bytes(b"0")
+        os.utime(tmp_path / name, (old, old))
+    monkeypatch.setattr(video_pool, "get_video_metadata", fake_metadata)
+    prober = video_pool.VideoProber(2)
+    prober.configure(2, ProbeCache(tmp_path / "probe.db"))
+    prober._pool = ThreadPoolExecutor(2)
+
+    a, b, a2, bad = await asyncio.gather(
+        *(prober.probe(tmp_path / n) for n in ["a.mp4", "b.mp4", "a.mp4", "bad.mp4"]), return_exceptions=True
+    )
+    assert a == b == a2 == (1080, "HEVC")
+    assert isinstance(bad, RuntimeError) and "broken" in str(bad)
+    assert sorted(calls) == ["a.mp4", "b.mp4", "bad.mp4"]
+
+    assert await prober.probe(tmp_path / "a.mp4") == (1080, "HEVC")
+    assert len(calls) == 3
+    prober.close()
+
+
+@pytest.mark.asyncio
+async def test_video_prober_close_resolves_waiters(tmp_path, monkeypatch):
+
+    gate = threading.Event()
+
+    def slow_metadata(p: Path):
+        gate.wait(5)
+        return 720, "H264"
+
+    monkeypatch.setattr(video_pool, "get_video_metadata", slow_metadata)
+    prober = video_pool.VideoProber(2)
+    prober._pool = ThreadPoolExecutor(1)  # 第二批在池中排队
+    probes = [asyncio.ensure_future(prober.probe(tmp_path / f"{i}.mp4")) for i in range(prober.BATCH + 1)]
+    await asyncio.sleep(0.1)
+    prober.close()  # 取消排队中的批次
+    gate.set()
+    results = await asyncio.wait_for(asyncio.gather(*probes, return_exceptions=True), 5)
+    assert results[: prober.BATCH] == [(720, "H264")] * prober.BATCH
+    assert isinstance(results[-1], RuntimeError)
@@ -0,0 +1,60 @@
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from mdcx.web_async import AdaptiveLimiter, _is_throttled, _parse_retry_after
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_one_decrease_per_window():
+    limiter = AdaptiveLimiter(16, max_rate=20)
+    tickets = [await limiter.acquire() for _ in range(3)]  # 并发请求同时被限流
+    for t in tickets:
+        limiter.on_throttle(acquired_at=t)
+    assert limiter.rate == 8
+
+    t = await limiter.acquire()  # 降速后发出的请求仍被限流
+    limiter.on_throttle(acquired_at=t)
+    assert limiter.rate == 4
+    limiter.on_throttle(acquired_at=tickets[0])
+    assert limiter.rate == 4
+
+    limiter.on_success()
+    assert limiter.rate == 4.25
+    for _ in range(10):
+        limiter.on_throttle()
+    assert limiter.rate == limiter.min_rate
+
+    limiter.on_throttle(retry_after=5)
+    assert limiter._blocked_until - time.monotonic() == pytest.approx(5, abs=0.5)
+
+
+def test_parse_retry_after():
+    assert _parse_retry_after(None) is None
+    assert _parse_retry_after("abc") is None
+    assert _parse_retry_after("5") == 5
+    assert _parse_retry_after("-3") == 0
+    assert _parse_retry_after("3600") == 60
+    assert _parse_retry_after(formatdate(time.time() + 30, usegmt=True)) == pytest.approx(30, abs=2)
+    assert _parse_retry_after(formatdate(time.time() - 30, usegmt=True)) == 0
+    assert _parse_retry_after(formatdate(time.time() + 3600, usegmt=True)) == 60
+
+
+@pytest.mark.parametrize(
+    "status, headers, content, stream, expected",
+    [
+        (429, {}, b"", False, True),
+        (503, {}, b"", True, True),
+        (200, {"cf-mitigated": "challenge"}, b"", False, True),
+        (403, {"Server": "cloudflare"}, b"<title>Just a moment...</title>", False, True),
+        (403, {"Server": "cloudflare"}, b"<title>Just a moment...</title>", True, False),  # 流式响应不读取内容
+        (403, {"Server": "cloudflare"}, b"Forbidden", False, False),
+        (403, {"Server": "nginx"}, b"Just a moment", False, False),
+        (404, {}, b"", False, False),
+    ],
+)
+def test_is_throttled(status, headers, content, stream, expected):
+    resp = SimpleNamespace(status_code=status, headers=headers, content=content)
+    assert _is_throttled(resp, stream) is expected  # type: ignore[arg-type]
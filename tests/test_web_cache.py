@@ -0,0 +1,86 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from mdcx.web_async import AsyncWebClient
+from mdcx.web_cache import AsyncWebCache
+
+
+@pytest.mark.asyncio
+async def test_web_cache_put_get_expire_evict(tmp_path, monkeypatch):
+    cache = AsyncWebCache(tmp_path / "web.db", max_size=2000, ttl=60, site_ttls={"dmm": 10})
+    key = cache.make_key("https://a/1", {"b": "2", "a": "1"})
+    assert key == cache.make_key("https://a/1", {"a": "1", "b": "2"}) != cache.make_key("https://a/1")
+    assert await cache.get(key) is None
+    await cache.put(key, "https://a/1", b"<html>1</html>", etag='"e1"')
+    entry = await cache.get(key)
+    assert entry is not None and (entry.body, entry.etag) == (b"<html>1</html>", '"e1"')
+    assert entry.fresh(cache.get_ttl("javdb"))
+
+    # 过期
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+    assert entry.fresh(cache.get_ttl("javdb")) and not entry.fresh(cache.get_ttl("dmm"))
+    await cache.touch(key)
+    assert (await cache.get(key)).fresh(cache.get_ttl("dmm"))
+
+    # 淘汰最久未访问的
+    keys = [cache.make_key(f"https://a/{i}") for i in range(2, 5)]
+    for i, k in enumerate(keys):
+        monkeypatch.setattr(time, "time", lambda i=i: now + 40 + i)
+        await cache.put(k, "", os.urandom(700))
+    assert await cache.get(keys[0]) is None and await cache.get(key) is None
+    assert await cache.get(keys[2]) is not None
+    cache.close()
+
+    disabled = AsyncWebCache(tmp_path / "web.db", enabled=False)
+    assert await disabled.get(keys[2]) is None
+
+
+@pytest.mark.asyncio
+async def test_web_cache_deferred_commit(tmp_path, monkeypatch):
+
+    cache = AsyncWebCache(tmp_path / "web.db")
+    client = AsyncWebClient(timeout=5, cache=cache)
+    requests = []
+
+    async def request(method, url, **kwargs):
+        requests.append(url)
+        return SimpleNamespace(status_code=200, content=b"page", text="page", headers={}), ""
+
+    monkeypatch.setattr(client, "request", request)
+    for url in ("https://a/bad", "https://a/ok", "https://a/bad", "https://a/ok"):
+        assert await client.get_text(url, cache_site="javdb", cache_deferred=True) == ("page", "")
+        if url.endswith("ok"):
+            await client.commit_cache(url)
+    assert requests == ["https://a/bad", "https://a/ok", "https://a/bad"]  # 仅校验通过的响应被缓存
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_web_cache_search_ttl(tmp_path, monkeypatch):
+    cache = AsyncWebCache(tmp_path / "web.db", ttl=3600, search_ttl=60, site_search_ttls={"dmm": 10})
+    assert (cache.get_ttl("dmm"), cache.get_ttl("dmm", True), cache.get_ttl("javdb", True)) == (3600, 10, 60)
+    client = AsyncWebClient(timeout=5, cache=cache)
+    requests = []
+
+    async def request(method, url, **kwargs):
+        requests.append(url)
+        return SimpleNamespace(status_code=200, content=b"page", text="page", headers={}), ""
+
+    monkeypatch.setattr(client, "request", request)
+    for url, search in (("https://a/search", True), ("https://a/detail", False)):
+        await client.get_text(url, cache_site="javdb", cache_deferred=True, cache_search=search)
+        await client.commit_cache(url)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    for url, search in (("https://a/search", True), ("https://a/detail", False)):
+        await client.get_text(url, cache_site="javdb", cache_deferred=True, cache_search=search)
+    assert requests == ["https://a/search", "https://a/detail", "https://a/search"]  # 仅搜索页过期
+
+    cache.force_refresh = True
+    await client.get_text("https://a/detail", cache_site="javdb", cache_deferred=True)
+    assert requests[-1] == "https://a/detail"
+    cache.close()
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mdcx.web_async import AsyncWebClient
+from mdcx.web_download import RangeDownload, _gaps, _merge
+
+
+def test_range_download_gaps():
+    done = []
+    for r in [(20, 30), (0, 10), (10, 15), (25, 40)]:
+        done = _merge(done, r)
+    assert done == [(0, 15), (20, 40)]
+    assert _gaps(done, 50) == [[15, 20], [40, 50]]
+    assert _gaps([(0, 50)], 50) == []
+
+
+@pytest.fixture
+def range_server():
+    """支持 Range 请求的本地服务器. ETag 及是否支持 Range 可修改, 记录收到的 Range"""
+    state = {"body": os.urandom(3 * 1024**2 + 123), "etag": '"v1"', "range": True, "ranges": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = state["body"]
+            header = self.headers.get("Range")
+            if header and state["range"]:
+                start, end = (int(x) for x in header.removeprefix("bytes=").split("-"))
+                state["ranges"].append((start, end))
+                data = body[start : end + 1]
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{start + len(data) - 1}/{len(body)}")
+            else:
+                data = body
+                self.send_response(200)
+            self.send_header("ETag", state["etag"])
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}/trailer.mp4"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_range_download_resume_and_restart(tmp_path, range_server):
+    body, url = range_server["body"], range_server["url"]
+    client = AsyncWebClient(timeout=10)
+    target = tmp_path / "trailer.mp4"
+    part, state = tmp_path / "trailer.mp4.part", tmp_path / "trailer.mp4.part.json"
+
+    def interrupted(done: int, validator: str):
+        """模拟上次下载中断: 已完成前 done 字节"""
+        part.write_bytes(body[:done] + bytes(len(body) - done))
+        state.write_text(json.dumps({"url": url, "size": len(body), "validator": validator, "done": [[0, done]]}))
+
+    # 续传: 只请求未完成的部分
+    interrupted(1024**2, '"v1"')
+    assert await RangeDownload(client, url, target, len(body), use_proxy=False).run()
+    assert target.read_bytes() == body and not part.exists() and not state.exists()
+    assert min(s for s, _ in range_server["ranges"]) == 1024**2
+
+    # 远程文件已改变: 从头重新下载
+    target.unlink()
+    range_server["ranges"].clear()
+    range_server["body"] = body = os.urandom(len(body))
+    range_server["etag"] = '"v2"'
+    interrupted(1024**2, '"v1"')
+    assert await RangeDownload(client, url, target, len(body), use_proxy=False).run()
+    assert target.read_bytes() == body
+    assert min(s for s, _ in range_server["ranges"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_range_download_unsupported_fallback(tmp_path, range_server):
+    range_server["range"] = False  # 忽略 Range, 返回 200 及完整内容
+    client = AsyncWebClient(timeout=10)
+    target = tmp_path / "trailer.mp4"
+    body, url = range_server["body"], range_server["url"]
+    assert await client._download_chunks(url, target, len(body), use_proxy=False) is None
+    assert not list(tmp_path.iterdir())  # 已清理未完成的数据
+    assert await client.download(url, target, use_proxy=False, file_size=len(body))
+    assert target.read_bytes() == body
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from mdcx.web_scheduler import DownloadPriority, DownloadScheduler
+
+
+@pytest.mark.asyncio
+async def test_download_scheduler_priority_and_fairness():
+    scheduler = DownloadScheduler(max_total=1, max_per_host=1)
+    order = []
+    gate = asyncio.Event()
+
+    async def job(name, url, priority, group):
+        async with scheduler.slot(url, priority, group):
+            order.append(name)
+            await gate.wait()
+
+    first = asyncio.create_task(job("first", "https://a/0", DownloadPriority.IMAGE, "x"))
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(job(n, f"https://a/{n}", p, g))
+        for n, p, g in [
+            ("trailer", DownloadPriority.TRAILER, "x"),
+            ("x1", DownloadPriority.EXTRAFANART, "x"),
+            ("x2", DownloadPriority.EXTRAFANART, "x"),
+            ("y1", DownloadPriority.EXTRAFANART, "y"),
+            ("thumb", DownloadPriority.IMAGE, "y"),
+        ]
+    ]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(first, *tasks)
+    assert order == ["first", "thumb", "x1", "y1", "x2", "trailer"]
+    assert scheduler.active == 0
+
+    # 域名名额已满时, 其他域名的请求不受影响
+    scheduler = DownloadScheduler(max_total=2, max_per_host=1)
+    gate.clear()
+    order.clear()
+    tasks = [asyncio.create_task(job(n, f"https://{n}/", DownloadPriority.IMAGE, "")) for n in ["a", "a", "b"]]
+    await asyncio.sleep(0)
+    assert order == ["a", "b"]
+    gate.set()
+    await asyncio.gather(*tasks)